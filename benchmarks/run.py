@@ -0,0 +1,332 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import argparse
+import datetime
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+import requests
+
+from seed_salesforce.salesforce_client import SalesforceClient
+from seed_salesforce.utils import format_soql
+from tests.mock_salesforce import DEFAULT_PAGE_SIZE, mock_client
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+# maximum drop of records/sec from the baseline before `--baseline` reports a regression
+DEFAULT_MAX_REGRESSION = 0.2
+
+
+@dataclass
+class Scenario:
+    """Benchmark of a client workflow against the mock, run on `size` records
+
+    Args:
+        name (str): name of the scenario in the results
+        description (str): what the scenario does
+        size (int): default number of records
+        seed (Callable): called with (mock admin, size) to add the records the scenario starts from
+        run (Callable): called with (client, size) to run the workflow, returns the number of records processed
+    """
+
+    name: str
+    description: str
+    size: int
+    seed: Callable[["MockAdmin", int], None]
+    run: Callable[[SalesforceClient, int], int]
+
+
+class MockAdmin:
+    def __init__(self, instance_url: str) -> None:
+        """Control of a mock served by another process, see `MockSalesforce._admin`
+
+        Args:
+            instance_url (str): URL of the mock, e.g., http://127.0.0.1:50123
+        """
+        self.instance_url = instance_url
+        self.session = requests.Session()
+
+    def reset(self) -> None:
+        self.session.post(f"{self.instance_url}/mock/reset").raise_for_status()
+
+    def configure(self, **settings) -> None:
+        self.session.post(f"{self.instance_url}/mock/config", json=settings).raise_for_status()
+
+    def seed(self, object_name: str, records: list) -> list:
+        response = self.session.post(f"{self.instance_url}/mock/records/{object_name}", json=records)
+        response.raise_for_status()
+        return response.json()["ids"]
+
+    def stats(self) -> dict:
+        response = self.session.get(f"{self.instance_url}/mock/stats")
+        response.raise_for_status()
+        return response.json()
+
+
+def _benchmark(index: int) -> dict:
+    return {"Salesforce_Benchmark_ID__c": f"BM-{index:06d}", "Site_EUI__c": 80.5 + index % 20}
+
+
+def _seed_benchmarks(mock: MockAdmin, size: int) -> None:
+    mock.seed("Benchmark__c", [_benchmark(index) for index in range(size)])
+
+
+def _contact_email(index: int) -> str:
+    return f"contact{index:06d}@example.com"
+
+
+def _seed_contacts(mock: MockAdmin, size: int) -> None:
+    mock.seed("Contact", [{"LastName": f"Contact {index}", "Email": _contact_email(index)} for index in range(size)])
+
+
+def _seed_properties(mock: MockAdmin, size: int) -> None:
+    mock.seed("Property__c", [{"Name": f"Property {index}", "Gross_Floor_Area__c": 1000.0} for index in range(size)])
+
+
+def _property_ids(sf: SalesforceClient, size: int) -> list:
+    return [record["Id"] for record in sf.iter_query(format_soql("SELECT Id FROM Property__c LIMIT {}", size))]
+
+
+def _sync_benchmarks(sf: SalesforceClient, size: int) -> int:
+    # half of the benchmarks exist, the other half are created
+    records = ({**_benchmark(index), "ENERGY_STAR_Score__c": 75} for index in range(size // 2, size + size // 2))
+    results = sf.bulk_upsert_benchmarks(records)
+    return sum(result.success for result in results)
+
+
+def _stream_benchmarks(sf: SalesforceClient, _size: int) -> int:
+    soql = "SELECT Id, Salesforce_Benchmark_ID__c, Site_EUI__c FROM Benchmark__c"
+    return sum(1 for _ in sf.iter_query(soql, batch_size=2000))
+
+
+def _resolve_contacts(sf: SalesforceClient, size: int) -> int:
+    found = sf.find_contacts_by_emails(_contact_email(index) for index in range(size))
+    return sum(bool(contact) for contact in found.values())
+
+
+def _update_properties(sf: SalesforceClient, size: int) -> int:
+    records = [{"Id": property_id, "Gross_Floor_Area__c": 2000.0} for property_id in _property_ids(sf, size)]
+    return sum(result.success for result in sf.update_records("Property__c", records))
+
+
+def _update_properties_concurrently(sf: SalesforceClient, size: int) -> int:
+    items = [
+        {"property_id": property_id, "Gross_Floor_Area__c": 3000.0, "fetch": False}
+        for property_id in _property_ids(sf, size)
+    ]
+    return len(sf.map_concurrent("update_property", items, max_workers=16))
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in [
+        Scenario(
+            "sync_benchmarks",
+            "Upsert benchmarks with Bulk API 2.0, half of them new",
+            10000,
+            _seed_benchmarks,
+            _sync_benchmarks,
+        ),
+        Scenario(
+            "stream_benchmarks",
+            "Stream all the benchmarks with iter_query",
+            10000,
+            _seed_benchmarks,
+            _stream_benchmarks,
+        ),
+        Scenario(
+            "resolve_contacts",
+            "Find contacts by email with find_contacts_by_emails",
+            5000,
+            _seed_contacts,
+            _resolve_contacts,
+        ),
+        Scenario(
+            "update_properties",
+            "Update properties with the sObject Collections API",
+            2000,
+            _seed_properties,
+            _update_properties,
+        ),
+        Scenario(
+            "update_properties_concurrently",
+            "Update properties one by one with map_concurrent on 16 threads",
+            500,
+            _seed_properties,
+            _update_properties_concurrently,
+        ),
+    ]
+}
+
+
+def _run_once(scenario: Scenario, mock: MockAdmin, size: int, trace_memory: bool) -> dict:
+    """Run a scenario on fresh data with a new client, so the describe requests of the schema registry are included"""
+    mock.reset()
+    scenario.seed(mock, size)
+    sf = mock_client(mock.instance_url)
+    # the first connection imports simple_salesforce, which is not part of the workflow
+    sf.connect()
+
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        records = scenario.run(sf, size)
+        seconds = time.perf_counter() - start
+        peak_memory = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        tracemalloc.stop()
+    stats = mock.stats()
+    return {
+        "records": records,
+        "seconds": round(seconds, 4),
+        "records_per_second": round(records / seconds, 1) if seconds else 0.0,
+        "requests": stats["requests"],
+        "requests_by_endpoint": stats["by_endpoint"],
+        "errors_injected": stats["errors"],
+        "peak_memory_bytes": peak_memory,
+    }
+
+
+def run_scenario(scenario: Scenario, mock: MockAdmin, size: int, repeat: int = 1) -> dict:
+    """Run a scenario `repeat` times, reporting the median run, then once more to measure its peak memory.
+
+    Tracing the allocations slows the client down, so the timed runs are not traced. The peak memory is the one
+    of the client, the mock runs in another process.
+
+    Args:
+        scenario (Scenario): scenario to run
+        mock (MockAdmin): mock to run it against
+        size (int): number of records
+        repeat (int, optional): number of timed runs. Defaults to 1.
+
+    Returns:
+        dict: results, with the "records", "seconds", "records_per_second", "requests", "requests_by_endpoint"
+            of the median run and the "peak_memory_bytes" of the traced run
+    """
+    runs = [_run_once(scenario, mock, size, trace_memory=False) for _ in range(repeat)]
+    median = sorted(runs, key=lambda run: run["seconds"])[len(runs) // 2]
+    median["peak_memory_bytes"] = _run_once(scenario, mock, size, trace_memory=True)["peak_memory_bytes"]
+    return {
+        "scenario": scenario.name,
+        "description": scenario.description,
+        "size": size,
+        "runs": repeat,
+        "seconds_stdev": round(statistics.stdev(run["seconds"] for run in runs), 4) if repeat > 1 else 0.0,
+        **median,
+    }
+
+
+def compare(results: dict, baseline: dict, max_regression: float = DEFAULT_MAX_REGRESSION) -> list:
+    """Compare the results of a run with the results of an earlier run
+
+    Args:
+        results (dict): document written by this script
+        baseline (dict): document of the earlier run
+        max_regression (float, optional): allowed drop of records/sec, as a share. Defaults to 0.2.
+
+    Returns:
+        list[str]: regressions, a records/sec drop beyond `max_regression` or more requests for the same size
+    """
+    previous = {result["scenario"]: result for result in baseline["results"]}
+    regressions = []
+    for result in results["results"]:
+        before = previous.get(result["scenario"])
+        if before is None or before["size"] != result["size"]:
+            continue
+        if result["records_per_second"] < before["records_per_second"] * (1 - max_regression):
+            regressions.append(
+                f"{result['scenario']}: {result['records_per_second']} records/sec, "
+                f"was {before['records_per_second']}",
+            )
+        if result["requests"] > before["requests"]:
+            regressions.append(f"{result['scenario']}: {result['requests']} requests, was {before['requests']}")
+    return regressions
+
+
+def start_mock(latency: float, page_size: int, error_rate: float) -> tuple:
+    """Serve a mock from a new process, so its memory and CPU are not counted in the results
+
+    Returns:
+        tuple: (process, MockAdmin)
+    """
+    command = [
+        sys.executable,
+        "-m",
+        "tests.mock_salesforce",
+        f"--latency={latency}",
+        f"--page-size={page_size}",
+        f"--error-rate={error_rate}",
+    ]
+    process = subprocess.Popen(command, cwd=REPO_ROOT, stdout=subprocess.PIPE, text=True)  # noqa: S603
+    instance_url = process.stdout.readline().strip()
+    if not instance_url:
+        process.kill()
+        raise RuntimeError("The mock Salesforce server did not start")
+    return process, MockAdmin(instance_url)
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark seed-salesforce workflows against a local mock Salesforce")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="scenario to run, repeatable")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier of the number of records")
+    parser.add_argument("--repeat", type=int, default=1, help="runs of each scenario, the median is reported")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds the mock waits before each response")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE, help="records per page of query results")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of the requests failing with a 503")
+    parser.add_argument("--output", type=Path, help="file to write the JSON results to, instead of stdout")
+    parser.add_argument("--baseline", type=Path, help="JSON results of an earlier run to compare with")
+    parser.add_argument("--max-regression", type=float, default=DEFAULT_MAX_REGRESSION)
+    args = parser.parse_args(argv)
+
+    process, mock = start_mock(args.latency, args.page_size, args.error_rate)
+    try:
+        results = []
+        for name in args.scenario or SCENARIOS:
+            scenario = SCENARIOS[name]
+            result = run_scenario(scenario, mock, max(1, round(scenario.size * args.scale)), args.repeat)
+            print(
+                f"{name}: {result['records']} records in {result['seconds']:.2f}s "
+                f"({result['records_per_second']:.0f} records/sec, {result['requests']} requests, "
+                f"{result['peak_memory_bytes'] / 2**20:.1f} MiB peak)",
+                file=sys.stderr,
+            )
+            results.append(result)
+    finally:
+        process.terminate()
+        process.wait()
+
+    document = {
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "settings": {
+            "scale": args.scale,
+            "repeat": args.repeat,
+            "latency": args.latency,
+            "page_size": args.page_size,
+            "error_rate": args.error_rate,
+        },
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(document, indent=2))
+    else:
+        print(json.dumps(document, indent=2))
+
+    if args.baseline:
+        regressions = compare(document, json.loads(args.baseline.read_text()), args.max_regression)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
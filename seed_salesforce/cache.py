@@ -0,0 +1,214 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import copy
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Union
+
+DEFAULT_CACHE_TTL = 300
+DEFAULT_CACHE_MAX_SIZE = 10000
+
+
+def _cache_key(object_name: str, record_id: str) -> tuple:
+    """Key of a record in the cache. Ids are truncated to the case-sensitive 15 character
+    form so that the 15 and 18 character versions of an Id share an entry."""
+    return object_name, record_id[:15]
+
+
+class RecordCache(ABC):
+    """Base class of the caches of Salesforce records, keyed by sObject type and Id.
+
+    Subclasses implement `_get`, `_set`, `_delete`, `clear` and `__len__`; this class keeps
+    the hit/miss counters.
+    """
+
+    def __init__(self, ttl: Optional[float] = DEFAULT_CACHE_TTL) -> None:
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()
+
+    def get(self, object_name: str, record_id: str) -> Optional[dict]:
+        """Return the cached record, or None if it is not cached or has expired
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Property__c
+            record_id (str): Id of the record
+
+        Returns:
+            dict | None: cached record
+        """
+        with self._lock:
+            record = self._get(_cache_key(object_name, record_id))
+            if record is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return record
+
+    def set(self, object_name: str, record_id: str, record: dict) -> None:
+        """Cache a record
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Property__c
+            record_id (str): Id of the record
+            record (dict): record to cache
+        """
+        expires_at = time.time() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._set(_cache_key(object_name, record_id), record, expires_at)
+
+    def invalidate(self, object_name: str, record_id: str) -> None:
+        """Remove a record from the cache, e.g., after it was updated or deleted
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Property__c
+            record_id (str): Id of the record
+        """
+        with self._lock:
+            self._delete(_cache_key(object_name, record_id))
+
+    def stats(self) -> dict:
+        """Return the hit/miss counters and the number of cached records
+
+        Returns:
+            dict: {"hits": int, "misses": int, "size": int}
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self)}
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove all the records"""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of cached records"""
+
+    @abstractmethod
+    def _get(self, key: tuple) -> Optional[dict]:
+        """Return the cached record, or None if it is missing or expired"""
+
+    @abstractmethod
+    def _set(self, key: tuple, record: dict, expires_at: Optional[float]) -> None:
+        """Cache a record until `expires_at` (a time.time()), or forever if it is None"""
+
+    @abstractmethod
+    def _delete(self, key: tuple) -> None:
+        """Remove a record, if it is cached"""
+
+
+class MemoryRecordCache(RecordCache):
+    def __init__(self, max_size: int = DEFAULT_CACHE_MAX_SIZE, ttl: Optional[float] = DEFAULT_CACHE_TTL) -> None:
+        """In-memory record cache with least-recently-used eviction and a time to live.
+
+        Args:
+            max_size (int, optional): maximum number of records to keep. Defaults to 10000.
+            ttl (float, optional): seconds a record stays valid, None to never expire. Defaults to 300.
+        """
+        super().__init__(ttl=ttl)
+        self.max_size = max_size
+        self._records: OrderedDict = OrderedDict()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records.clear()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def _get(self, key: tuple) -> Optional[dict]:
+        entry = self._records.get(key)
+        if entry is None:
+            return None
+        record, expires_at = entry
+        if expires_at is not None and expires_at < time.time():
+            del self._records[key]
+            return None
+        self._records.move_to_end(key)
+        # hand out copies so callers can't modify the cached record
+        return copy.deepcopy(record)
+
+    def _set(self, key: tuple, record: dict, expires_at: Optional[float]) -> None:
+        self._records[key] = (copy.deepcopy(record), expires_at)
+        self._records.move_to_end(key)
+        while len(self._records) > self.max_size:
+            self._records.popitem(last=False)
+
+    def _delete(self, key: tuple) -> None:
+        self._records.pop(key, None)
+
+
+class SQLiteRecordCache(RecordCache):
+    def __init__(
+        self,
+        path: Union[str, Path],
+        max_size: int = DEFAULT_CACHE_MAX_SIZE,
+        ttl: Optional[float] = DEFAULT_CACHE_TTL,
+    ) -> None:
+        """On-disk record cache in a SQLite database, which survives restarts and can be shared by processes.
+
+        Args:
+            path (str | Path): path of the database file, created if it does not exist
+            max_size (int, optional): maximum number of records to keep. Defaults to 10000.
+            ttl (float, optional): seconds a record stays valid, None to never expire. Defaults to 300.
+        """
+        super().__init__(ttl=ttl)
+        self.max_size = max_size
+        self._connection = sqlite3.connect(str(path), check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS records ("
+                "object_name TEXT NOT NULL, record_id TEXT NOT NULL, record TEXT NOT NULL, "
+                "expires_at REAL, accessed_at REAL NOT NULL, PRIMARY KEY (object_name, record_id))",
+            )
+
+    def close(self) -> None:
+        """Close the database connection"""
+        self._connection.close()
+
+    def clear(self) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM records")
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def _get(self, key: tuple) -> Optional[dict]:
+        row = self._connection.execute(
+            "SELECT record, expires_at FROM records WHERE object_name = ? AND record_id = ?",
+            key,
+        ).fetchone()
+        if row is None:
+            return None
+        with self._connection:
+            if row[1] is not None and row[1] < time.time():
+                self._connection.execute("DELETE FROM records WHERE object_name = ? AND record_id = ?", key)
+                return None
+            self._connection.execute(
+                "UPDATE records SET accessed_at = ? WHERE object_name = ? AND record_id = ?",
+                (time.time(), *key),
+            )
+        return json.loads(row[0])
+
+    def _set(self, key: tuple, record: dict, expires_at: Optional[float]) -> None:
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO records (object_name, record_id, record, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (*key, json.dumps(record), expires_at, time.time()),
+            )
+            self._connection.execute(
+                "DELETE FROM records WHERE rowid IN "
+                "(SELECT rowid FROM records ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_size,),
+            )
+
+    def _delete(self, key: tuple) -> None:
+        with self._connection:
+            self._connection.execute("DELETE FROM records WHERE object_name = ? AND record_id = ?", key)
@@ -0,0 +1,374 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+# The `seed-salesforce` command: streams CSV, JSONL or JSON records into Salesforce, or exports them, in chunks
+# of a bounded size, e.g.,
+#
+#     seed-salesforce --config salesforce-config.json upsert Benchmark__c benchmarks.csv.gz
+#     seed-salesforce --config salesforce-config.json export Property__c properties.jsonl --fields Name
+import argparse
+import csv
+import gzip
+import io
+import json
+import logging
+import sys
+import time
+from collections.abc import Iterable, Iterator
+from itertools import chain
+from pathlib import Path
+from typing import IO, Optional
+
+from seed_salesforce.exceptions import SalesforceClientError
+from seed_salesforce.mappings import Mapping, MappingEngine, compile_mapping
+from seed_salesforce.salesforce_client import SalesforceClient
+from seed_salesforce.utils import chunked, to_csv_value
+
+OBJECTS = ("Property__c", "Benchmark__c", "Account", "Contact")
+DEFAULT_EXTERNAL_ID_FIELDS = {"Benchmark__c": "Salesforce_Benchmark_ID__c"}
+# records read, mapped and written at a time, the memory use is bounded by one chunk
+DEFAULT_CHUNK_SIZE = 10000
+# chunks of at least this many records are written with Bulk API 2.0, smaller ones with sObject Collections
+DEFAULT_BULK_THRESHOLD = 2000
+GZIP_MAGIC = b"\x1f\x8b"
+# exit statuses when records failed, and when the command failed, e.g., on invalid input
+EXIT_FAILED_RECORDS = 1
+EXIT_ERROR = 2
+JSONL_SUFFIXES = (".jsonl", ".ndjson")
+JSON_SUFFIX = ".json"
+# outputs that Bulk API 2.0 query jobs are exported to, see `SalesforceClient.export_object`
+BULK_EXPORT_SUFFIXES = (".csv", ".parquet")
+
+
+def detect_format(path: str, file_format: Optional[str] = None) -> str:
+    """Format of a file, "csv", "jsonl" or "json", from its suffix (ignoring .gz) unless given. Streams default to CSV."""
+    if file_format:
+        return file_format
+    suffixes = [suffix.lower() for suffix in Path(path).suffixes if suffix.lower() != ".gz"]
+    if suffixes and suffixes[-1] in JSONL_SUFFIXES:
+        return "jsonl"
+    return "json" if suffixes and suffixes[-1] == JSON_SUFFIX else "csv"
+
+
+def open_input(path: str) -> IO[bytes]:
+    """Open a file, or stdin for "-", for reading, decompressing gzip streams whatever their name"""
+    stream = sys.stdin.buffer if path == "-" else open(path, "rb")  # noqa: SIM115
+    if not isinstance(stream, io.BufferedReader):
+        stream = io.BufferedReader(stream)
+    if stream.peek(len(GZIP_MAGIC))[: len(GZIP_MAGIC)] != GZIP_MAGIC:
+        return stream
+    if path == "-":
+        return gzip.GzipFile(fileobj=stream, mode="rb")
+    # reopened, so that closing the gzip file closes the file too
+    stream.close()
+    return gzip.open(path, "rb")
+
+
+def open_output(path: str) -> IO[bytes]:
+    """Open a file, or stdout for "-", for writing, compressing files with a .gz suffix"""
+    if path == "-":
+        return sys.stdout.buffer
+    if path.lower().endswith(".gz"):
+        return gzip.open(path, "wb")
+    return open(path, "wb")  # noqa: SIM115
+
+
+def read_records(stream: IO[bytes], file_format: str) -> Iterator[dict]:
+    """Lazily read the records of a CSV or JSONL stream, or of a JSON array, which is loaded whole. The empty cells
+    of CSV rows are left out.
+
+    Args:
+        stream (IO[bytes]): binary stream, see `open_input`
+        file_format (str): "csv", "jsonl" or "json"
+
+    Returns:
+        Iterator[dict]: records
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if file_format == "csv":
+        for row in csv.DictReader(text):
+            yield {column: value for column, value in row.items() if value not in ("", None)}
+        return
+    if file_format == "json":
+        try:
+            records = json.load(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON: {e}") from e
+        if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+            raise ValueError("A JSON file must contain an array of records")
+        yield from records
+        return
+
+    for number, line in enumerate(text, start=1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON on line {number}: {e}") from e
+
+
+def load_mapping(template: Optional[str], columns: Optional[list]) -> Optional[Mapping]:
+    """Mapping of the input columns to Salesforce fields, from a mapping template or COLUMN=FIELD pairs
+
+    Returns:
+        Mapping: mapping of the records, None to write them as they are
+    """
+    if template:
+        path = Path(template)
+        return MappingEngine(path.parent).get_mapping(path.name)
+    if columns:
+        fields = {}
+        for pair in columns:
+            column, separator, field = pair.partition("=")
+            if not separator or not column or not field:
+                raise ValueError(f"Invalid column mapping {pair}, expected COLUMN=FIELD")
+            fields[field] = {"column": column}
+        return compile_mapping({"skip_empty": True, "fields": fields}, name="--map")
+    return None
+
+
+class Progress:
+    def __init__(self, operation: str, object_name: str, interval: float = 5.0, stream: Optional[IO] = None) -> None:
+        """Report of the records processed and the throughput, printed every `interval` seconds and at the end
+
+        Args:
+            operation (str): name of the operation, e.g., upsert
+            object_name (str): Name of the salesforce object, e.g., Benchmark__c
+            interval (float, optional): seconds between the reports, 0 to only report at the end. Defaults to 5.
+            stream (IO, optional): where to print the reports. Defaults to stderr.
+        """
+        self.operation = operation
+        self.object_name = object_name
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self.records = 0
+        self.failed = 0
+        self.bulk_records = 0
+        self._start = time.monotonic()
+        self._reported_at = self._start
+
+    def add(self, records: int, failed: int = 0, bulk: bool = False) -> None:
+        self.records += records
+        self.failed += failed
+        if bulk:
+            self.bulk_records += records
+        now = time.monotonic()
+        if self.interval and now - self._reported_at >= self.interval:
+            self._reported_at = now
+            self.report()
+
+    def summary(self) -> dict:
+        seconds = time.monotonic() - self._start
+        return {
+            "operation": self.operation,
+            "object": self.object_name,
+            "records": self.records,
+            "failed": self.failed,
+            "bulk_records": self.bulk_records,
+            "seconds": round(seconds, 3),
+            "records_per_second": round(self.records / seconds, 1) if seconds else 0.0,
+        }
+
+    def report(self) -> None:
+        summary = self.summary()
+        print(
+            f"{self.operation} {self.object_name}: {summary['records']} records, {summary['failed']} failed, "
+            f"{summary['seconds']:.1f}s ({summary['records_per_second']:.0f} records/sec)",
+            file=self.stream,
+            flush=True,
+        )
+
+
+def _write_chunk(sf: SalesforceClient, args: argparse.Namespace, records: list, bulk: bool) -> list:
+    """Write a chunk of records with Bulk API 2.0 or the sObject Collections API
+
+    Returns:
+        list[RecordResult]: one result per record
+    """
+    object_name = args.object
+    if args.operation == "upsert":
+        if bulk:
+            return sf.bulk_upsert(object_name, records, args.external_id, batch_size=args.chunk_size)
+        return sf.upsert_records(object_name, records, args.external_id)
+
+    missing = sum("Id" not in record for record in records)
+    if missing:
+        raise ValueError(f"{missing} records to {args.operation} have no Id")
+    if args.operation == "update":
+        if bulk:
+            return sf.bulk_ingest(object_name, records, "update", batch_size=args.chunk_size)
+        return sf.update_records(object_name, records)
+    if bulk:
+        return sf.bulk_ingest(object_name, [{"Id": record["Id"]} for record in records], "delete")
+    return sf.delete_records_by_ids(object_name, [record["Id"] for record in records])
+
+
+def _use_bulk(args: argparse.Namespace, records: int) -> bool:
+    if args.api == "auto":
+        return records >= args.bulk_threshold
+    return args.api == "bulk"
+
+
+def run_write(sf: SalesforceClient, args: argparse.Namespace, progress: Progress) -> None:
+    """Upsert, update or delete the records of the input in chunks of `--chunk-size`"""
+    mapping = load_mapping(args.mapping, args.map)
+    stream = open_input(args.input)
+    errors = open(args.errors, "w") if args.errors else None  # noqa: SIM115
+    try:
+        records: Iterable[dict] = read_records(stream, detect_format(args.input, args.format))
+        for chunk in chunked(records, args.chunk_size):
+            payloads = mapping.map_rows(chunk) if mapping is not None else chunk
+            bulk = _use_bulk(args, len(payloads))
+            results = _write_chunk(sf, args, payloads, bulk)
+            failures = [result for result in results if not result.success]
+            if errors is not None:
+                for result in failures:
+                    errors.write(json.dumps({"record": result.record, "errors": result.errors}, default=str) + "\n")
+            progress.add(len(chunk), len(failures), bulk)
+    finally:
+        if args.input != "-":
+            stream.close()
+        if errors is not None:
+            errors.close()
+
+
+def _write_records(output: IO[bytes], records: Iterable[dict], file_format: str, fields: list) -> Iterator[int]:
+    """Write records as CSV, JSONL or a JSON array, yielding the number of records written after each one"""
+    text = io.TextIOWrapper(output, encoding="utf-8", newline="")
+    try:
+        writer = csv.writer(text) if file_format == "csv" else None
+        if writer is not None:
+            writer.writerow(fields)
+        elif file_format == "json":
+            text.write("[")
+        for count, record in enumerate(records, start=1):
+            if writer is not None:
+                writer.writerow([to_csv_value(record.get(field)) for field in fields])
+                yield count
+                continue
+            if file_format == "json":
+                text.write("\n" if count == 1 else ",\n")
+            text.write(json.dumps({field: record.get(field) for field in fields}, default=str))
+            if file_format != "json":
+                text.write("\n")
+            yield count
+        if file_format == "json":
+            text.write("\n]\n")
+    finally:
+        text.flush()
+        # leave the output open, stdout is not ours to close
+        text.detach()
+
+
+def run_export(sf: SalesforceClient, args: argparse.Namespace, progress: Progress) -> None:
+    """Export the records of an object, with a Bulk API 2.0 query job to a Parquet file, or to a CSV file when
+    the object has `--bulk-threshold` matching records or more (or with `--api bulk`), and with a streamed REST
+    query otherwise
+    """
+    fields = args.fields.split(",") if args.fields else None
+    suffix = Path(args.output).suffix.lower() if args.output != "-" else ""
+    if args.api == "bulk" and (suffix not in BULK_EXPORT_SUFFIXES or args.format not in (None, "csv")):
+        raise ValueError("Bulk API 2.0 exports are written to .csv or .parquet files, use --api auto or rest")
+    # Parquet files are only written from the CSV results of Bulk API 2.0 query jobs
+    bulk = args.api == "bulk" or suffix == ".parquet"
+    if args.api == "auto" and suffix == ".csv" and args.format in (None, "csv"):
+        bulk = sf.count_records(args.object, args.where) >= args.bulk_threshold
+
+    if bulk:
+        stats = sf.export_object(args.object, args.output, fields=fields, where=args.where)
+        progress.add(stats["rows"], bulk=True)
+        return
+
+    records = sf.iter_records(args.object, fields=fields, where=args.where)
+    # the columns of a CSV are known from the first record when exporting all the fields
+    first = next(records, None)
+    columns = list(dict.fromkeys(["Id", *(fields or first or [])]))
+    records = chain([first], records) if first is not None else iter(())
+
+    output = open_output(args.output)
+    written = 0
+    try:
+        for written in _write_records(output, records, detect_format(args.output, args.format), columns):
+            if written % args.chunk_size == 0:
+                progress.add(args.chunk_size)
+        progress.add(written % args.chunk_size)
+    finally:
+        if output is sys.stdout.buffer:
+            output.flush()
+        else:
+            output.close()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="seed-salesforce",
+        description="Upsert, update, delete or export Salesforce records from or to CSV and JSONL streams",
+    )
+    parser.add_argument("--config", type=Path, help="JSON file with the Salesforce connection parameters")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="records read at a time")
+    parser.add_argument(
+        "--bulk-threshold",
+        type=int,
+        default=DEFAULT_BULK_THRESHOLD,
+        help="records of a chunk (or of an export) to use Bulk API 2.0 from",
+    )
+    parser.add_argument("--api", choices=("auto", "rest", "bulk"), default="auto", help="API to use")
+    parser.add_argument("--format", choices=("csv", "jsonl", "json"), help="format of the data, defaults to the suffix")
+    parser.add_argument("--progress-interval", type=float, default=5.0, help="seconds between progress reports")
+    parser.add_argument("--verbose", action="store_true", help="log the client's debug messages")
+    parser.set_defaults(map=None, mapping=None, external_id=None, errors=None)
+    operations = parser.add_subparsers(dest="operation", required=True)
+
+    for operation in ("upsert", "update", "delete"):
+        subparser = operations.add_parser(operation, help=f"{operation} the records of a CSV, JSONL or JSON stream")
+        subparser.add_argument("object", choices=OBJECTS)
+        subparser.add_argument("input", nargs="?", default="-", help="file to read, - for stdin (default)")
+        if operation != "delete":
+            subparser.add_argument("--map", action="append", metavar="COLUMN=FIELD", help="column to write to a field")
+            subparser.add_argument("--mapping", help="mapping template file, see seed_salesforce.mappings")
+        if operation == "upsert":
+            subparser.add_argument("--external-id", help="field to match the records on, defaults to Id")
+        subparser.add_argument("--errors", help="JSONL file to write the failed records and their errors to")
+
+    export = operations.add_parser("export", help="write the records of an object as CSV, JSONL or JSON")
+    export.add_argument("object", choices=OBJECTS)
+    export.add_argument("output", nargs="?", default="-", help="file to write, - for stdout (default)")
+    export.add_argument("--fields", help="comma separated fields, defaults to all")
+    export.add_argument("--where", help="SOQL condition to filter the records on")
+    return parser
+
+
+def main(argv: Optional[list] = None, sf: Optional[SalesforceClient] = None) -> int:
+    """Run the `seed-salesforce` command
+
+    Args:
+        argv (list, optional): command line arguments. Defaults to the arguments of the process.
+        sf (SalesforceClient, optional): client to use instead of connecting with `--config`. Defaults to None.
+
+    Returns:
+        int: exit status, 1 if any record failed
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if sf is None and args.config is None:
+        parser.error("--config is required")
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING)
+    if args.operation == "upsert" and not args.external_id:
+        args.external_id = DEFAULT_EXTERNAL_ID_FIELDS.get(args.object, "Id")
+
+    sf = sf or SalesforceClient(connection_config_filepath=args.config)
+    progress = Progress(args.operation, args.object, interval=args.progress_interval)
+    try:
+        if args.operation == "export":
+            run_export(sf, args, progress)
+        else:
+            run_write(sf, args, progress)
+    except (OSError, ValueError, SalesforceClientError) as e:
+        progress.report()
+        print(f"seed-salesforce: error: {e}", file=sys.stderr)
+        return EXIT_ERROR
+    progress.report()
+    return EXIT_FAILED_RECORDS if progress.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
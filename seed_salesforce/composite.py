@@ -0,0 +1,125 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+from typing import Optional
+from urllib.parse import urlencode
+
+from seed_salesforce.exceptions import SalesforceClientError
+
+# the Composite API accepts at most 25 subrequests per request
+COMPOSITE_MAX_SUBREQUESTS = 25
+
+
+def reference(reference_id: str, path: str = "id") -> str:
+    """Return the expression referencing the result of an earlier subrequest, e.g., "@{newAccount.id}"
+
+    Args:
+        reference_id (str): reference ID of the earlier subrequest
+        path (str, optional): path in the body of its response, e.g., "records[0].Id". Defaults to "id".
+
+    Returns:
+        str: reference expression to use in the url or body of a later subrequest
+    """
+    return f"@{{{reference_id}.{path}}}"
+
+
+class CompositeRequest:
+    def __init__(self, api_version: str, all_or_none: bool = False) -> None:
+        """Builder of a Composite API request, a chain of up to 25 subrequests run in a single round trip.
+
+        Later subrequests can use the results of earlier ones through `reference`:
+
+            request = CompositeRequest("59.0", all_or_none=True)
+            request.create("Account", {"Name": "Scrumptious Ice Cream"}, "newAccount")
+            request.create("Contact", {"LastName": "Hendricks", "AccountId": reference("newAccount")}, "newContact")
+            results = sf.composite(request)
+
+        Args:
+            api_version (str): version of the REST API, e.g., "59.0"
+            all_or_none (bool, optional): roll back all the subrequests if one fails. Defaults to False.
+        """
+        self.api_version = api_version
+        self.all_or_none = all_or_none
+        self.subrequests: list = []
+
+    def __len__(self) -> int:
+        return len(self.subrequests)
+
+    def add(
+        self,
+        method: str,
+        url: str,
+        reference_id: str,
+        body: Optional[dict] = None,
+    ) -> "CompositeRequest":
+        """Add a subrequest
+
+        Args:
+            method (str): HTTP method
+            url (str): path relative to the REST API, e.g., sobjects/Account
+            reference_id (str): unique name of the subrequest, used to reference it and to look up its result
+            body (dict, optional): body of the subrequest. Defaults to None.
+
+        Raises:
+            SalesforceClientError: Too many subrequests or duplicate reference ID
+
+        Returns:
+            CompositeRequest: the request, to chain calls
+        """
+        if len(self.subrequests) >= COMPOSITE_MAX_SUBREQUESTS:
+            raise SalesforceClientError(f"A composite request accepts at most {COMPOSITE_MAX_SUBREQUESTS} subrequests")
+        if any(subrequest["referenceId"] == reference_id for subrequest in self.subrequests):
+            raise SalesforceClientError(f"Duplicate composite reference ID: {reference_id}")
+
+        subrequest = {
+            "method": method,
+            "url": f"/services/data/v{self.api_version}/{url.lstrip('/')}",
+            "referenceId": reference_id,
+        }
+        if body is not None:
+            subrequest["body"] = body
+        self.subrequests.append(subrequest)
+        return self
+
+    def query(self, soql: str, reference_id: str) -> "CompositeRequest":
+        """Add a SOQL query, reference its records with e.g. reference(reference_id, "records[0].Id")"""
+        return self.add("GET", f"query/?{urlencode({'q': soql})}", reference_id)
+
+    def get(
+        self,
+        object_name: str,
+        record_id: str,
+        reference_id: str,
+        fields: Optional[list] = None,
+    ) -> "CompositeRequest":
+        """Add the retrieval of a record, `record_id` may be a reference"""
+        url = f"sobjects/{object_name}/{record_id}"
+        if fields:
+            url += f"?fields={','.join(fields)}"
+        return self.add("GET", url, reference_id)
+
+    def create(self, object_name: str, record: dict, reference_id: str) -> "CompositeRequest":
+        """Add the creation of a record, reference its Id with reference(reference_id)"""
+        return self.add("POST", f"sobjects/{object_name}", reference_id, body=record)
+
+    def update(self, object_name: str, record_id: str, record: dict, reference_id: str) -> "CompositeRequest":
+        """Add the update of a record, `record_id` may be a reference"""
+        return self.add("PATCH", f"sobjects/{object_name}/{record_id}", reference_id, body=record)
+
+    def upsert(
+        self,
+        object_name: str,
+        external_id_field: str,
+        external_id: str,
+        record: dict,
+        reference_id: str,
+    ) -> "CompositeRequest":
+        """Add the upsert of a record keyed on an external ID field"""
+        return self.add("PATCH", f"sobjects/{object_name}/{external_id_field}/{external_id}", reference_id, body=record)
+
+    def delete(self, object_name: str, record_id: str, reference_id: str) -> "CompositeRequest":
+        """Add the deletion of a record, `record_id` may be a reference"""
+        return self.add("DELETE", f"sobjects/{object_name}/{record_id}", reference_id)
+
+    def to_payload(self) -> dict:
+        """Return the JSON body of the composite request"""
+        return {"allOrNone": self.all_or_none, "compositeRequest": self.subrequests}
@@ -0,0 +1,136 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import io
+import zipfile
+from dataclasses import dataclass, field
+from typing import Any, Optional
+from xml.sax.saxutils import escape
+
+from seed_salesforce.exceptions import SalesforceClientError
+
+METADATA_NAMESPACE = "http://soap.sforce.com/2006/04/metadata"
+LONG_TEXT_AREA_MIN_LENGTH = 256
+# metadata of each supported field type when the spec does not set it
+FIELD_TYPE_DEFAULTS = {
+    "Text": {"length": 255},
+    "LongTextArea": {"length": 32768, "visibleLines": 25},
+    "Number": {"precision": 18, "scale": 0},
+    "Currency": {"precision": 18, "scale": 2},
+    "Percent": {"precision": 5, "scale": 2},
+    "Date": {},
+    "DateTime": {},
+    "Checkbox": {"defaultValue": "false"},
+    "Picklist": {},
+}
+
+
+@dataclass
+class CustomFieldSpec:
+    """Specification of a custom field to create with `SalesforceClient.create_custom_fields`
+
+    Args:
+        name (str): name of the field without the __c suffix, e.g., Site_EUI
+        type (str): one of the keys of `FIELD_TYPE_DEFAULTS`, e.g., Number
+        label (str, optional): label of the field. Defaults to the name.
+        description (str): description of the field
+        length (int, optional): length of Text and LongTextArea fields
+        precision (int, optional): total number of digits of Number, Currency and Percent fields
+        scale (int, optional): number of decimal places of Number, Currency and Percent fields
+        picklist_values (list): values of a Picklist field
+    """
+
+    name: str
+    type: str = "Text"
+    label: Optional[str] = None
+    description: str = ""
+    length: Optional[int] = None
+    precision: Optional[int] = None
+    scale: Optional[int] = None
+    picklist_values: list = field(default_factory=list)
+
+    @property
+    def api_name(self) -> str:
+        """Name of the field in the API, e.g., Site_EUI__c"""
+        return self.name if self.name.endswith("__c") else f"{self.name}__c"
+
+    def to_metadata(self, object_name: str) -> dict:
+        """Return the CustomField metadata of the field, as keyword arguments of `mdapi.CustomField`
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Benchmark__c
+
+        Raises:
+            SalesforceClientError: Unsupported field type, or a Picklist without values
+
+        Returns:
+            dict: CustomField metadata
+        """
+        if self.type not in FIELD_TYPE_DEFAULTS:
+            raise SalesforceClientError(
+                f"Unsupported custom field type {self.type}, expected one of {', '.join(FIELD_TYPE_DEFAULTS)}",
+            )
+
+        metadata = {
+            "fullName": f"{object_name}.{self.api_name}",
+            "label": self.label or self.name,
+            "type": self.type,
+            "description": self.description,
+            **FIELD_TYPE_DEFAULTS[self.type],
+        }
+        overrides = {"length": self.length, "precision": self.precision, "scale": self.scale}
+        metadata.update({key: value for key, value in overrides.items() if key in metadata and value is not None})
+        if self.type == "LongTextArea":
+            metadata["length"] = max(LONG_TEXT_AREA_MIN_LENGTH, metadata["length"])
+        if self.type == "Picklist":
+            if not self.picklist_values:
+                raise SalesforceClientError(f"Picklist field {self.name} needs picklist_values")
+            metadata["valueSet"] = {
+                "valueSetDefinition": {
+                    "sorted": False,
+                    "value": [{"fullName": value, "label": value, "default": False} for value in self.picklist_values],
+                },
+            }
+        return metadata
+
+
+def _to_xml(name: str, value: Any) -> str:
+    """Metadata XML element of a value of `CustomFieldSpec.to_metadata`, lists are repeated elements"""
+    if isinstance(value, list):
+        return "".join(_to_xml(name, item) for item in value)
+    if isinstance(value, dict):
+        # fullName first, then the other elements in the alphabetical order of the metadata retrieved from Salesforce
+        keys = sorted(value, key=lambda key: (key != "fullName", key))
+        return f"<{name}>{''.join(_to_xml(key, value[key]) for key in keys)}</{name}>"
+    if isinstance(value, bool):
+        value = "true" if value else "false"
+    return f"<{name}>{escape(str(value))}</{name}>"
+
+
+def custom_fields_package(object_name: str, fields: list, api_version: str) -> bytes:
+    """Zip file to deploy custom fields of an object with the Metadata API, see `SalesforceClient.create_custom_fields`
+
+    Args:
+        object_name (str): Name of the salesforce object, e.g., Benchmark__c
+        fields (list): CustomField metadata of the fields, see `CustomFieldSpec.to_metadata`
+        api_version (str): API version of the package, e.g., 59.0
+
+    Returns:
+        bytes: zip file with the package.xml manifest and the fields in objects/<object_name>.object
+    """
+    header = '<?xml version="1.0" encoding="UTF-8"?>'
+    members = "".join(_to_xml("members", metadata["fullName"]) for metadata in fields)
+    manifest = (
+        f'{header}<Package xmlns="{METADATA_NAMESPACE}"><types>{members}<name>CustomField</name></types>'
+        f"<version>{escape(api_version)}</version></Package>"
+    )
+    # the fields of an .object file are named without the object
+    object_fields = [{**metadata, "fullName": metadata["fullName"].split(".", 1)[1]} for metadata in fields]
+    custom_object = (
+        f'{header}<CustomObject xmlns="{METADATA_NAMESPACE}">{_to_xml("fields", object_fields)}</CustomObject>'
+    )
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as package:
+        package.writestr("package.xml", manifest)
+        package.writestr(f"objects/{object_name}.object", custom_object)
+    return buffer.getvalue()
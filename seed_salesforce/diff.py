@@ -0,0 +1,117 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Optional
+
+# formats of the datetimes returned by the REST API and of the ISO 8601 strings passed to updates
+DATETIME_FORMATS = ("%Y-%m-%dT%H:%M:%S.%f%z", "%Y-%m-%dT%H:%M:%S%z", "%Y-%m-%dT%H:%M:%S.%f", "%Y-%m-%dT%H:%M:%S")
+
+
+def _normalize_datetime(value: Any) -> Any:
+    """Parse a datetime from the REST API (2024-01-02T03:04:05.000+0000) or an ISO 8601 string, in UTC"""
+    if isinstance(value, str):
+        for datetime_format in DATETIME_FORMATS:
+            try:
+                value = datetime.datetime.strptime(value.strip(), datetime_format)
+                break
+            except ValueError:
+                continue
+        else:
+            return value
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=datetime.timezone.utc)
+        # Salesforce stores datetimes to the millisecond
+        return value.astimezone(datetime.timezone.utc).replace(microsecond=value.microsecond // 1000 * 1000)
+    return value
+
+
+def _normalize_boolean(value: Any) -> bool:
+    return value.strip().lower() == "true" if isinstance(value, str) else bool(value)
+
+
+def _normalize_number(value: Any) -> Any:
+    try:
+        return Decimal(str(value).strip())
+    except InvalidOperation:
+        return value
+
+
+def _normalize_date(value: Any) -> Any:
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, str):
+        try:
+            return datetime.date.fromisoformat(value.strip()[:10])
+        except ValueError:
+            return value
+    return value
+
+
+def _normalize_picklist(value: Any) -> str:
+    # picklist values are matched case-insensitively by Salesforce
+    return str(value).strip().casefold()
+
+
+def _normalize_multipicklist(value: Any) -> frozenset:
+    # the selected values of a multi-select picklist are stored in any order
+    values = value.split(";") if isinstance(value, str) else value
+    return frozenset(_normalize_picklist(item) for item in values)
+
+
+NORMALIZERS = {
+    "boolean": _normalize_boolean,
+    "int": _normalize_number,
+    "double": _normalize_number,
+    "currency": _normalize_number,
+    "percent": _normalize_number,
+    "date": _normalize_date,
+    "datetime": _normalize_datetime,
+    "picklist": _normalize_picklist,
+    "multipicklist": _normalize_multipicklist,
+}
+
+
+def normalize_value(value: Any, field_type: Optional[str]) -> Any:
+    """Normalize a field value so that equal values compare equal, whether they come from a
+    record returned by Salesforce or from the values passed to an update.
+
+    Args:
+        value (Any): value of the field
+        field_type (str, optional): Salesforce type of the field from `describe`, e.g., "currency"
+
+    Returns:
+        Any: normalized value, None for empty values
+    """
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    normalizer = NORMALIZERS.get(field_type)
+    return normalizer(value) if normalizer else value
+
+
+def changed_fields(current: dict, updates: dict, field_types: dict) -> dict:
+    """Return the updates whose values differ from the current record.
+
+    Fields are matched case-insensitively, updates of fields that are missing from the current
+    record are always returned.
+
+    Args:
+        current (dict): current record, e.g., from the record cache
+        updates (dict): field values to write
+        field_types (dict): Salesforce field type by field name, see `SalesforceClient._get_field_types`
+
+    Returns:
+        dict: the subset of `updates` to write
+    """
+    current_values = {key.casefold(): value for key, value in current.items()}
+    types = {name.casefold(): field_type for name, field_type in field_types.items()}
+    changes = {}
+    for name, value in updates.items():
+        key = name.casefold()
+        if key not in current_values or normalize_value(value, types.get(key)) != normalize_value(
+            current_values[key],
+            types.get(key),
+        ):
+            changes[name] = value
+    return changes
@@ -0,0 +1,43 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+# Errors raised by `SalesforceClient`. They all subclass Exception, as the generic errors that the
+# client raised before, so existing `except Exception` handlers keep working. Errors returned by
+# the Salesforce REST API itself are raised as the `simple_salesforce.exceptions.SalesforceError`
+# subclasses, after the retries of the `RetryPolicy` of the client.
+from typing import Optional
+
+
+class SalesforceClientError(Exception):
+    """Base class of the errors raised by the client"""
+
+
+class RecordNotFoundError(SalesforceClientError):
+    """The requested record does not exist"""
+
+
+class DuplicateRecordError(SalesforceClientError):
+    """The record to create already exists, or a lookup matched more than one record"""
+
+
+class RecordWriteError(SalesforceClientError):
+    def __init__(self, message: str, errors: Optional[list] = None) -> None:
+        """Salesforce rejected a create, update or delete
+
+        Args:
+            message (str): description of the error
+            errors (list, optional): errors returned by Salesforce. Defaults to None.
+        """
+        super().__init__(message)
+        self.errors = errors or []
+
+
+class BulkJobError(SalesforceClientError):
+    """A Bulk API 2.0 job failed, was aborted or did not finish in time"""
+
+
+class ApiLimitError(SalesforceClientError):
+    """The remaining daily API requests dropped below the hard reserve of the governor"""
+
+
+class MappingError(SalesforceClientError):
+    """A mapping template is missing or invalid, or a value of a row can't be converted to its field type"""
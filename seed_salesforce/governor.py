@@ -0,0 +1,196 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from seed_salesforce.exceptions import ApiLimitError
+
+_log = logging.getLogger(__name__)
+
+# e.g., "api-usage=18/5000; per-app-api-usage=17/250(appName=sample-connected-app)"
+API_USAGE_PATTERN = re.compile(r"(?:^|[^-])api-usage=(\d+)/(\d+)")
+
+
+@dataclass(eq=False)
+class ApiGovernor:
+    """Throttle of the calls made through the Salesforce session, based on the remaining daily API requests.
+
+    The usage is read from the Sforce-Limit-Info header of every response and refreshed from
+    the /limits resource every `limits_poll_interval` seconds. Calls go through a token bucket
+    that refills at `max_rate` while more than `soft_reserve` of the daily limit remains, slows
+    down linearly to `min_rate` as the remaining requests approach `hard_reserve`, and refuses
+    calls below it. Below the soft reserve, the collection methods of the client switch to
+    Bulk API 2.0 for `bulk_threshold` records or more.
+
+    Args:
+        soft_reserve (float, optional): fraction of the daily limit to start slowing down at. Defaults to 0.2.
+        hard_reserve (float, optional): fraction of the daily limit to keep unused. Defaults to 0.05.
+        max_rate (float, optional): requests per second while above the soft reserve. Defaults to 25.
+        min_rate (float, optional): requests per second just above the hard reserve. Defaults to 0.5.
+        limits_poll_interval (float, optional): seconds between polls of /limits. Defaults to 300.
+        bulk_threshold (int, optional): number of records to switch to Bulk API 2.0 at. Defaults to 2000.
+    """
+
+    soft_reserve: float = 0.2
+    hard_reserve: float = 0.05
+    max_rate: float = 25.0
+    min_rate: float = 0.5
+    limits_poll_interval: float = 300
+    bulk_threshold: int = 2000
+
+    def __post_init__(self) -> None:
+        if not 0 <= self.hard_reserve <= self.soft_reserve <= 1:
+            raise ValueError("Reserves must satisfy 0 <= hard_reserve <= soft_reserve <= 1")
+
+        # called to refresh the usage from /limits, set by the client the governor is passed to. Returns False
+        # when it could not poll yet, e.g., before the client is connected.
+        self.limits_poller: Optional[Callable[[], Optional[bool]]] = None
+
+        self.used: Optional[int] = None
+        self.limit: Optional[int] = None
+        self.requests = 0
+        self.throttled_seconds = 0.0
+
+        self._tokens = self.max_rate
+        self._refilled_at = time.monotonic()
+        self._polled_at: Optional[float] = None
+        self._poll_in_progress = False
+        self._lock = threading.RLock()
+        self._local = threading.local()
+
+    @property
+    def remaining(self) -> Optional[int]:
+        """Remaining daily API requests, None until the usage is known"""
+        if self.used is None or self.limit is None:
+            return None
+        return max(self.limit - self.used, 0)
+
+    @property
+    def remaining_fraction(self) -> Optional[float]:
+        """Remaining daily API requests as a fraction of the limit, None until the usage is known"""
+        if self.remaining is None or not self.limit:
+            return None
+        return self.remaining / self.limit
+
+    @property
+    def rate(self) -> float:
+        """Current refill rate of the token bucket, in requests per second"""
+        fraction = self.remaining_fraction
+        if fraction is None or fraction >= self.soft_reserve:
+            return self.max_rate
+        if fraction <= self.hard_reserve:
+            return self.min_rate
+        scale = (fraction - self.hard_reserve) / (self.soft_reserve - self.hard_reserve)
+        return self.min_rate + scale * (self.max_rate - self.min_rate)
+
+    def prefer_bulk(self, record_count: int) -> bool:
+        """Return whether writing `record_count` records should use Bulk API 2.0 to save API requests
+
+        Args:
+            record_count (int): number of records to write
+
+        Returns:
+            bool: True below the soft reserve for at least `bulk_threshold` records
+        """
+        fraction = self.remaining_fraction
+        return fraction is not None and fraction < self.soft_reserve and record_count >= self.bulk_threshold
+
+    def acquire(self) -> None:
+        """Wait for the token bucket to allow one more call, polling /limits first if it is due
+
+        Raises:
+            ApiLimitError: the remaining requests are below the hard reserve
+        """
+        if getattr(self._local, "polling", False):
+            # the poll of /limits is never throttled, it is how a governor below the hard reserve recovers
+            return
+        self._poll_limits_if_due()
+        with self._lock:
+            fraction = self.remaining_fraction
+            if fraction is not None and fraction < self.hard_reserve:
+                raise ApiLimitError(
+                    f"Only {self.remaining} of {self.limit} daily API requests remain, "
+                    f"below the reserve of {self.hard_reserve:.0%}",
+                )
+
+            now = time.monotonic()
+            rate = self.rate
+            self._tokens = min(self.max_rate, self._tokens + (now - self._refilled_at) * rate)
+            self._refilled_at = now
+            wait = (1 - self._tokens) / rate if self._tokens < 1 else 0
+            # take the token now, the bucket goes negative while we wait for it
+            self._tokens -= 1
+            self.requests += 1
+            self.throttled_seconds += wait
+        if wait:
+            time.sleep(wait)
+
+    def update_from_header(self, value: Optional[str]) -> None:
+        """Update the usage from the Sforce-Limit-Info header of a response
+
+        Args:
+            value (str, optional): value of the header, e.g., "api-usage=18/5000"
+        """
+        match = API_USAGE_PATTERN.search(value or "")
+        if match:
+            with self._lock:
+                self.used, self.limit = int(match.group(1)), int(match.group(2))
+
+    def update_from_limits(self, limits: dict) -> None:
+        """Update the usage from the response of the /limits resource
+
+        Args:
+            limits (dict): response of /limits, with {"DailyApiRequests": {"Max": ..., "Remaining": ...}}
+        """
+        daily = limits.get("DailyApiRequests")
+        if daily:
+            with self._lock:
+                self.limit = daily["Max"]
+                self.used = daily["Max"] - daily["Remaining"]
+
+    def metrics(self) -> dict:
+        """Return the current usage and throttling, e.g., to export them to a monitoring system
+
+        Returns:
+            dict: used, limit, remaining and remaining fraction of the daily API requests, current rate,
+                number of calls made through the governor and seconds spent waiting for the throttle
+        """
+        with self._lock:
+            return {
+                "api_requests_used": self.used,
+                "api_requests_limit": self.limit,
+                "api_requests_remaining": self.remaining,
+                "api_requests_remaining_fraction": self.remaining_fraction,
+                "rate": self.rate,
+                "requests": self.requests,
+                "throttled_seconds": self.throttled_seconds,
+            }
+
+    def _poll_limits_if_due(self) -> None:
+        """Refresh the usage from /limits if it was never polled or the poll interval elapsed. A poll that failed,
+        or was skipped by the poller, is retried on the next call.
+        """
+        if self.limits_poller is None:
+            return
+        with self._lock:
+            now = time.monotonic()
+            due = self._polled_at is None or now - self._polled_at >= self.limits_poll_interval
+            if not due or self._poll_in_progress:
+                return
+            self._poll_in_progress = True
+        self._local.polling = True
+        polled = False
+        try:
+            polled = self.limits_poller() is not False
+        except Exception as e:
+            _log.warning(f"Failed to poll the API limits: {e}")
+        finally:
+            self._local.polling = False
+            with self._lock:
+                self._poll_in_progress = False
+                if polled:
+                    self._polled_at = time.monotonic()
@@ -0,0 +1,179 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import sqlite3
+import threading
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Optional, Union
+
+# fields that the `find_*` methods look records up by, for each object
+INDEXED_FIELDS = {
+    "Account": "Name",
+    "Contact": "Email",
+    "Property__c": "Name",
+    "Benchmark__c": "Salesforce_Benchmark_ID__c",
+}
+
+# indexed fields that Salesforce compares case-sensitively, e.g., external Ids created as unique case-sensitive
+CASE_SENSITIVE_FIELDS = {
+    ("Benchmark__c", "Salesforce_Benchmark_ID__c"),
+}
+
+
+def normalize_key(object_name: str, field_name: str, value: str) -> str:
+    """Normalize a lookup value the way Salesforce compares the values of the field: ignoring surrounding whitespace,
+    and case-insensitive unless the field is in `CASE_SENSITIVE_FIELDS`
+    """
+    key = str(value).strip()
+    if (object_name, field_name) in CASE_SENSITIVE_FIELDS:
+        return key
+    return key.casefold()
+
+
+class RecordIndex:
+    def __init__(self, path: Optional[Union[str, Path]] = None) -> None:
+        """Secondary index from a lookup field value (Account.Name, Contact.Email, ...) to the record Id.
+
+        Lets the `find_*` methods skip the `SELECT Id ... WHERE <field> = ...` query for records
+        they have already seen. The index is held in memory and, if a path is given, persisted
+        to a SQLite database so that it survives between syncs.
+
+        Args:
+            path (str | Path, optional): path of the SQLite database to persist the index to. Defaults to None.
+        """
+        self._ids: dict = {}
+        # (object name, 15 character Id) to the keys that point at the record, for `discard_id`
+        self._keys_by_id: dict = {}
+        self._lock = threading.RLock()
+        self._connection = None
+        if path is not None:
+            self._connection = sqlite3.connect(str(path), check_same_thread=False)
+            with self._connection:
+                self._connection.execute(
+                    "CREATE TABLE IF NOT EXISTS record_index ("
+                    "object_name TEXT NOT NULL, field_name TEXT NOT NULL, key TEXT NOT NULL, record_id TEXT NOT NULL, "
+                    "PRIMARY KEY (object_name, field_name, key))",
+                )
+            for object_name, field_name, key, record_id in self._connection.execute("SELECT * FROM record_index"):
+                self._set((object_name, field_name, key), record_id)
+
+    def close(self) -> None:
+        """Close the database connection, if the index is persisted"""
+        if self._connection is not None:
+            self._connection.close()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def get(self, object_name: str, field_name: str, value: str) -> Optional[str]:
+        """Return the Id of the record whose field has the value, or None if it is not indexed
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Account
+            field_name (str): indexed field, e.g., Name
+            value (str): value of the field
+
+        Returns:
+            str | None: record Id
+        """
+        return self._ids.get((object_name, field_name, normalize_key(object_name, field_name, value)))
+
+    def add(self, object_name: str, field_name: str, value: str, record_id: str) -> None:
+        """Index a record
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Account
+            field_name (str): indexed field, e.g., Name
+            value (str): value of the field
+            record_id (str): Id of the record
+        """
+        self.update(object_name, field_name, [(value, record_id)])
+
+    def update(self, object_name: str, field_name: str, items: Iterable[tuple]) -> None:
+        """Index many records at once
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Account
+            field_name (str): indexed field, e.g., Name
+            items (Iterable[tuple]): (value, record_id) pairs
+        """
+        rows = [
+            (object_name, field_name, normalize_key(object_name, field_name, value), record_id)
+            for value, record_id in items
+            if value
+        ]
+        with self._lock:
+            for object_name_, field_name_, key, record_id in rows:
+                self._set((object_name_, field_name_, key), record_id)
+            if self._connection is not None:
+                with self._connection:
+                    self._connection.executemany("INSERT OR REPLACE INTO record_index VALUES (?, ?, ?, ?)", rows)
+
+    def discard(self, object_name: str, field_name: str, value: str) -> None:
+        """Remove a value from the index, e.g., because it no longer points at the right record
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Account
+            field_name (str): indexed field, e.g., Name
+            value (str): value of the field
+        """
+        key = (object_name, field_name, normalize_key(object_name, field_name, value))
+        with self._lock:
+            self._pop(key)
+            if self._connection is not None:
+                with self._connection:
+                    self._connection.execute(
+                        "DELETE FROM record_index WHERE object_name = ? AND field_name = ? AND key = ?",
+                        key,
+                    )
+
+    def discard_id(self, object_name: str, record_id: str) -> None:
+        """Remove all the values that point at a record, e.g., because it was deleted
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Account
+            record_id (str): Id of the record
+        """
+        with self._lock:
+            keys = self._keys_by_id.pop((object_name, record_id[:15]), set())
+            for key in keys:
+                del self._ids[key]
+            if keys and self._connection is not None:
+                with self._connection:
+                    self._connection.executemany(
+                        "DELETE FROM record_index WHERE object_name = ? AND field_name = ? AND key = ?",
+                        keys,
+                    )
+
+    def clear(self, object_name: Optional[str] = None) -> None:
+        """Remove all the values of an object, or of all objects
+
+        Args:
+            object_name (str, optional): Name of the salesforce object. Defaults to all objects.
+        """
+        with self._lock:
+            for key in [key for key in self._ids if object_name is None or key[0] == object_name]:
+                self._pop(key)
+            if self._connection is not None:
+                with self._connection:
+                    if object_name is None:
+                        self._connection.execute("DELETE FROM record_index")
+                    else:
+                        self._connection.execute("DELETE FROM record_index WHERE object_name = ?", (object_name,))
+
+    def _set(self, key: tuple, record_id: str) -> None:
+        """Point a normalized key at a record, the lock must be held"""
+        self._pop(key)
+        self._ids[key] = record_id
+        self._keys_by_id.setdefault((key[0], record_id[:15]), set()).add(key)
+
+    def _pop(self, key: tuple) -> None:
+        """Remove a normalized key, the lock must be held"""
+        record_id = self._ids.pop(key, None)
+        if record_id is None:
+            return
+        id_key = (key[0], record_id[:15])
+        keys = self._keys_by_id[id_key]
+        keys.discard(key)
+        if not keys:
+            del self._keys_by_id[id_key]
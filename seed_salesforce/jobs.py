@@ -0,0 +1,328 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+from seed_salesforce.exceptions import BulkJobError
+from seed_salesforce.results import RecordResult
+from seed_salesforce.salesforce_client import BULK_MAX_UPLOAD_BYTES, DEFAULT_BULK_BATCH_SIZE, SalesforceClient
+from seed_salesforce.utils import chunked, records_to_csv_batches
+
+_log = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_SIZE = 100
+
+
+@dataclass
+class JobSummary:
+    """Counts of the items of a run of a job
+
+    Args:
+        succeeded (int): items processed successfully in this run
+        failed (int): items that failed in this run
+        skipped (int): items skipped because an earlier run completed them
+    """
+
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0
+
+    def add(self, result: RecordResult) -> None:
+        if result.success:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+
+
+class JobJournal:
+    def __init__(self, path: Union[str, Path]) -> None:
+        """SQLite journal of the progress of jobs: the result of each processed item and the Bulk API
+        jobs submitted for them, so that a job can resume where it stopped.
+
+        Args:
+            path (str | Path): path of the database file, created if it does not exist
+        """
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(path), check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS items ("
+                "job_name TEXT NOT NULL, key TEXT NOT NULL, success INTEGER NOT NULL, record_id TEXT, "
+                "errors TEXT NOT NULL, bulk_job_id TEXT, updated_at REAL NOT NULL, PRIMARY KEY (job_name, key))",
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS bulk_jobs ("
+                "job_name TEXT NOT NULL, bulk_job_id TEXT NOT NULL, state TEXT NOT NULL, updated_at REAL NOT NULL, "
+                "PRIMARY KEY (job_name, bulk_job_id))",
+            )
+
+    def close(self) -> None:
+        """Close the database connection"""
+        self._connection.close()
+
+    def completed_keys(self, job_name: str, include_failed: bool = False) -> set:
+        """Return the keys of the items that a job already processed
+
+        Args:
+            job_name (str): name of the job
+            include_failed (bool, optional): include the items that failed. Defaults to False.
+
+        Returns:
+            set[str]: keys of the items
+        """
+        with self._lock:
+            rows = self._connection.execute("SELECT key, success FROM items WHERE job_name = ?", (job_name,))
+            return {key for key, success in rows if success or include_failed}
+
+    def record_results(self, job_name: str, results: Iterable[tuple]) -> None:
+        """Save the results of processed items in a single transaction
+
+        Args:
+            job_name (str): name of the job
+            results (Iterable[tuple]): (key, RecordResult) of each item
+        """
+        now = time.time()
+        rows = [
+            (job_name, key, result.success, result.record_id, json.dumps(result.errors), result.job_id, now)
+            for key, result in results
+        ]
+        with self._lock, self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def results(self, job_name: str) -> dict:
+        """Return the results of the items processed by a job
+
+        Args:
+            job_name (str): name of the job
+
+        Returns:
+            dict: {key: RecordResult}
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT key, success, record_id, errors, bulk_job_id FROM items WHERE job_name = ?",
+                (job_name,),
+            ).fetchall()
+        return {
+            key: RecordResult(success=bool(success), record_id=record_id, errors=json.loads(errors), job_id=job_id)
+            for key, success, record_id, errors, job_id in rows
+        }
+
+    def set_bulk_job_state(self, job_name: str, bulk_job_id: str, state: str) -> None:
+        """Save the state of a Bulk API job submitted by a job: open, submitted, collected, failed or aborted
+
+        Args:
+            job_name (str): name of the job
+            bulk_job_id (str): id of the Bulk API job
+            state (str): state of the Bulk API job in the journal
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO bulk_jobs VALUES (?, ?, ?, ?)",
+                (job_name, bulk_job_id, state, time.time()),
+            )
+
+    def bulk_jobs(self, job_name: str, state: Optional[str] = None) -> list:
+        """Return the Bulk API jobs submitted by a job, least recently updated first
+
+        Args:
+            job_name (str): name of the job
+            state (str, optional): only return the jobs in this state. Defaults to None.
+
+        Returns:
+            list[tuple]: (bulk job id, state) of each job
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT bulk_job_id, state FROM bulk_jobs WHERE job_name = ? ORDER BY updated_at",
+                (job_name,),
+            ).fetchall()
+        return [(bulk_job_id, job_state) for bulk_job_id, job_state in rows if state in (None, job_state)]
+
+    def reset(self, job_name: str) -> None:
+        """Forget the progress of a job so that its next run processes every item
+
+        Args:
+            job_name (str): name of the job
+        """
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM items WHERE job_name = ?", (job_name,))
+            self._connection.execute("DELETE FROM bulk_jobs WHERE job_name = ?", (job_name,))
+
+
+class JobRunner:
+    def __init__(self, client: SalesforceClient, journal: Union[JobJournal, str, Path]) -> None:
+        """Runs resumable jobs over large inputs, checkpointing their progress to a `JobJournal`.
+
+        Rerunning a job with the same name skips the items it already completed (by key) and
+        collects the results of the Bulk API jobs that were in flight when it stopped.
+
+            runner = JobRunner(sf, "sync-journal.sqlite")
+            runner.run("benchmarks-2024", benchmarks, "update_benchmark", key=lambda b: b["salesforce_benchmark_id"])
+            runner.run_bulk_upsert("properties-2024", "Property__c", properties, external_id_field="Id")
+
+        Args:
+            client (SalesforceClient): client to process the items with
+            journal (JobJournal | str | Path): journal, or the path of the journal database
+        """
+        self.client = client
+        self.journal = journal if isinstance(journal, JobJournal) else JobJournal(journal)
+
+    def run(
+        self,
+        job_name: str,
+        items: Iterable[Any],
+        method: Union[str, Callable],
+        key: Callable[[Any], Any],
+        checkpoint_size: int = DEFAULT_CHECKPOINT_SIZE,
+        **kwargs,
+    ) -> JobSummary:
+        """Call a client method once per item, checkpointing the results every `checkpoint_size` items.
+
+        Items that failed in an earlier run are retried. The updates queued by the write-behind queue of the client
+        are written before each checkpoint, and journaled with the results of their writes.
+
+        Args:
+            job_name (str): name of the job, identifies its progress in the journal
+            items (Iterable[Any]): arguments of each call, see `SalesforceClient.map_concurrent`
+            method (str | Callable): name of the client method to call, or the method itself
+            key (Callable): returns the unique key of an item, e.g., its Salesforce Benchmark ID
+            checkpoint_size (int, optional): number of items per checkpoint. Defaults to 100.
+            **kwargs: additional parameters to pass to `SalesforceClient.map_concurrent`, e.g., max_workers for
+                concurrent calls. The calls are made one at a time by default.
+
+        Returns:
+            JobSummary: counts of the items of this run
+        """
+        kwargs.setdefault("max_workers", 1)
+        summary = JobSummary()
+        completed = self.journal.completed_keys(job_name)
+        for chunk in chunked(items, checkpoint_size):
+            pending = [(str(key(item)), item) for item in chunk]
+            pending = [(item_key, item) for item_key, item in pending if item_key not in completed]
+            summary.skipped += len(chunk) - len(pending)
+            if not pending:
+                continue
+
+            outcomes = self.client.map_concurrent(
+                method,
+                [item for _, item in pending],
+                return_exceptions=True,
+                **kwargs,
+            )
+            if self.client.write_behind is not None and any(isinstance(outcome, Future) for outcome in outcomes):
+                # the updates queued by the write-behind queue of the client are journaled once they are written
+                self.client.write_behind.flush()
+            results = [(item_key, self._to_result(outcome)) for (item_key, _), outcome in zip(pending, outcomes)]
+            self.journal.record_results(job_name, results)
+            for _, result in results:
+                summary.add(result)
+        _log.info(f"Job {job_name}: {summary}")
+        return summary
+
+    def run_bulk_upsert(
+        self,
+        job_name: str,
+        object_name: str,
+        records: Iterable[dict],
+        external_id_field: str = "Id",
+        batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+        **kwargs,
+    ) -> JobSummary:
+        """Upsert records with Bulk API 2.0 jobs like `SalesforceClient.bulk_upsert`, journaling each job.
+
+        The results of the jobs of an earlier run are collected first (jobs that were not fully
+        uploaded are aborted), then the records that did not succeed yet are submitted. Records
+        are keyed on their `external_id_field`.
+
+        Args:
+            job_name (str): name of the job, identifies its progress in the journal
+            object_name (str): Name of the salesforce object, e.g., Benchmark__c
+            records (Iterable[dict]): records to upsert, each must contain the `external_id_field`
+            external_id_field (str, optional): field to match existing records on. Defaults to "Id".
+            batch_size (int, optional): number of records per Bulk API job. Defaults to 10000.
+            **kwargs: additional parameters to pass to `SalesforceClient.collect_bulk_job`, e.g., timeout, the
+                seconds to wait for each job to finish
+
+        Returns:
+            JobSummary: counts of the records of this run, including the ones of resumed jobs
+        """
+        summary = JobSummary()
+        self._collect_bulk_jobs(job_name, object_name, external_id_field, summary, **kwargs)
+
+        completed = self.journal.completed_keys(job_name)
+
+        def pending_records():
+            for record in records:
+                if str(record[external_id_field]) in completed:
+                    summary.skipped += 1
+                else:
+                    yield record
+
+        for data in records_to_csv_batches(pending_records(), batch_size, BULK_MAX_UPLOAD_BYTES):
+            job = self.client.create_bulk_ingest_job(object_name, "upsert", external_id_field=external_id_field)
+            self.journal.set_bulk_job_state(job_name, job["id"], "open")
+            self.client.upload_bulk_job_data(job["id"], data)
+            self.client.close_bulk_job(job["id"])
+            self.journal.set_bulk_job_state(job_name, job["id"], "submitted")
+
+        self._collect_bulk_jobs(job_name, object_name, external_id_field, summary, **kwargs)
+        _log.info(f"Job {job_name}: {summary}")
+        return summary
+
+    def _collect_bulk_jobs(
+        self,
+        job_name: str,
+        object_name: str,
+        external_id_field: str,
+        summary: JobSummary,
+        **kwargs,
+    ) -> None:
+        """Journal the results of the submitted Bulk API jobs and abort the ones that were left open"""
+        for bulk_job_id, state in self.journal.bulk_jobs(job_name):
+            if state == "open":
+                # the upload did not complete, its records are submitted again
+                try:
+                    self.client.abort_bulk_job(bulk_job_id)
+                except Exception as e:
+                    _log.warning(f"Failed to abort bulk job {bulk_job_id}: {e}")
+                self.journal.set_bulk_job_state(job_name, bulk_job_id, "aborted")
+            elif state == "submitted":
+                try:
+                    results = self.client.collect_bulk_job(object_name, bulk_job_id, **kwargs)
+                except BulkJobError as e:
+                    _log.warning(
+                        f"Bulk job {bulk_job_id} of job {job_name} failed, its records will be resubmitted: {e}",
+                    )
+                    self.journal.set_bulk_job_state(job_name, bulk_job_id, "failed")
+                    continue
+                self.journal.record_results(
+                    job_name,
+                    [(str(result.record.get(external_id_field)), result) for result in results],
+                )
+                self.journal.set_bulk_job_state(job_name, bulk_job_id, "collected")
+                for result in results:
+                    summary.add(result)
+
+    @staticmethod
+    def _to_result(outcome: Any) -> RecordResult:
+        """Convert the return value or exception of a client method to a result, waiting for the queued writes"""
+        if isinstance(outcome, Future):
+            try:
+                outcome = outcome.result()
+            except Exception as e:
+                outcome = e
+        if isinstance(outcome, RecordResult):
+            return outcome
+        if isinstance(outcome, Exception):
+            return RecordResult(success=False, errors=[f"{type(outcome).__name__}: {outcome}"])
+        record_id = outcome.get("Id") if isinstance(outcome, dict) else None
+        return RecordResult(success=True, record_id=record_id)
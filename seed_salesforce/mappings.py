@@ -0,0 +1,449 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+# Mappings of SEED rows (e.g., property views or benchmark rows) to Salesforce payloads. A mapping template is
+# a JSON document, optionally a Jinja template (.j2, .jinja, .jinja2) rendered once with a configuration
+# context, naming the Salesforce object and the value of each field:
+#
+#     {
+#         "object": "Benchmark__c",
+#         "external_id_field": "Salesforce_Benchmark_ID__c",
+#         "skip_empty": true,
+#         "fields": {
+#             "Salesforce_Benchmark_ID__c": "{custom_id_1}-{{ year }}",
+#             "Name": "{property_name}",
+#             "Site_EUI__c": {"column": "site_eui", "type": "double"},
+#             "Benchmark_Source__c": {"value": "SEED"}
+#         }
+#     }
+#
+# Jinja placeholders ({{ year }}) are filled when the template is rendered, the single brace placeholders
+# ({custom_id_1}) are filled from each row. Templates are compiled once into a `Mapping`, which transforms
+# batches of rows column by column without rendering or parsing anything per row.
+import copy
+import datetime
+import json
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from decimal import Decimal
+from itertools import repeat
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+from seed_salesforce.exceptions import MappingError
+from seed_salesforce.utils import chunked
+
+DEFAULT_MAPPING_CACHE_SIZE = 64
+# rows mapped at a time by `Mapping.iter_rows`
+DEFAULT_MAPPING_BATCH_SIZE = 10000
+JINJA_SUFFIXES = (".j2", ".jinja", ".jinja2")
+# "{column}" placeholders of the field templates, filled from each row
+_PLACEHOLDER = re.compile(r"\{([^{}]+)\}")
+_MISSING = object()
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == ""
+
+
+def _to_string(value: Any) -> Any:
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _to_number(value: Any) -> Any:
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return value
+    # SEED exports format large numbers with thousands separators
+    value = str(value).strip().replace(",", "") if value is not None else ""
+    return float(value) if value else None
+
+
+def _to_int(value: Any) -> Any:
+    value = _to_number(value)
+    return None if value is None else int(value)
+
+
+def _to_boolean(value: Any) -> Any:
+    if isinstance(value, str):
+        value = value.strip().lower()
+        return value in ("true", "1", "yes", "y") if value else None
+    return None if value is None else bool(value)
+
+
+def _to_datetime(value: Any) -> Any:
+    if value is None or isinstance(value, datetime.date):
+        return value
+    # SEED exports ISO 8601 dates and datetimes, fromisoformat only reads the "Z" suffix from Python 3.11
+    value = str(value).strip()
+    if not value:
+        return None
+    return datetime.datetime.fromisoformat(value[:-1] + "+00:00" if value.endswith("Z") else value)
+
+
+def _to_date(value: Any) -> Any:
+    value = _to_datetime(value)
+    return value.date() if isinstance(value, datetime.datetime) else value
+
+
+# conversions of the "type" of a field, the client serializes the converted values for Salesforce
+CONVERTERS = {
+    "string": _to_string,
+    "double": _to_number,
+    "currency": _to_number,
+    "percent": _to_number,
+    "int": _to_int,
+    "boolean": _to_boolean,
+    "date": _to_date,
+    "datetime": _to_datetime,
+}
+
+
+def _column_getter(column: str, default: Any = None) -> Callable[[dict], Any]:
+    """Getter of a column of a row, following dotted names into nested dicts, e.g., "extra_data.Year Built"
+    when the row has no "extra_data.Year Built" key. Empty values are replaced by the default, if there is one.
+    """
+    path = column.split(".")
+
+    def get(row: dict) -> Any:
+        value = row.get(column, _MISSING)
+        if value is _MISSING:
+            value = row
+            for key in path:
+                value = value.get(key) if isinstance(value, dict) else None
+        return default if _is_empty(value) else value
+
+    def get_column(row: dict) -> Any:
+        value = row.get(column)
+        return None if value == "" else value
+
+    if len(path) == 1 and default is None:
+        # the common case, one lookup per row
+        return get_column
+    return get
+
+
+def _template_getter(template: str, default: Any = None) -> Callable[[dict], Any]:
+    """Getter formatting a string with the "{column}" placeholders filled from the row. The value is None when
+    all the columns of the placeholders are empty.
+    """
+    parts = _PLACEHOLDER.split(template)
+    literals = parts[0::2]
+    getters = [_column_getter(column.strip()) for column in parts[1::2]]
+
+    def get(row: dict) -> Any:
+        values = [getter(row) for getter in getters]
+        if all(_is_empty(value) for value in values):
+            return default
+        text = literals[0]
+        for value, literal in zip(values, literals[1:]):
+            text += ("" if value is None else _to_string(value)) + literal
+        return text
+
+    return get
+
+
+def _convert_column(values: list, convert: Callable) -> list:
+    """Convert the values of a column, converting each distinct value once, e.g., the repeated years of SEED rows"""
+    # keyed on the type too, so that 1, 1.0 and True are converted separately
+    keys = list(zip(map(type, values), values))
+    try:
+        distinct = set(keys)
+    except TypeError:
+        # unhashable values, e.g., lists
+        return list(map(convert, values))
+    converted = {key: convert(key[1]) for key in distinct}
+    return [converted[key] for key in keys]
+
+
+@dataclass(eq=False)
+class Mapping:
+    """Compiled mapping of rows to the payloads of a Salesforce object, see `compile_mapping`
+
+    Args:
+        name (str): name of the mapping, used in the errors
+        fields (dict): Salesforce field name to a getter called with each row, or to a constant
+            wrapped in a tuple
+        converters (dict, optional): Salesforce field name to the conversion of the values of its getter,
+            see `CONVERTERS`. Defaults to None.
+        object_name (str, optional): Salesforce object of the payloads, e.g., Benchmark__c. Defaults to None.
+        external_id_field (str, optional): field identifying the records in upserts. Defaults to None.
+        skip_empty (bool, optional): leave the empty fields out of the payloads instead of sending them as
+            None, which clears the field in Salesforce. Defaults to False.
+    """
+
+    name: str
+    fields: dict
+    converters: Optional[dict] = None
+    object_name: Optional[str] = None
+    external_id_field: Optional[str] = None
+    skip_empty: bool = False
+
+    def __post_init__(self) -> None:
+        self.field_names = list(self.fields)
+        self._constants = {field: value[0] for field, value in self.fields.items() if isinstance(value, tuple)}
+        self._getters = {field: getter for field, getter in self.fields.items() if not isinstance(getter, tuple)}
+        self._converters = self.converters or {}
+
+    def __call__(self, row: dict) -> dict:
+        """Map a single row, see `map_rows` for many rows"""
+        return self.map_rows([row])[0]
+
+    def map_rows(self, rows: Iterable[dict]) -> list:
+        """Map rows to Salesforce payloads, one column at a time
+
+        Args:
+            rows (Iterable[dict]): SEED rows, keyed by column name
+
+        Raises:
+            MappingError: a value can't be converted to the type of its field
+
+        Returns:
+            list[dict]: one payload per row, with the fields in the order of the mapping
+        """
+        rows = rows if isinstance(rows, list) else list(rows)
+        columns = []
+        for field in self.field_names:
+            if field in self._constants:
+                columns.append(repeat(self._constants[field], len(rows)))
+                continue
+            try:
+                column = list(map(self._getters[field], rows))
+                if field in self._converters:
+                    column = _convert_column(column, self._converters[field])
+                columns.append(column)
+            except (ValueError, TypeError, OverflowError) as e:
+                raise MappingError(f"Mapping {self.name}: can't map field {field}: {e}") from e
+
+        names = self.field_names
+        if self.skip_empty:
+            return [
+                {name: value for name, value in zip(names, values) if value is not None and value != ""}
+                for values in zip(*columns)
+            ]
+        return [dict(zip(names, values)) for values in zip(*columns)]
+
+    def iter_rows(self, rows: Iterable[dict], batch_size: int = DEFAULT_MAPPING_BATCH_SIZE) -> Iterator[dict]:
+        """Lazily map rows in batches of `batch_size`, e.g., to stream them into `bulk_upsert`
+
+        Args:
+            rows (Iterable[dict]): SEED rows, keyed by column name
+            batch_size (int, optional): rows mapped at a time. Defaults to 10000.
+
+        Returns:
+            Iterator[dict]: one payload per row
+        """
+        for batch in chunked(rows, batch_size):
+            yield from self.map_rows(batch)
+
+
+def _compile_field(mapping_name: str, field: str, spec: Any) -> tuple:
+    """Compile the specification of a field
+
+    Returns:
+        tuple: the getter of the field, or its constant value wrapped in a tuple, and its converter or None
+    """
+    if isinstance(spec, str):
+        spec = {"template": spec}
+    elif not isinstance(spec, dict):
+        return (spec,), None
+
+    unknown = set(spec) - {"column", "template", "value", "type", "default"}
+    sources = [key for key in ("column", "template", "value") if key in spec]
+    if unknown or len(sources) != 1:
+        raise MappingError(
+            f"Mapping {mapping_name}: field {field} must have one of column, template or value, "
+            f"with an optional type and default, got {sorted(spec)}",
+        )
+
+    field_type = spec.get("type")
+    if field_type is not None and field_type not in CONVERTERS:
+        raise MappingError(f"Mapping {mapping_name}: unknown type {field_type} of field {field}")
+    convert = CONVERTERS.get(field_type)
+
+    if "value" in spec:
+        return (convert(spec["value"]) if convert else spec["value"],), None
+
+    default = spec.get("default")
+    if "column" in spec:
+        get = _column_getter(spec["column"], default)
+    else:
+        template = spec["template"]
+        columns = _PLACEHOLDER.findall(template)
+        if not columns:
+            return (convert(template) if convert else template,), None
+        if _PLACEHOLDER.fullmatch(template):
+            # a single placeholder keeps the value of the column as it is, e.g., a number
+            get = _column_getter(columns[0].strip(), default)
+        else:
+            get = _template_getter(template, default)
+
+    return get, convert
+
+
+def compile_mapping(spec: dict, name: str = "<mapping>") -> Mapping:
+    """Compile a mapping specification into a `Mapping`
+
+    The specification has the "fields" of the payloads and optionally the "object", "external_id_field" and
+    "skip_empty" settings of the `Mapping`, or is just the fields. The value of each field is one of
+        - a string, with "{column}" placeholders filled from the row, e.g., "{property_name} ({year_ending})";
+          a string that is a single placeholder keeps the value of the column as it is
+        - a dict with either a "column" name (dotted names read nested dicts), a "template" string or a
+          constant "value", and optionally the "type" to convert the value to (string, double, currency,
+          percent, int, boolean, date or datetime) and the "default" of empty values
+        - a number, boolean, list or null constant
+
+    Args:
+        spec (dict): mapping specification
+        name (str, optional): name of the mapping, used in the errors. Defaults to "<mapping>".
+
+    Raises:
+        MappingError: invalid specification
+
+    Returns:
+        Mapping: compiled mapping
+    """
+    if not isinstance(spec, dict):
+        raise MappingError(f"Mapping {name} must be a JSON object, got {type(spec).__name__}")
+    settings = spec if "fields" in spec else {"fields": spec}
+    if not isinstance(settings["fields"], dict):
+        raise MappingError(f"The fields of mapping {name} must be a JSON object")
+    fields = {}
+    converters = {}
+    for field, field_spec in settings["fields"].items():
+        fields[field], convert = _compile_field(name, field, field_spec)
+        if convert is not None:
+            converters[field] = convert
+    return Mapping(
+        name,
+        fields,
+        converters,
+        object_name=settings.get("object"),
+        external_id_field=settings.get("external_id_field"),
+        skip_empty=bool(settings.get("skip_empty", False)),
+    )
+
+
+class MappingEngine:
+    def __init__(
+        self,
+        template_dir: Optional[Union[str, Path]] = None,
+        cache_size: int = DEFAULT_MAPPING_CACHE_SIZE,
+    ) -> None:
+        """Loader of the mapping templates of a directory, keeping the compiled mappings in a least-recently-used
+        cache keyed on the template, its modification time and the rendering context. Jinja templates require
+        jinja2.
+
+            engine = MappingEngine("mappings")
+            payloads = engine.map_rows("benchmark.json.j2", rows, context={"year": 2024})
+
+        Args:
+            template_dir (str | Path, optional): directory of the templates. Defaults to None, to load no templates.
+            cache_size (int, optional): maximum number of compiled mappings to keep. Defaults to 64.
+        """
+        self.template_dir = Path(template_dir) if template_dir is not None else None
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._jinja_env = None
+
+    def template_path(self, template_name: str) -> Path:
+        """Path of a template of the template directory
+
+        Raises:
+            MappingError: No template directory, or the template does not exist
+        """
+        if self.template_dir is None:
+            raise MappingError(f"Can't load the mapping template {template_name}, no template directory is configured")
+        path = (self.template_dir / template_name).resolve()
+        if self.template_dir.resolve() not in path.parents or not path.is_file():
+            raise MappingError(f"Mapping template {template_name} not found in {self.template_dir}")
+        return path
+
+    def render(self, template_name: str, context: Optional[dict] = None) -> dict:
+        """Load a template, rendering Jinja templates with the context.
+
+        Args:
+            template_name (str): name of the template file, relative to the template directory
+            context (dict, optional): context to render Jinja templates with. Defaults to None.
+
+        Raises:
+            MappingError: Template not found, or not valid JSON once rendered
+
+        Returns:
+            dict: rendered mapping specification
+        """
+        return copy.deepcopy(self._load(template_name, context)[0])
+
+    def get_mapping(self, template_name: str, context: Optional[dict] = None) -> Mapping:
+        """Compiled mapping of a template, see `render`
+
+        Returns:
+            Mapping: compiled mapping, from the cache when the template did not change
+        """
+        return self._load(template_name, context)[1]
+
+    def map_rows(self, template_name: str, rows: Iterable[dict], context: Optional[dict] = None) -> list:
+        """Map SEED rows to Salesforce payloads with the mapping of a template, see `Mapping.map_rows`
+
+        Returns:
+            list[dict]: one payload per row
+        """
+        return self.get_mapping(template_name, context).map_rows(rows)
+
+    def cache_info(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._cache), "max_size": self.cache_size}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def _load(self, template_name: str, context: Optional[dict]) -> tuple:
+        path = self.template_path(template_name)
+        key = (template_name, path.stat().st_mtime_ns, json.dumps(context or {}, sort_keys=True, default=str))
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        if path.suffix in JINJA_SUFFIXES:
+            text = self._get_jinja_env().get_template(template_name).render(context or {})
+        else:
+            text = path.read_text()
+        try:
+            spec = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise MappingError(f"Mapping template {template_name} is not valid JSON: {e}") from e
+        entry = (spec, compile_mapping(spec, name=template_name))
+
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = entry
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return entry
+
+    def _get_jinja_env(self) -> Any:
+        if self._jinja_env is None:
+            try:
+                import jinja2
+            except ImportError as e:
+                raise ImportError("Jinja mapping templates require jinja2, install it with `pip install jinja2`") from e
+
+            # the templates render JSON, not HTML, and undefined variables must not silently produce invalid JSON
+            self._jinja_env = jinja2.Environment(
+                loader=jinja2.FileSystemLoader(str(self.template_dir)),
+                undefined=jinja2.StrictUndefined,
+                autoescape=False,  # noqa: S701
+            )
+        return self._jinja_env
@@ -0,0 +1,450 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import bisect
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, Union
+
+import requests
+
+_log = logging.getLogger(__name__)
+
+# upper bounds, in seconds, of the buckets of the latency histograms
+DEFAULT_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# method name of the requests made outside of an instrumented method, e.g., through `sf.connection` directly
+UNATTRIBUTED = "unattributed"
+
+
+class Histogram:
+    def __init__(self, buckets: tuple = DEFAULT_LATENCY_BUCKETS) -> None:
+        """Counts of the observed values by bucket, with their sum, like a Prometheus histogram
+
+        Args:
+            buckets (tuple, optional): sorted upper bounds of the buckets, a last +Inf bucket is implied.
+                Defaults to `DEFAULT_LATENCY_BUCKETS`.
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Return the upper bound of the bucket of the q-quantile, e.g., 0.95, inf if it is in the last bucket"""
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            cumulative += count
+            if cumulative >= rank and cumulative:
+                return bound
+        return 0.0
+
+    def to_dict(self) -> dict:
+        """Return the cumulative counts by upper bound, the sum and the count"""
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            cumulative += count
+            buckets[bound] = cumulative
+        return {"buckets": buckets, "sum": self.sum, "count": self.count}
+
+
+@dataclass
+class CallRecord:
+    """Usage of one call of a public client method, including the calls it made to other client methods
+
+    Args:
+        method (str): name of the method, e.g., find_property_by_name
+        object_name (str): Salesforce object of the call, e.g., Property__c, empty if the call is not about one
+        start (float): time.time() of the start of the call
+        seconds (float): duration of the call. For iterators, the time spent producing the items.
+        requests (int): HTTP requests that got a response, excluding the retried attempts
+        retries (int): attempts that were retried after a transient error
+        api_requests (int): requests that consumed the daily API quota (that returned Sforce-Limit-Info)
+        bytes_sent (int): bytes of the request bodies
+        bytes_received (int): bytes of the response bodies, from Content-Length for streamed responses
+        http_errors (int): responses with an error status
+        error (str, optional): name of the exception raised by the call, if it failed
+    """
+
+    method: str
+    object_name: str = ""
+    start: float = field(default_factory=time.time)
+    seconds: float = 0.0
+    requests: int = 0
+    retries: int = 0
+    api_requests: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    http_errors: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class MethodStats:
+    """Totals of the calls of a method on an object, see `ClientMetrics.stats`"""
+
+    calls: int = 0
+    errors: int = 0
+    requests: int = 0
+    retries: int = 0
+    api_requests: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    http_errors: int = 0
+    latency: Histogram = field(default_factory=Histogram)
+
+    def add(self, call: CallRecord) -> None:
+        self.calls += 1
+        self.errors += call.error is not None
+        self.requests += call.requests
+        self.retries += call.retries
+        self.api_requests += call.api_requests
+        self.bytes_sent += call.bytes_sent
+        self.bytes_received += call.bytes_received
+        self.http_errors += call.http_errors
+        self.latency.observe(call.seconds)
+
+
+class MetricsSink:
+    """Destination of the metrics of a `ClientMetrics`, override the methods to use"""
+
+    def record_call(self, call: CallRecord) -> None:
+        """Called with each finished call, from the thread that made it"""
+
+    def export(self, stats: list) -> None:
+        """Called by `ClientMetrics.export` with the totals by method and object, see `ClientMetrics.stats`"""
+
+
+class LoggingSink(MetricsSink):
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.DEBUG) -> None:
+        """Log each call at `level`, and the totals by method and object at INFO on export
+
+        Args:
+            logger (logging.Logger, optional): Defaults to the logger of this module.
+            level (int, optional): level of the call messages. Defaults to DEBUG.
+        """
+        self.logger = logger or _log
+        self.level = level
+
+    def record_call(self, call: CallRecord) -> None:
+        if not self.logger.isEnabledFor(self.level):
+            return
+        on = f" on {call.object_name}" if call.object_name else ""
+        failed = f", failed with {call.error}" if call.error else ""
+        self.logger.log(
+            self.level,
+            f"{call.method}{on} took {call.seconds:.3f}s: {call.requests} requests, {call.retries} retries, "
+            f"{call.bytes_sent} bytes sent, {call.bytes_received} bytes received{failed}",
+        )
+
+    def export(self, stats: list) -> None:
+        for entry in stats:
+            on = f" on {entry['object_name']}" if entry["object_name"] else ""
+            self.logger.info(
+                f"{entry['method']}{on}: {entry['calls']} calls, {entry['requests_per_call']:.1f} requests/call, "
+                f"{entry['retries']} retries, {entry['api_requests']} API requests, "
+                f"{entry['latency']['sum'] / max(entry['calls'], 1):.3f}s/call, {entry['errors']} errors",
+            )
+
+
+def render_prometheus(stats: list, prefix: str = "seed_salesforce") -> str:
+    """Render the totals by method and object in the Prometheus text exposition format
+
+    Args:
+        stats (list): totals, see `ClientMetrics.stats`
+        prefix (str, optional): prefix of the metric names. Defaults to "seed_salesforce".
+
+    Returns:
+        str: exposition text, one sample per method, object and metric
+    """
+    counters = {
+        "calls": "Calls of the client method",
+        "errors": "Calls of the client method that raised an exception",
+        "requests": "HTTP requests made by the client method",
+        "retries": "Retried attempts of the requests of the client method",
+        "api_requests": "Requests of the client method counted against the daily API quota",
+        "bytes_sent": "Bytes of the request bodies of the client method",
+        "bytes_received": "Bytes of the response bodies of the client method",
+        "http_errors": "Responses with an error status to the requests of the client method",
+    }
+    lines = []
+    for name, description in counters.items():
+        lines += [f"# HELP {prefix}_{name}_total {description}", f"# TYPE {prefix}_{name}_total counter"]
+        lines += [f"{prefix}_{name}_total{{{_labels(entry)}}} {entry[name]}" for entry in stats]
+
+    name = f"{prefix}_call_duration_seconds"
+    lines += [f"# HELP {name} Duration of the calls of the client method", f"# TYPE {name} histogram"]
+    for entry in stats:
+        labels = _labels(entry)
+        for bound, count in entry["latency"]["buckets"].items():
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{name}_bucket{{{labels},le="{le}"}} {count}')
+        lines.append(f"{name}_sum{{{labels}}} {entry['latency']['sum']}")
+        lines.append(f"{name}_count{{{labels}}} {entry['latency']['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def _labels(entry: dict) -> str:
+    return f'method="{entry["method"]}",object="{entry["object_name"]}"'
+
+
+class PrometheusTextSink(MetricsSink):
+    def __init__(self, path: Union[str, Path], prefix: str = "seed_salesforce") -> None:
+        """Write the totals to a file in the Prometheus text format on export, e.g., for the textfile
+        collector of the node exporter. The file is replaced atomically.
+
+        Args:
+            path (str | Path): file to write, e.g., /var/lib/node_exporter/seed_salesforce.prom
+            prefix (str, optional): prefix of the metric names. Defaults to "seed_salesforce".
+        """
+        self.path = Path(path)
+        self.prefix = prefix
+
+    def export(self, stats: list) -> None:
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(render_prometheus(stats, self.prefix))
+        os.replace(tmp_path, self.path)
+
+
+class OpenTelemetrySink(MetricsSink):
+    def __init__(self, tracer: Any = None) -> None:
+        """Emit a span per call, with the usage of the call as attributes. Requires opentelemetry-api.
+
+        Args:
+            tracer (opentelemetry.trace.Tracer, optional): Defaults to the tracer of this module from the global
+                tracer provider.
+        """
+        if tracer is None:
+            try:
+                from opentelemetry import trace
+            except ImportError as e:
+                raise ImportError(
+                    "The OpenTelemetry sink requires opentelemetry-api, install it with `pip install opentelemetry-api`",
+                ) from e
+            tracer = trace.get_tracer(__name__)
+        self.tracer = tracer
+
+    def record_call(self, call: CallRecord) -> None:
+        start_ns = int(call.start * 1e9)
+        span = self.tracer.start_span(f"SalesforceClient.{call.method}", start_time=start_ns)
+        attributes = {
+            "salesforce.object": call.object_name,
+            "salesforce.requests": call.requests,
+            "salesforce.retries": call.retries,
+            "salesforce.api_requests": call.api_requests,
+            "salesforce.bytes_sent": call.bytes_sent,
+            "salesforce.bytes_received": call.bytes_received,
+            "salesforce.http_errors": call.http_errors,
+        }
+        if call.error:
+            attributes["error.type"] = call.error
+        span.set_attributes(attributes)
+        span.end(end_time=start_ns + int(call.seconds * 1e9))
+
+
+class ClientMetrics:
+    def __init__(self, sinks: Optional[list] = None, latency_buckets: tuple = DEFAULT_LATENCY_BUCKETS) -> None:
+        """Usage of the calls of a `SalesforceClient` by method and object: latency histograms, HTTP requests,
+        retries, requests counted against the daily API quota and bytes sent and received.
+
+        Pass it to the client to record every call of its public methods, the requests are attributed to the
+        outermost method called, e.g., the query and the fetch of `find_property_by_name`:
+
+            metrics = ClientMetrics(sinks=[LoggingSink()])
+            sf = SalesforceClient(connection_config_filepath=path, metrics=metrics)
+            sf.find_property_by_name("Ice Cream Factory")
+            metrics.stats()  # [{"method": "find_property_by_name", "requests_per_call": 2.0, ...}]
+
+        Args:
+            sinks (list[MetricsSink], optional): destinations of the calls and of the exported totals, e.g.,
+                `LoggingSink()`, `PrometheusTextSink(path)` or `OpenTelemetrySink()`. Defaults to None.
+            latency_buckets (tuple, optional): upper bounds of the buckets of the latency histograms.
+                Defaults to `DEFAULT_LATENCY_BUCKETS`.
+        """
+        self.sinks = list(sinks or [])
+        self.latency_buckets = latency_buckets
+        self._stats: dict = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def active_call(self) -> Optional[CallRecord]:
+        """Return the call running in this thread, if any"""
+        return getattr(self._local, "call", None)
+
+    @contextmanager
+    def track(self, call: CallRecord) -> Iterator[CallRecord]:
+        """Attribute the requests made by this thread to `call` and add the time spent to its duration"""
+        self._local.call = call
+        start = time.perf_counter()
+        try:
+            yield call
+        except BaseException as e:
+            if not isinstance(e, GeneratorExit):
+                call.error = type(e).__name__
+            raise
+        finally:
+            call.seconds += time.perf_counter() - start
+            self._local.call = None
+
+    def finish(self, call: CallRecord) -> None:
+        """Add a finished call to the totals and pass it to the sinks"""
+        with self._lock:
+            key = (call.method, call.object_name)
+            if key not in self._stats:
+                self._stats[key] = MethodStats(latency=Histogram(self.latency_buckets))
+            self._stats[key].add(call)
+        for sink in self.sinks:
+            try:
+                sink.record_call(call)
+            except Exception as e:
+                _log.warning(f"Metrics sink {type(sink).__name__} failed: {e}")
+
+    def record_response(self, response: requests.Response, **kwargs) -> requests.Response:
+        """Response hook of the session of the client, counting the request against the call of this thread.
+
+        Streamed responses are counted from their Content-Length, so their content is not read here.
+        """
+        call = self.active_call()
+        standalone = call is None
+        if standalone:
+            call = CallRecord(UNATTRIBUTED, seconds=response.elapsed.total_seconds())
+
+        body = response.request.body
+        call.requests += 1
+        # set by `SalesforceHTTPAdapter` when it retried the request
+        call.retries += getattr(response, "attempts", 1) - 1
+        call.api_requests += "Sforce-Limit-Info" in response.headers
+        call.bytes_sent += len(body) if isinstance(body, (bytes, str)) else 0
+        if kwargs.get("stream") or "Content-Length" in response.headers:
+            call.bytes_received += int(response.headers.get("Content-Length") or 0)
+        else:
+            call.bytes_received += len(response.content)
+        call.http_errors += response.status_code >= requests.codes.bad_request
+
+        if standalone:
+            self.finish(call)
+        return response
+
+    def stats(self) -> list:
+        """Return the totals of the calls by method and object, sorted by method
+
+        Returns:
+            list[dict]: {"method", "object_name", "calls", "errors", "requests", "requests_per_call", "retries",
+                "api_requests", "bytes_sent", "bytes_received", "http_errors", "latency": {"buckets", "sum",
+                "count"}, "latency_p50", "latency_p95"} by method and object
+        """
+        with self._lock:
+            items = sorted(self._stats.items())
+            return [
+                {
+                    "method": method,
+                    "object_name": object_name,
+                    "calls": stats.calls,
+                    "errors": stats.errors,
+                    "requests": stats.requests,
+                    "requests_per_call": stats.requests / stats.calls if stats.calls else 0.0,
+                    "retries": stats.retries,
+                    "api_requests": stats.api_requests,
+                    "bytes_sent": stats.bytes_sent,
+                    "bytes_received": stats.bytes_received,
+                    "http_errors": stats.http_errors,
+                    "latency": stats.latency.to_dict(),
+                    "latency_p50": stats.latency.quantile(0.5),
+                    "latency_p95": stats.latency.quantile(0.95),
+                }
+                for (method, object_name), stats in items
+            ]
+
+    def export(self) -> None:
+        """Pass the totals to the `export` of each sink, e.g., to write the Prometheus file"""
+        stats = self.stats()
+        for sink in self.sinks:
+            sink.export(stats)
+
+    def reset(self) -> None:
+        """Forget the totals"""
+        with self._lock:
+            self._stats.clear()
+
+
+def instrumented(object_name: Optional[str] = None) -> Callable:
+    """Decorator recording the calls of a `SalesforceClient` method in the `metrics` of the client, if it has one.
+
+    Calls made while another instrumented call runs in the same thread are part of that call. The calls of
+    generator methods are recorded when the iteration ends, their duration is the time spent producing items.
+
+        @instrumented("Property__c")
+        def get_property_by_id(self, property_id: str) -> dict: ...
+
+    Args:
+        object_name (str, optional): Salesforce object of the method. Defaults to None, for the value of the
+            `object_name` argument of the method, if it has one.
+
+    Returns:
+        Callable: decorator
+    """
+
+    def decorator(method: Callable) -> Callable:
+        parameters = list(inspect.signature(method).parameters)
+        # position of the object_name argument, after self
+        position = parameters.index("object_name") - 1 if "object_name" in parameters else None
+
+        def new_call(args: tuple, kwargs: dict) -> CallRecord:
+            name = object_name
+            if name is None and position is not None:
+                name = kwargs["object_name"] if "object_name" in kwargs else args[position]
+            return CallRecord(method.__name__, name or "")
+
+        if inspect.isgeneratorfunction(method):
+
+            @functools.wraps(method)
+            def generator_wrapper(self, *args, **kwargs):
+                metrics = self.metrics
+                if metrics is None or metrics.active_call() is not None:
+                    yield from method(self, *args, **kwargs)
+                    return
+
+                call = new_call(args, kwargs)
+                generator = method(self, *args, **kwargs)
+                try:
+                    while True:
+                        with metrics.track(call):
+                            try:
+                                item = next(generator)
+                            except StopIteration:
+                                return
+                        yield item
+                finally:
+                    generator.close()
+                    metrics.finish(call)
+
+            return generator_wrapper
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            metrics = self.metrics
+            if metrics is None or metrics.active_call() is not None:
+                return method(self, *args, **kwargs)
+
+            call = new_call(args, kwargs)
+            try:
+                with metrics.track(call):
+                    return method(self, *args, **kwargs)
+            finally:
+                metrics.finish(call)
+
+        return wrapper
+
+    return decorator
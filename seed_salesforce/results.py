@@ -0,0 +1,74 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass
+class RecordResult:
+    """Outcome of a single record in a batched (Bulk API or sObject Collections) operation.
+
+    Args:
+        success (bool): was the record written successfully?
+        record_id (str, optional): Salesforce Id of the record, if known
+        created (bool): True if the record was inserted rather than updated
+        errors (list): error messages returned by Salesforce for this record
+        record (dict): the submitted field values of the record
+        job_id (str, optional): id of the Bulk API job that processed the record
+    """
+
+    success: bool
+    record_id: Optional[str] = None
+    created: bool = False
+    errors: list = field(default_factory=list)
+    record: dict = field(default_factory=dict)
+    job_id: Optional[str] = None
+
+    @classmethod
+    def from_bulk_row(cls, row: dict, success: bool, job_id: Optional[str] = None) -> "RecordResult":
+        """Build the result from a row of a Bulk API 2.0 successfulResults/failedResults/unprocessedrecords CSV.
+
+        Args:
+            row (dict): row of the results CSV, as returned by csv.DictReader
+            success (bool): True if the row came from the successfulResults CSV
+            job_id (str, optional): id of the job that the row belongs to
+
+        Returns:
+            RecordResult: parsed result
+        """
+        record = {key: value for key, value in row.items() if not key.startswith("sf__")}
+        error = row.get("sf__Error")
+        return cls(
+            success=success,
+            record_id=row.get("sf__Id") or None,
+            created=row.get("sf__Created", "").lower() == "true",
+            errors=[error] if error else [],
+            record=record,
+            job_id=job_id,
+        )
+
+    @classmethod
+    def from_collection_result(
+        cls,
+        result: dict,
+        record: Optional[dict] = None,
+        created: bool = False,
+    ) -> "RecordResult":
+        """Build the result from an item of an sObject Collections response.
+
+        Args:
+            result (dict): item of the response, e.g., {"id": "001...", "success": true, "errors": []}
+            record (dict, optional): the submitted field values of the record. Defaults to None.
+            created (bool, optional): True if the request was an insert. Defaults to False.
+
+        Returns:
+            RecordResult: parsed result
+        """
+        errors = [f"{error.get('statusCode')}: {error.get('message')}" for error in result.get("errors") or []]
+        return cls(
+            success=bool(result.get("success")),
+            record_id=result.get("id"),
+            created=created and bool(result.get("success")),
+            errors=errors,
+            record=record or {},
+        )
@@ -0,0 +1,187 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import logging
+import random
+import threading
+from typing import Optional
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+_log = logging.getLogger(__name__)
+_random = random.SystemRandom()
+
+# maximum number of attempts of a request, including the first one, by class of transient error
+DEFAULT_MAX_ATTEMPTS = {
+    # Salesforce refused the request, e.g., too many concurrent long running requests
+    "REQUEST_LIMIT_EXCEEDED": 3,
+    # the transaction was rolled back because another one held a lock on a record
+    "UNABLE_TO_LOCK_ROW": 5,
+    # 503, the instance is unavailable or in maintenance
+    "SERVICE_UNAVAILABLE": 5,
+    # 502 or 504 from a proxy, Salesforce may have processed the request
+    "GATEWAY_ERROR": 4,
+    # the connection could not be opened, the request was not sent
+    "CONNECTION_FAILED": 5,
+    # the connection was reset after the request was sent
+    "CONNECTION_RESET": 4,
+    # no response in time, Salesforce may have processed the request
+    "READ_TIMEOUT": 3,
+}
+# errors after which the request may have been processed, only idempotent requests are retried after them
+AMBIGUOUS_ERRORS = ("GATEWAY_ERROR", "CONNECTION_RESET", "READ_TIMEOUT")
+# classes of the transient errors by HTTP status and by Salesforce error code
+STATUS_ERRORS = {
+    requests.codes.service_unavailable: "SERVICE_UNAVAILABLE",
+    requests.codes.bad_gateway: "GATEWAY_ERROR",
+    requests.codes.gateway_timeout: "GATEWAY_ERROR",
+}
+ERROR_CODE_ERRORS = {
+    "REQUEST_LIMIT_EXCEEDED": "REQUEST_LIMIT_EXCEEDED",
+    "UNABLE_TO_LOCK_ROW": "UNABLE_TO_LOCK_ROW",
+    "SERVER_UNAVAILABLE": "SERVICE_UNAVAILABLE",
+}
+# POST creates records, PATCH updates or upserts them to the same values and DELETE fails on deleted records
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "PATCH", "DELETE")
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        max_attempts: Optional[dict] = None,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30,
+        budget_ratio: float = 0.1,
+        budget_min: int = 10,
+    ) -> None:
+        """Retries of the requests that failed with a transient error, applied to every request of the session.
+
+        Retries wait a random time up to an exponentially growing backoff (full jitter), or the
+        Retry-After of the response if longer. Requests that Salesforce may have processed (see
+        `AMBIGUOUS_ERRORS`) are only retried if their method is idempotent, so records are never
+        created twice. The retries are limited by a budget of `budget_min` plus `budget_ratio`
+        of the requests made so that an outage does not multiply the load.
+
+        Args:
+            max_attempts (dict, optional): maximum attempts by error class, merged with `DEFAULT_MAX_ATTEMPTS`.
+                Set an error class to 1 to not retry it. Defaults to None.
+            backoff_base (float, optional): seconds of backoff of the first retry. Defaults to 0.5.
+            backoff_max (float, optional): maximum seconds of backoff. Defaults to 30.
+            budget_ratio (float, optional): retries allowed per request made. Defaults to 0.1.
+            budget_min (int, optional): retries allowed regardless of the number of requests. Defaults to 10.
+        """
+        self.max_attempts = {**DEFAULT_MAX_ATTEMPTS, **(max_attempts or {})}
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.budget_ratio = budget_ratio
+        self.budget_min = budget_min
+
+        self.requests = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        """Count a request, including retries, towards the retry budget"""
+        with self._lock:
+            self.requests += 1
+
+    def should_retry(self, error_class: Optional[str], method: str, attempt: int) -> bool:
+        """Return whether to retry a request that failed, consuming the retry budget if so
+
+        Args:
+            error_class (str, optional): class of the error, see `classify_response` and `classify_exception`
+            method (str): HTTP method of the request
+            attempt (int): number of the attempt that failed, starting at 1
+
+        Returns:
+            bool: True to retry the request
+        """
+        if error_class is None or attempt >= self.max_attempts.get(error_class, 1):
+            return False
+        if error_class in AMBIGUOUS_ERRORS and method.upper() not in IDEMPOTENT_METHODS:
+            return False
+        with self._lock:
+            if self.retries >= self.budget_min + self.budget_ratio * self.requests:
+                _log.warning(f"Not retrying {error_class}, the retry budget is exhausted")
+                return False
+            self.retries += 1
+        return True
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Return the seconds to wait before the next attempt
+
+        Args:
+            attempt (int): number of the attempt that failed, starting at 1
+            retry_after (float, optional): seconds requested by the Retry-After header. Defaults to None.
+
+        Returns:
+            float: seconds to wait
+        """
+        delay = _random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+        return max(delay, retry_after or 0)
+
+    @staticmethod
+    def classify_response(response: requests.Response) -> Optional[str]:
+        """Return the class of the transient error of a response, or None if it did not fail transiently
+
+        Args:
+            response (requests.Response): response of the request
+
+        Returns:
+            str | None: key of `DEFAULT_MAX_ATTEMPTS`
+        """
+        if response.status_code in STATUS_ERRORS:
+            return STATUS_ERRORS[response.status_code]
+        if response.status_code < requests.codes.bad_request:
+            return None
+
+        try:
+            errors = response.json()
+        except ValueError:
+            return None
+        for error in errors if isinstance(errors, list) else [errors]:
+            error_code = error.get("errorCode") if isinstance(error, dict) else None
+            if error_code in ERROR_CODE_ERRORS:
+                return ERROR_CODE_ERRORS[error_code]
+        return None
+
+    @staticmethod
+    def classify_exception(exception: Exception) -> Optional[str]:
+        """Return the class of the transient error of a failed request, or None if it is not transient
+
+        Args:
+            exception (Exception): exception raised by the transport adapter
+
+        Returns:
+            str | None: key of `DEFAULT_MAX_ATTEMPTS`
+        """
+        if isinstance(exception, requests.exceptions.ConnectTimeout):
+            return "CONNECTION_FAILED"
+        if isinstance(exception, requests.exceptions.ReadTimeout):
+            return "READ_TIMEOUT"
+        if isinstance(exception, (requests.exceptions.SSLError, requests.exceptions.ProxyError)):
+            return None
+        if isinstance(exception, requests.exceptions.ConnectionError):
+            # urllib3 wraps the errors of opening a connection in a MaxRetryError
+            reason = getattr(exception.args[0], "reason", None) if exception.args else None
+            if isinstance(reason, NewConnectionError):
+                return "CONNECTION_FAILED"
+            return "CONNECTION_RESET"
+        return None
+
+    @staticmethod
+    def retry_after(response: requests.Response) -> Optional[float]:
+        """Return the seconds of the Retry-After header of a response, if it has one in seconds"""
+        try:
+            return float(response.headers["Retry-After"])
+        except (KeyError, ValueError):
+            return None
+
+    def stats(self) -> dict:
+        """Return the number of requests and retries
+
+        Returns:
+            dict: {"requests": int, "retries": int}
+        """
+        with self._lock:
+            return {"requests": self.requests, "retries": self.retries}
@@ -1,24 +1,187 @@
 # Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
 
+import csv
+import functools
+import io
 import json
 import logging
+import re
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Any, BinaryIO, Callable, Optional, Union
+from urllib.parse import urlparse
 
 import requests
-from simple_salesforce import Salesforce, format_soql
+
+from seed_salesforce.cache import RecordCache
+from seed_salesforce.composite import CompositeRequest, reference
+from seed_salesforce.custom_fields import LONG_TEXT_AREA_MIN_LENGTH, CustomFieldSpec, custom_fields_package
+from seed_salesforce.diff import changed_fields
+from seed_salesforce.exceptions import (
+    BulkJobError,
+    DuplicateRecordError,
+    MappingError,
+    RecordNotFoundError,
+    RecordWriteError,
+    SalesforceClientError,
+)
+from seed_salesforce.governor import ApiGovernor
+from seed_salesforce.index import INDEXED_FIELDS, RecordIndex, normalize_key
+from seed_salesforce.mappings import DEFAULT_MAPPING_BATCH_SIZE, MappingEngine
+from seed_salesforce.metrics import ClientMetrics, instrumented
+from seed_salesforce.results import RecordResult
+from seed_salesforce.retry import RetryPolicy
+from seed_salesforce.schema import JSON_TYPES, SchemaRegistry, serialize_record
+from seed_salesforce.session_cache import SessionCache, session_cache_key
+from seed_salesforce.sync_state import SYNC_OBJECTS, ChangeEvent, SyncState, parse_datetime
+from seed_salesforce.transport import DEFAULT_POOL_SIZE, SalesforceHTTPAdapter
+from seed_salesforce.utils import (
+    bulk_results_in_order,
+    chunked,
+    csv_to_parquet,
+    flatten_record,
+    format_soql,
+    records_to_csv_batches,
+    split_call_args,
+)
+from seed_salesforce.write_behind import WriteBehindQueue
+
+# simple_salesforce imports zeep and its dependencies, it is imported when the client first connects
+if TYPE_CHECKING:
+    from simple_salesforce import Salesforce
+    from simple_salesforce.metadata import SfdcMetadataApi
 
 _log = logging.getLogger(__name__)
 
+# Bulk API 2.0 accepts at most 150 MB of base64 encoded data per job upload, stay well below it
+BULK_MAX_UPLOAD_BYTES = 100 * 1024 * 1024
+DEFAULT_BULK_BATCH_SIZE = 10000
+BULK_JOB_FINISHED_STATES = ("JobComplete", "Failed", "Aborted")
+# rows per downloaded chunk of Bulk API 2.0 query results, each chunk is streamed to disk
+DEFAULT_BULK_QUERY_CHUNK_SIZE = 50000
+# compound and binary fields can't be queried with Bulk API 2.0
+BULK_QUERY_UNSUPPORTED_FIELD_TYPES = ("address", "location", "base64")
+BULK_INGEST_OPERATIONS = ("insert", "update", "upsert", "delete", "hardDelete")
+# sObject Collections limits: 200 records per create/update/delete, 2000 ids per retrieve
+SOBJECT_COLLECTION_SIZE = 200
+SOBJECT_COLLECTION_RETRIEVE_SIZE = 2000
+# final states of Metadata API deployments
+METADATA_DEPLOY_FINISHED_STATES = ("Succeeded", "SucceededPartial", "Failed", "Canceled")
+# SOQL statements are sent in the query string of a GET, keep them well below the URI length limit
+MAX_SOQL_LENGTH = 8000
+
+
+# simple_salesforce has no public API to log in again when a session expires, or to drop the Metadata API client of
+# an expired session. These functions are the only uses of its private attributes, simple-salesforce is pinned to
+# the 1.12 releases that have them and tests/test_session_cache.py checks them.
+
+
+def _set_session_refresher(connection: "Salesforce", login: Callable[[], tuple]) -> None:
+    """Make the connection call `login` for a new session when a call fails with INVALID_SESSION_ID
+
+    Args:
+        connection (Salesforce): connection
+        login (Callable): returns (session id, instance host name), like `simple_salesforce.SalesforceLogin`
+    """
+    connection._salesforce_login_partial = login
+
+
+def _refresh_connection_session(connection: "Salesforce") -> bool:
+    """Log the connection in again, see `_set_session_refresher`
+
+    Args:
+        connection (Salesforce): connection
+
+    Returns:
+        bool: False when the connection can't log in again, e.g., when it was created from a session id
+    """
+    if connection._salesforce_login_partial is None:
+        return False
+    connection._refresh_session()
+    return True
+
+
+def _reset_metadata_api(connection: "Salesforce") -> None:
+    """Drop the Metadata API client of the connection, which keeps the session it was created with
+
+    Args:
+        connection (Salesforce): connection
+    """
+    connection._mdapi = None
+
+
+@dataclass
+class ClientOptions:
+    """Optional features of a `SalesforceClient`, which also takes them as keyword arguments
+
+        options = ClientOptions(pool_size=20, record_cache=MemoryRecordCache())
+        sf = SalesforceClient(connection_params, options=options)
+        sf = SalesforceClient(connection_params, pool_size=20, record_cache=MemoryRecordCache())
+
+    Args:
+        pool_size (int, optional): Number of HTTP connections to keep open to Salesforce. Defaults to 10.
+        record_cache (RecordCache, optional): Cache for the records returned by the `get_*_by_id` methods,
+            e.g., `MemoryRecordCache()`. Records written by this client are removed from it. Defaults to None.
+        record_index (RecordIndex, optional): Index of name/email/custom ID to record Id that the `find_*`
+            methods use to skip their lookup query. Fill it with `warm_index`. Defaults to None.
+        skip_unchanged_writes (bool, optional): Compare the values passed to `update_benchmark`, `update_property`
+            and `update_contact` with the current record (from the record cache when enabled, see
+            `prefetch_records`) and only send the changed fields, skipping the update when nothing changed.
+            Skipped updates are counted in `skipped_writes`. Defaults to False.
+        governor (ApiGovernor, optional): Throttle of all the calls, based on the remaining daily API requests.
+            It also switches `create_records` and `update_records` to Bulk API 2.0 when the quota runs low.
+            Its usage metrics are available from `governor.metrics()`. Defaults to None.
+        retry_policy (RetryPolicy, optional): Retries of the calls that fail with a transient error, e.g.,
+            UNABLE_TO_LOCK_ROW, 503s or connection resets. Defaults to `RetryPolicy()`.
+        session_cache (SessionCache, optional): Store of the sessions shared by the clients of all the processes,
+            e.g., `FileSessionCache("~/.seed-salesforce-sessions.json")`. A client reuses the cached session
+            of the same user instead of logging in, and logs in again (updating the cache) when the session
+            expires. Defaults to None.
+        schema_registry (SchemaRegistry, optional): Cache of the object descriptions used to validate fields
+            and to serialize the values of writes, e.g., `SchemaRegistry(cache_dir=".schema-cache")` to share
+            them between processes. Defaults to an in-memory `SchemaRegistry()`.
+        metrics (ClientMetrics, optional): Recorder of the latency, HTTP requests, retries, API requests and
+            bytes sent and received of each call of the public methods, by method and object, e.g.,
+            `ClientMetrics(sinks=[LoggingSink()])`. Defaults to None.
+        mappings (MappingEngine, optional): Loader of the SEED to Salesforce mapping templates used by
+            `render_mappings` and `bulk_upsert_mapped`, e.g., `MappingEngine("mappings")`. Defaults to a
+            `MappingEngine()` without a template directory.
+        write_behind (WriteBehindQueue, optional): Buffer of the updates of `update_benchmark`, `update_property`,
+            `update_contact` and `update_account_by_id`, which then queue the update and return a Future of
+            its RecordResult. The updates of the same record are coalesced into one write, made in batches
+            with the sObject Collections API or Bulk API 2.0, e.g., `WriteBehindQueue(max_delay=5)`.
+            Defaults to None, to write each update when it is made.
+    """
+
+    pool_size: int = DEFAULT_POOL_SIZE
+    record_cache: Optional[RecordCache] = None
+    record_index: Optional[RecordIndex] = None
+    skip_unchanged_writes: bool = False
+    governor: Optional[ApiGovernor] = None
+    retry_policy: Optional[RetryPolicy] = None
+    session_cache: Optional[SessionCache] = None
+    schema_registry: Optional[SchemaRegistry] = None
+    metrics: Optional[ClientMetrics] = None
+    mappings: Optional[MappingEngine] = None
+    write_behind: Optional[WriteBehindQueue] = None
+
 
 class SalesforceClient:
     def __init__(
         self,
         connection_params: Optional[dict] = None,
         connection_config_filepath: Optional[Path] = None,
+        options: Optional[ClientOptions] = None,
+        **option_kwargs,
     ) -> None:
         """Connection to salesforce. Uses the `simple_salesforce` library to communicate with Salesforce.
 
+        The client logs in on its first call to Salesforce (or on `connect`), creating it has no side effect.
+
         Args:
             connection_params (dict, optional): Parameters to connect to Salesforce. Defaults to None. If using, then must contain:
                 {
@@ -27,12 +190,26 @@ class SalesforceClient:
                     "password": "alongpassword",
                     "security_token": "access1key2with3numbers"
                 }
+                or, for the OAuth 2.0 JWT bearer flow of a connected app, "username", "consumer_key" and
+                "privatekey_file" (or "privatekey") in place of the password and security token.
             connection_config_filepath (Path, optional): Path to the file to read the parameters from. Defaults to None.
+            options (ClientOptions, optional): Optional features of the client, e.g., its record cache or
+                governor. Defaults to `ClientOptions()`.
+            **option_kwargs: fields of `ClientOptions` to set, overriding those of `options`, e.g., pool_size=20
 
         Raises:
-            Exception: File not found
+            SalesforceClientError: File not found
         """
+        options = replace(options or ClientOptions(), **option_kwargs)
         self.session = requests.Session()
+        self.metrics = options.metrics
+        if self.metrics is not None:
+            self.session.hooks["response"].append(self.metrics.record_response)
+        self.governor = options.governor
+        self.retry_policy = options.retry_policy or RetryPolicy()
+        if self.governor is not None and self.governor.limits_poller is None:
+            self.governor.limits_poller = self._poll_api_limits
+        self.configure_connection_pool(options.pool_size)
 
         connect_info = {}
         if connection_params:
@@ -40,16 +217,29 @@ class SalesforceClient:
         elif connection_config_filepath:
             connect_info = SalesforceClient.read_connection_config_file(connection_config_filepath)
         else:
-            raise Exception(
+            raise SalesforceClientError(
                 "Must pass either the connection params as a dict, or a file with the connection credentials.",
             )
 
-        self.connection = Salesforce(
-            **connect_info,
-            session=self.session,
-        )
+        self.session_cache = options.session_cache
+        self._connect_info = connect_info
+        self._connection: Optional[Salesforce] = None
+        self._connection_lock = threading.Lock()
+
+        self.schema_registry = options.schema_registry or SchemaRegistry()
+        if self.schema_registry.fetcher is None:
+            self.schema_registry.fetcher = self._fetch_schema
 
-        self.mdapi = self.connection.mdapi
+        self.record_cache = options.record_cache
+        self.record_index = options.record_index
+        self.mappings = options.mappings or MappingEngine()
+        self.write_behind = options.write_behind
+        if self.write_behind is not None and self.write_behind.writer is None:
+            self.write_behind.writer = self._write_updates
+
+        self.skip_unchanged_writes = options.skip_unchanged_writes
+        self.skipped_writes = 0
+        self._skipped_writes_lock = threading.Lock()
 
     @classmethod
     def read_connection_config_file(cls, filepath: Path) -> dict:
@@ -67,51 +257,355 @@ class SalesforceClient:
             filepath (str): path to the connection config file
         """
         if not filepath.exists():
-            raise Exception(f"Cannot find connection config file: {filepath!s}")
+            raise SalesforceClientError(f"Cannot find connection config file: {filepath!s}")
 
         with open(filepath) as file:
             connection_params = json.load(file)
         return connection_params
 
-    def render_mappings(self, template_name: str, context: dict) -> dict:
+    @property
+    def connection(self) -> "Salesforce":
+        """Connection to Salesforce, logging in on first use"""
+        if self._connection is None:
+            with self._connection_lock:
+                if self._connection is None:
+                    self._connection = self._connect(self._connect_info)
+        return self._connection
+
+    @property
+    def mdapi(self) -> "SfdcMetadataApi":
+        """Metadata API of the connection, created on first use with the current session"""
+        return self.connection.mdapi
+
+    def connect(self) -> "Salesforce":
+        """Log in to Salesforce now rather than on the first call, e.g., to check the credentials
+
+        Returns:
+            Salesforce: connection
+        """
+        return self.connection
+
+    def _connect(self, connect_info: dict) -> "Salesforce":
+        """Log in to Salesforce, or reuse the cached session of the same user if there is a session cache
+
+        Args:
+            connect_info (dict): parameters to pass to `simple_salesforce.Salesforce`
+
+        Returns:
+            Salesforce: connection
+        """
+        from simple_salesforce import Salesforce
+
+        if self.session_cache is None:
+            return Salesforce(**connect_info, session=self.session)
+
+        key = session_cache_key(connect_info)
+        cached = self.session_cache.get(key)
+        if cached is None:
+            with self.session_cache.lock():
+                # another process may have logged in while this one waited for the lock
+                cached = self.session_cache.get(key) or self._login(connect_info, key)
+
+        connection = Salesforce(
+            session_id=cached["session_id"],
+            instance_url=cached["instance_url"],
+            session=self.session,
+            **{name: connect_info[name] for name in ("version", "domain") if name in connect_info},
+        )
+        _set_session_refresher(connection, functools.partial(self._refresh_session, connect_info, key))
+        return connection
+
+    def _login(self, connect_info: dict, key: str) -> dict:
+        """Log in to Salesforce and cache the new session
+
+        Returns:
+            dict: {"session_id": ..., "instance_url": ...}
+        """
+        from simple_salesforce import Salesforce
+
+        connection = Salesforce(**connect_info, session=self.session)
+        session = {"session_id": connection.session_id, "instance_url": f"https://{connection.sf_instance}"}
+        self.session_cache.set(key, **session)
+        _log.info(f"Logged in to {session['instance_url']} and cached the session")
+        return session
+
+    def _refresh_session(self, connect_info: dict, key: str) -> tuple:
+        """Replace the expired session of the connection, with the session cached by another process if it already
+        logged in again, otherwise by logging in
+
+        Returns:
+            tuple: (session id, instance host name), as returned by `simple_salesforce.SalesforceLogin`
+        """
+        expired_session_id = self.connection.session_id
+        with self.session_cache.lock():
+            cached = self.session_cache.get(key)
+            if cached is None or cached["session_id"] == expired_session_id:
+                cached = self._login(connect_info, key)
+        _reset_metadata_api(self.connection)
+        return cached["session_id"], urlparse(cached["instance_url"]).netloc
+
+    def configure_connection_pool(self, pool_size: int) -> None:
+        """Mount a transport adapter on the session that keeps `pool_size` connections open.
+
+        Args:
+            pool_size (int): number of connections, should be at least the number of threads making calls
+        """
+        self.pool_size = pool_size
+        self.session.mount(
+            "https://",
+            SalesforceHTTPAdapter(pool_size=pool_size, governor=self.governor, retry_policy=self.retry_policy),
+        )
+
+    @instrumented()
+    def get_api_limits(self) -> dict:
+        """Return the limits of the org, e.g., the remaining daily API requests, and update the governor with them
+
+        Returns:
+            dict: {"DailyApiRequests": {"Max": 15000, "Remaining": 14998}, ...}
+        """
+        limits = self.connection.limits()
+        if self.governor is not None:
+            self.governor.update_from_limits(limits)
+        return limits
+
+    def _poll_api_limits(self) -> bool:
+        """Poller of the governor, see `get_api_limits`. The poll never logs in: the login request goes through the
+        governor too, with the connection lock held.
+
+        Returns:
+            bool: False when the client is not connected yet and the limits were not polled
+        """
+        if self._connection is None:
+            return False
+        self.get_api_limits()
+        return True
+
+    def map_concurrent(
+        self,
+        method: Union[str, Callable],
+        items: Iterable[Any],
+        max_workers: int = DEFAULT_POOL_SIZE,
+        return_exceptions: bool = False,
+    ) -> list:
+        """Call a client method once per item on a pool of threads and return the results in the order of the items.
+
+            sf.map_concurrent("get_property_by_id", property_ids, max_workers=16)
+            sf.map_concurrent(sf.update_benchmark, [{"salesforce_benchmark_id": "123", "ENERGY_STAR_Score__c": 80}])
+
+        The client has no asyncio interface, from a coroutine run the whole batch in a thread:
+
+            properties = await asyncio.to_thread(sf.map_concurrent, "get_property_by_id", property_ids)
+
+        Args:
+            method (str | Callable): name of the client method to call, or the method itself
+            items (Iterable[Any]): arguments of each call. A dict is passed as keyword arguments,
+                a tuple as positional arguments and anything else as the single argument.
+            max_workers (int, optional): number of threads, the connection pool is grown to match. Defaults to 10.
+            return_exceptions (bool, optional): return exceptions in place of the results instead of
+                raising the first one. Defaults to False.
+
+        Returns:
+            list: result (or exception) of each call
+        """
+        func = getattr(self, method) if isinstance(method, str) else method
+        if max_workers > self.pool_size:
+            self.configure_connection_pool(max_workers)
+
+        def call(item):
+            args, kwargs = split_call_args(item)
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if return_exceptions:
+                    return e
+                raise
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="seed-salesforce") as executor:
+            return list(executor.map(call, items))
+
+    def render_mappings(self, template_name: str, context: Optional[dict] = None) -> dict:
         """Render the mappings template.
 
         Args:
-            template_name (str): name of the template file to render
-            context (dict): context to render the template with
+            template_name (str): name of the template file to render, in the template directory of `mappings`
+            context (dict, optional): context to render Jinja templates with. Defaults to None.
+
+        Raises:
+            MappingError: Template not found, or not valid JSON once rendered
 
         Returns:
             dict: rendered mappings in a dictionary format, meaning that the
             rendered file is loaded into memory and returned as a dictionary.
         """
-        rendered = self._template_env.get_template(template_name).render(context)
-        return json.loads(rendered)
+        return self.mappings.render(template_name, context)
+
+    @instrumented()
+    def list_objects(self) -> dict:
+        """List all objects in salesforce db, see `list_object_names` for the names of the objects only, served from
+        the cached global describe
 
-    def list_objects(self) -> list:
-        """List all objects in salesforce db
         Returns:
-            list of objects
+            dict: query result with a record per object type
         """
-
-        objects = self.connection.query(
+        return self.connection.query(
             "SELECT SObjectType FROM ObjectPermissions GROUP BY SObjectType ORDER BY SObjectType ASC",
         )
 
-        # temp: get all fields for Property
-        # props = self.connection.query("SELECT FIELDS(ALL) FROM Property__c LIMIT 1")
+    @instrumented()
+    def list_object_names(self) -> list:
+        """List the names of all the objects, from the cached global describe of the schema registry
+
+        Returns:
+            list[str]: names of the objects, sorted
+        """
+        return self.schema_registry.object_names()
+
+    @instrumented()
+    def iter_query(self, soql: str, batch_size: Optional[int] = None, include_deleted: bool = False) -> Iterator[dict]:
+        """Run a SOQL query and lazily yield every record, following `nextRecordsUrl` page by page.
+
+        Only one page of results is held in memory at a time, so this can stream result sets of
+        any size. The records are flattened plain dicts, see `flatten_record`.
 
-        # temp: get all fields for Benchmark
-        # benchmarks = self.connection.query("SELECT FIELDS(ALL) FROM Benchmark__c LIMIT 1")
-        # print(f"\n\n BENCHMARK FIELDS ARE: {benchmarks}")
+            for benchmark in sf.iter_query("SELECT Id, ENERGY_STAR_Score__c FROM Benchmark__c", batch_size=2000):
+                ...
 
-        self.connection.query(
-            "SELECT EntityDefinition.QualifiedApiName, QualifiedApiName, DataType FROM FieldDefinition WHERE EntityDefinition.QualifiedApiName = 'oei__Benchmark__c'",
+        Args:
+            soql (str): SOQL query
+            batch_size (int, optional): requested number of records per page, between 200 and 2000.
+                Salesforce may return fewer. Defaults to Salesforce's default of 2000.
+            include_deleted (bool, optional): include deleted and archived records (queryAll). Defaults to False.
+
+        Returns:
+            Iterator[dict]: flattened records
+        """
+        headers = {"Sforce-Query-Options": f"batchSize={batch_size}"} if batch_size else {}
+        result = self.connection.query(soql, include_deleted=include_deleted, headers=headers)
+        while True:
+            for record in result["records"]:
+                yield flatten_record(record)
+            if result["done"]:
+                return
+            result = self.connection.query_more(result["nextRecordsUrl"], identifier_is_url=True, headers=headers)
+
+    @instrumented()
+    def iter_records(
+        self,
+        object_name: str,
+        fields: Optional[list] = None,
+        where: Optional[str] = None,
+        batch_size: Optional[int] = None,
+    ) -> Iterator[dict]:
+        """Lazily yield the records of an object, see `iter_query` and `export_object` for large volumes
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Benchmark__c
+            fields (list, optional): fields to return. Defaults to all the fields of the object.
+            where (str, optional): SOQL condition to filter the records on. Defaults to None.
+            batch_size (int, optional): requested number of records per page. Defaults to 2000.
+
+        Returns:
+            Iterator[dict]: flattened records
+        """
+        soql = format_soql(
+            "SELECT {:literal} FROM {:literal}",
+            self._select_list(object_name, fields or self._get_field_names(object_name)),
+            object_name,
         )
-        return objects
+        if where:
+            soql = f"{soql} WHERE {where}"
+        yield from self.iter_query(soql, batch_size=batch_size)
+
+    @instrumented()
+    def count_records(self, object_name: str, where: Optional[str] = None) -> int:
+        """Count the records of an object
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Benchmark__c
+            where (str, optional): SOQL condition to filter the records on. Defaults to None.
+
+        Returns:
+            int: number of matching records
+        """
+        soql = format_soql("SELECT COUNT() FROM {:literal}", object_name)
+        if where:
+            soql = f"{soql} WHERE {where}"
+        return self.connection.query(soql)["totalSize"]
 
-    def get_first_benchmark(self) -> dict:
+    @instrumented()
+    def iter_changes(
+        self,
+        sync_state: SyncState,
+        object_names: Iterable[str] = SYNC_OBJECTS,
+        fields: Optional[dict] = None,
+        batch_size: Optional[int] = None,
+    ) -> Iterator[ChangeEvent]:
+        """Yield the records created, updated or deleted since the last sync, object by object.
+
+        Only the records whose SystemModstamp is after the high-water mark of the object in
+        `sync_state` are queried (all of them on the first sync), including the deleted records
+        still in the recycle bin. The mark of an object is saved once all its events have been
+        consumed, so an interrupted sync resumes from the last completed object. The mark is
+        stored to the second, records changed within the same second may be yielded again.
+
+            state = JSONSyncState("sync-state.json")
+            for event in sf.iter_changes(state, ["Property__c", "Benchmark__c"]):
+                ...
+
+        Args:
+            sync_state (SyncState): store of the high-water marks
+            object_names (Iterable[str], optional): objects to sync. Defaults to Property__c, Benchmark__c,
+                Account and Contact.
+            fields (dict, optional): additional fields to query by object name. The Id, SystemModstamp, IsDeleted
+                and the lookup field of `INDEXED_FIELDS` are always queried, and are the only fields of the objects
+                without an entry: all the fields of an object with many custom fields could exceed the URI length
+                limit of the query. Defaults to None.
+            batch_size (int, optional): number of records per page, see `iter_query`. Defaults to None.
+
+        Returns:
+            Iterator[ChangeEvent]: changes ordered by SystemModstamp within each object
+        """
+        fields = fields or {}
+        for object_name in object_names:
+            required = ["SystemModstamp", "IsDeleted"]
+            if object_name in INDEXED_FIELDS:
+                required.append(INDEXED_FIELDS[object_name])
+            select = self._select_list(object_name, fields.get(object_name), *required)
+            soql = format_soql("SELECT {:literal} FROM {:literal}", select, object_name)
+            mark = sync_state.get(object_name)
+            if mark is not None:
+                soql += format_soql(" WHERE SystemModstamp > {}", mark)
+            soql += " ORDER BY SystemModstamp ASC"
+
+            latest = None
+            for record in self.iter_query(soql, batch_size=batch_size, include_deleted=True):
+                event = ChangeEvent(
+                    object_name=object_name,
+                    record_id=record["Id"],
+                    system_modstamp=parse_datetime(record["SystemModstamp"]),
+                    deleted=record["IsDeleted"],
+                    record=record,
+                )
+                self._invalidate_record(object_name, event.record_id)
+                if self.record_index is not None:
+                    self.record_index.discard_id(object_name, event.record_id)
+                    if not event.deleted and object_name in INDEXED_FIELDS:
+                        field_name = INDEXED_FIELDS[object_name]
+                        self._index_record(object_name, field_name, record.get(field_name), event.record_id)
+                yield event
+                latest = event.system_modstamp
+
+            if latest is not None:
+                sync_state.set(object_name, latest)
+            _log.debug(f"Synced {object_name} changes up to {sync_state.get(object_name)}")
+
+    @instrumented("Benchmark__c")
+    def get_first_benchmark(self, fields: Optional[list] = None) -> dict:
         """Get a benchmark (for testing mainly)
 
+        Args:
+            fields (list, optional): fields to return, validated against the object description. Defaults to all fields.
+
         Returns:
             dict:  OrderedDict([('attributes',
             OrderedDict([('type', 'Benchmark__c'),
@@ -119,23 +613,27 @@ class SalesforceClient:
             ('Id', 'a0156000004bOpHAAU'),
             ...
         """
-        response = self.connection.query("Select FIELDS(ALL) from Benchmark__c limit 1")
+        select = self._select_list("Benchmark__c", fields) if fields else "FIELDS(ALL)"
+        response = self.connection.query(format_soql("Select {:literal} from Benchmark__c limit 1", select))
         if response:
             if response["totalSize"] > 0:
                 return response["records"][0]
             else:
                 # no records?
-                raise Exception("There are no Benchmark records to return")
+                raise RecordNotFoundError("There are no Benchmark records to return")
         else:
-            raise Exception("Failed to return a Benchmark")
+            raise SalesforceClientError("Failed to return a Benchmark")
 
-    def get_benchmark_by_custom_id(self, salesforce_benchmark_id: str) -> dict:
+    @instrumented("Benchmark__c")
+    def get_benchmark_by_custom_id(self, salesforce_benchmark_id: str, fields: Optional[list] = None) -> dict:
         """Return the benchmark by the Salesforce Benchmark ID.
 
         Args:
             salesforce_benchmark_id (str): Salesforce Benchmark ID of the property to return
             Note: this is not necessarily the Benchmark ID (it's a separate field)
             # TODO: make this configurable?
+            fields (list, optional): fields to return, which are selected by the lookup query itself
+                so the record is not fetched a second time. Defaults to all fields.
 
         Returns:
             dict:  OrderedDict([('attributes',
@@ -144,29 +642,41 @@ class SalesforceClient:
             ('Id', 'a0156000004bOpHAAU'),
             ...
         """
+        rec = self._get_indexed_record("Benchmark__c", "Salesforce_Benchmark_ID__c", salesforce_benchmark_id, fields)
+        if rec:
+            return rec
 
         benchmark_exist = self.connection.query(
-            format_soql("Select Id from Benchmark__c where Salesforce_Benchmark_ID__c = {}", salesforce_benchmark_id),
+            format_soql(
+                "Select {:literal} from Benchmark__c where Salesforce_Benchmark_ID__c = {}",
+                self._select_list("Benchmark__c", fields),
+                salesforce_benchmark_id,
+            ),
         )
         if len(benchmark_exist["records"]) == 1:
-            # if there is a single record, then it exist, but
-            # we need to get the entire record for the request
-            rec = self.get_benchmark_by_id(benchmark_exist["records"][0]["Id"])
+            rec = benchmark_exist["records"][0]
+            self._index_record("Benchmark__c", "Salesforce_Benchmark_ID__c", salesforce_benchmark_id, rec["Id"])
+            if not fields:
+                # if there is a single record, then it exist, but
+                # we need to get the entire record for the request
+                rec = self.get_benchmark_by_id(rec["Id"])
             return rec
         elif len(benchmark_exist["records"]) > 1:
             # there are multiple properties with the same name, raise error
-            raise Exception(
+            raise DuplicateRecordError(
                 f"Failed to return Benchmark {salesforce_benchmark_id}...multiple benchmarks with that name found",
             )
         else:
             # there is no property, return empty dict
             return {}
 
-    def get_benchmark_by_id(self, benchmark_id: str) -> dict:
+    @instrumented("Benchmark__c")
+    def get_benchmark_by_id(self, benchmark_id: str, fields: Optional[list] = None) -> dict:
         """Return the benchmark by the salesforce benchmark ID (not custom field).
 
         Args:
             benchmark_id (str): ID of the benchmark to return
+            fields (list, optional): fields to return, validated against the object description. Defaults to all fields.
 
         Returns:
             dict:  OrderedDict([('attributes',
@@ -175,12 +685,15 @@ class SalesforceClient:
             ('Id', 'a0156000004bOpHAAU'),
             ...
         """
+        from simple_salesforce.exceptions import SalesforceResourceNotFound
+
         try:
-            return self.connection.Benchmark__c.get(benchmark_id)
-        except BaseException:
-            raise Exception("Error retrieving benchmark by ID")
+            return self._get_record("Benchmark__c", benchmark_id, fields)
+        except SalesforceResourceNotFound as e:
+            raise RecordNotFoundError(f"Benchmark {benchmark_id} not found") from e
 
-    def update_benchmark(self, salesforce_benchmark_id, **kwargs) -> dict:
+    @instrumented("Benchmark__c")
+    def update_benchmark(self, salesforce_benchmark_id, **kwargs) -> Union[dict, Future]:
         """Update an existing benchmark
 
         Args:
@@ -188,17 +701,23 @@ class SalesforceClient:
             (we are not using the property's ID)
 
         Returns:
-            dict: OrderedDict([...])
+            dict: OrderedDict([...]), or a Future of the RecordResult when the client has a `write_behind` queue
         """
+        if self.write_behind is not None:
+            return self._submit_update("Benchmark__c", salesforce_benchmark_id, kwargs)
+
         # TODO: try it with the customExtIdField__c/11999 syntax here
         # otherwise: get the Id from salesforce_benchmark_id and then update
 
+        kwargs = self._changed_fields("Benchmark__c", salesforce_benchmark_id, kwargs)
+        if not kwargs:
+            return requests.codes.no_content
+
         updated_record = self.connection.Benchmark__c.update(
             salesforce_benchmark_id,
-            {
-                **kwargs,
-            },
+            self._serialize_record("Benchmark__c", kwargs),
         )
+        self._invalidate_record("Benchmark__c", salesforce_benchmark_id)
 
         if updated_record == requests.codes.no_content:
             # TODO: we are making an assumption here that salesforce_benchmark_id is also the Benchmark's ID
@@ -208,39 +727,623 @@ class SalesforceClient:
             # return benchmark
             return updated_record
         else:
-            raise Exception(
+            raise RecordWriteError(
                 f"Failed to update Benchmark {salesforce_benchmark_id} with error: {updated_record['errors']}",
+                updated_record["errors"],
+            )
+
+    @instrumented()
+    def bulk_upsert(
+        self,
+        object_name: str,
+        records: Iterable[dict],
+        external_id_field: str = "Id",
+        batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+        timeout: float = 3600,
+    ) -> list:
+        """Upsert many records with Bulk API 2.0 ingest jobs, keyed on an external ID field.
+
+        The records are streamed into CSV documents of `batch_size` rows, each one is
+        uploaded as its own ingest job. All the jobs are submitted before waiting on
+        any of them so that Salesforce processes them in parallel. The results of the
+        jobs, which list the successful records first, are returned in the order of the records.
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Benchmark__c
+            records (Iterable[dict]): records to upsert, each must contain the `external_id_field`
+            external_id_field (str, optional): field to match existing records on. Defaults to "Id".
+            batch_size (int, optional): number of records per ingest job. Defaults to 10000.
+            timeout (float, optional): seconds to wait for each job to finish. Defaults to 3600.
+
+        Raises:
+            BulkJobError: Job failed or timed out
+
+        Returns:
+            list[RecordResult]: one result per submitted record, in the order of the records
+        """
+        results = self._bulk_ingest(
+            object_name,
+            records,
+            "upsert",
+            external_id_field,
+            batch_size=batch_size,
+            timeout=timeout,
+        )
+        if self.record_index is not None and INDEXED_FIELDS.get(object_name) == external_id_field:
+            for result in results:
+                if result.record_id:
+                    self._index_record(
+                        object_name,
+                        external_id_field,
+                        result.record.get(external_id_field),
+                        result.record_id,
+                    )
+        return results
+
+    @instrumented()
+    def bulk_ingest(
+        self,
+        object_name: str,
+        records: Iterable[dict],
+        operation: str,
+        external_id_field: Optional[str] = None,
+        **kwargs,
+    ) -> list:
+        """Insert, update, upsert or delete many records with Bulk API 2.0 ingest jobs, see `bulk_upsert`.
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Contact
+            records (Iterable[dict]): records to write, those to update or delete must contain the "Id"
+            operation (str): insert, update, upsert, delete or hardDelete
+            external_id_field (str, optional): field to match existing records on, for upserts. Defaults to None.
+            **kwargs: `batch_size` and `timeout` of the ingest jobs, see `bulk_upsert`
+
+        Raises:
+            BulkJobError: Job failed or timed out
+
+        Returns:
+            list[RecordResult]: one result per submitted record, in the order of the records
+        """
+        if operation not in BULK_INGEST_OPERATIONS:
+            raise ValueError(f"Unsupported Bulk API 2.0 operation: {operation}")
+        if operation == "upsert":
+            return self.bulk_upsert(object_name, records, external_id_field or "Id", **kwargs)
+
+        results = self._bulk_ingest(object_name, records, operation, external_id_field, **kwargs)
+        if operation in ("delete", "hardDelete") and self.record_index is not None:
+            for result in results:
+                if result.success:
+                    self.record_index.discard_id(object_name, result.record_id or result.record.get("Id"))
+        return results
+
+    def _bulk_ingest(
+        self,
+        object_name: str,
+        records: Iterable[dict],
+        operation: str,
+        external_id_field: Optional[str] = None,
+        batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+        **kwargs,
+    ) -> list:
+        """Write records with Bulk API 2.0 ingest jobs of `batch_size` records, see `bulk_upsert`
+
+        Args:
+            **kwargs: additional parameters to pass to `collect_bulk_job`, e.g., timeout
+
+        Returns:
+            list[RecordResult]: one result per submitted record, in the order of the records
+        """
+        batches = []
+        for chunk in chunked(records, batch_size):
+            # a chunk larger than BULK_MAX_UPLOAD_BYTES is split across several jobs
+            job_ids = []
+            for data in records_to_csv_batches(chunk, batch_size, BULK_MAX_UPLOAD_BYTES):
+                job = self.create_bulk_ingest_job(object_name, operation, external_id_field=external_id_field)
+                self.upload_bulk_job_data(job["id"], data)
+                self.close_bulk_job(job["id"])
+                job_ids.append(job["id"])
+            batches.append((chunk, job_ids))
+
+        results = []
+        for chunk, job_ids in batches:
+            chunk_results = []
+            for job_id in job_ids:
+                chunk_results.extend(self.collect_bulk_job(object_name, job_id, **kwargs))
+            results.extend(bulk_results_in_order(chunk, chunk_results))
+        return results
+
+    @instrumented()
+    def collect_bulk_job(self, object_name: str, job_id: str, timeout: float = 3600) -> list:
+        """Wait for an ingest job to complete and return its per-record results, invalidating the
+        cached records it wrote. The job may have been submitted by another process.
+
+        Args:
+            object_name (str): Name of the salesforce object of the job, e.g., Benchmark__c
+            job_id (str): id of the ingest job
+            timeout (float, optional): seconds to wait for the job to finish. Defaults to 3600.
+
+        Raises:
+            BulkJobError: Job failed, was aborted, or did not finish within the timeout
+
+        Returns:
+            list[RecordResult]: one result per submitted record
+        """
+        self.wait_for_bulk_job(job_id, timeout=timeout)
+        results = self.get_bulk_job_results(job_id)
+        for result in results:
+            if result.record_id:
+                self._invalidate_record(object_name, result.record_id)
+        return results
+
+    @instrumented("Benchmark__c")
+    def bulk_upsert_benchmarks(
+        self,
+        records: Iterable[dict],
+        external_id_field: str = "Salesforce_Benchmark_ID__c",
+        **kwargs,
+    ) -> list:
+        """Upsert many Benchmark__c records with Bulk API 2.0, keyed on the Salesforce Benchmark ID
+
+        Args:
+            records (Iterable[dict]): benchmark records, each containing the `external_id_field`
+            external_id_field (str, optional): Defaults to "Salesforce_Benchmark_ID__c".
+            **kwargs: additional parameters to pass to `bulk_upsert`
+
+        Returns:
+            list[RecordResult]: one result per submitted record
+        """
+        return self.bulk_upsert("Benchmark__c", records, external_id_field=external_id_field, **kwargs)
+
+    @instrumented("Property__c")
+    def bulk_upsert_properties(self, records: Iterable[dict], external_id_field: str = "Id", **kwargs) -> list:
+        """Upsert many Property__c records with Bulk API 2.0
+
+        Args:
+            records (Iterable[dict]): property records, each containing the `external_id_field`
+            external_id_field (str, optional): Defaults to "Id".
+            **kwargs: additional parameters to pass to `bulk_upsert`
+
+        Returns:
+            list[RecordResult]: one result per submitted record
+        """
+        return self.bulk_upsert("Property__c", records, external_id_field=external_id_field, **kwargs)
+
+    @instrumented()
+    def bulk_upsert_mapped(
+        self,
+        template_name: str,
+        rows: Iterable[dict],
+        context: Optional[dict] = None,
+        mapping_batch_size: int = DEFAULT_MAPPING_BATCH_SIZE,
+        **kwargs,
+    ) -> list:
+        """Map SEED rows with a mapping template and upsert the payloads with Bulk API 2.0. The rows are
+        mapped in batches while they are streamed into the ingest jobs.
+
+        The template names the "object" to upsert and its "external_id_field" (Id when it has none), see
+        `seed_salesforce.mappings`.
+
+        Args:
+            template_name (str): name of the mapping template, in the template directory of `mappings`
+            rows (Iterable[dict]): SEED rows, e.g., property views
+            context (dict, optional): context to render Jinja templates with. Defaults to None.
+            mapping_batch_size (int, optional): rows mapped at a time. Defaults to 10000.
+            **kwargs: additional parameters to pass to `bulk_upsert`
+
+        Raises:
+            MappingError: Invalid template, or the template has no object
+
+        Returns:
+            list[RecordResult]: one result per row
+        """
+        mapping = self.mappings.get_mapping(template_name, context)
+        if not mapping.object_name:
+            raise MappingError(f"Mapping template {template_name} does not name the object to upsert")
+        return self.bulk_upsert(
+            mapping.object_name,
+            mapping.iter_rows(rows, batch_size=mapping_batch_size),
+            external_id_field=mapping.external_id_field or "Id",
+            **kwargs,
+        )
+
+    @instrumented()
+    def create_bulk_ingest_job(self, object_name: str, operation: str, external_id_field: Optional[str] = None) -> dict:
+        """Create a Bulk API 2.0 ingest job that accepts CSV data.
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Benchmark__c
+            operation (str): one of insert, update, upsert, delete or hardDelete
+            external_id_field (str, optional): external ID field, required for upserts. Defaults to None.
+
+        Returns:
+            dict: job info, including the job "id" and "state"
+        """
+        payload = {
+            "object": object_name,
+            "operation": operation,
+            "contentType": "CSV",
+            "lineEnding": "LF",
+        }
+        if external_id_field:
+            payload["externalIdFieldName"] = external_id_field
+        return self._bulk_request("POST", "ingest/", json=payload).json()
+
+    @instrumented()
+    def upload_bulk_job_data(self, job_id: str, data: str) -> None:
+        """Upload the CSV data of an open ingest job. A job only accepts a single upload.
+
+        Args:
+            job_id (str): id of the ingest job
+            data (str): CSV document, including the header row
+        """
+        self._bulk_request(
+            "PUT",
+            f"ingest/{job_id}/batches/",
+            data=data.encode("utf-8"),
+            headers={"Content-Type": "text/csv"},
+        )
+
+    @instrumented()
+    def close_bulk_job(self, job_id: str) -> dict:
+        """Mark the upload of an ingest job as complete so Salesforce queues it for processing
+
+        Args:
+            job_id (str): id of the ingest job
+
+        Returns:
+            dict: job info
+        """
+        return self._bulk_request("PATCH", f"ingest/{job_id}/", json={"state": "UploadComplete"}).json()
+
+    @instrumented()
+    def abort_bulk_job(self, job_id: str, job_type: str = "ingest") -> dict:
+        """Abort a bulk job that has not finished, e.g., an ingest job whose upload was interrupted
+
+        Args:
+            job_id (str): id of the job
+            job_type (str, optional): "ingest" or "query". Defaults to "ingest".
+
+        Returns:
+            dict: job info
+        """
+        return self._bulk_request("PATCH", f"{job_type}/{job_id}/", json={"state": "Aborted"}).json()
+
+    @instrumented()
+    def get_bulk_job(self, job_id: str, job_type: str = "ingest") -> dict:
+        """Return the info of a bulk job, including its state and record counts
+
+        Args:
+            job_id (str): id of the job
+            job_type (str, optional): "ingest" or "query". Defaults to "ingest".
+
+        Returns:
+            dict: job info
+        """
+        return self._bulk_request("GET", f"{job_type}/{job_id}/").json()
+
+    @instrumented()
+    def wait_for_bulk_job(
+        self,
+        job_id: str,
+        timeout: float = 3600,
+        max_poll_interval: float = 10,
+        job_type: str = "ingest",
+    ) -> dict:
+        """Poll the state of a bulk job until it finishes, backing off between polls.
+
+        Args:
+            job_id (str): id of the job
+            timeout (float, optional): seconds to wait before giving up. Defaults to 3600.
+            max_poll_interval (float, optional): maximum seconds between polls. Defaults to 10.
+            job_type (str, optional): "ingest" or "query". Defaults to "ingest".
+
+        Raises:
+            BulkJobError: Job failed, was aborted, or did not finish within the timeout
+
+        Returns:
+            dict: job info of the completed job
+        """
+        deadline = time.monotonic() + timeout
+        interval = 0.5
+        while True:
+            job = self.get_bulk_job(job_id, job_type=job_type)
+            if job["state"] in BULK_JOB_FINISHED_STATES:
+                break
+            if time.monotonic() + interval > deadline:
+                raise BulkJobError(f"Timed out waiting for bulk job {job_id} in state {job['state']}")
+            time.sleep(interval)
+            interval = min(interval * 2, max_poll_interval)
+
+        if job["state"] != "JobComplete":
+            raise BulkJobError(f"Bulk job {job_id} finished in state {job['state']}: {job.get('errorMessage')}")
+        return job
+
+    @instrumented()
+    def get_bulk_job_results(self, job_id: str) -> list:
+        """Return the per-record results of a completed ingest job.
+
+        Args:
+            job_id (str): id of the ingest job
+
+        Returns:
+            list[RecordResult]: successful, then failed, then unprocessed records
+        """
+        results = []
+        for path, success in (("successfulResults", True), ("failedResults", False), ("unprocessedrecords", False)):
+            response = self._bulk_request("GET", f"ingest/{job_id}/{path}/", headers={"Accept": "text/csv"})
+            for row in csv.DictReader(io.StringIO(response.content.decode("utf-8"))):
+                result = RecordResult.from_bulk_row(row, success, job_id=job_id)
+                if path == "unprocessedrecords":
+                    result.errors.append("Record was not processed by the job")
+                results.append(result)
+        return results
+
+    @instrumented()
+    def export_object(
+        self,
+        object_name: str,
+        path: Union[str, Path],
+        fields: Optional[list] = None,
+        where: Optional[str] = None,
+        **kwargs,
+    ) -> dict:
+        """Export the records of an object to a CSV or Parquet file with a Bulk API 2.0 query job.
+
+            sf.export_object("Benchmark__c", "benchmarks.parquet", where="CreatedDate = LAST_N_DAYS:30")
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Benchmark__c
+            path (str | Path): file to write, a ".parquet" suffix selects the Parquet format
+            fields (list, optional): fields to export. Defaults to all the fields supported by Bulk API 2.0.
+            where (str, optional): SOQL condition to filter the records on. Defaults to None.
+            **kwargs: additional parameters to pass to `export_query`
+
+        Returns:
+            dict: export stats, see `export_query`
+        """
+        if fields:
+            self._validate_fields(object_name, fields)
+        else:
+            fields = [
+                name
+                for name, field_type in self._get_field_types(object_name).items()
+                if field_type not in BULK_QUERY_UNSUPPORTED_FIELD_TYPES
+            ]
+        soql = format_soql("SELECT {:literal} FROM {:literal}", ", ".join(fields), object_name)
+        if where:
+            soql = f"{soql} WHERE {where}"
+        return self.export_query(soql, path, **kwargs)
+
+    @instrumented()
+    def export_query(
+        self,
+        soql: str,
+        path: Union[str, Path],
+        include_deleted: bool = False,
+        chunk_size: int = DEFAULT_BULK_QUERY_CHUNK_SIZE,
+        timeout: float = 3600,
+    ) -> dict:
+        """Run a Bulk API 2.0 query job and stream its results to a CSV or Parquet file.
+
+        The results are downloaded in chunks of `chunk_size` rows, following the Sforce-Locator
+        header, and each chunk is written straight to disk, so the records are never held in
+        memory. A ".parquet" suffix on `path` converts the downloaded CSV to Parquet (requires
+        pyarrow), typing the columns from the description of the queried object.
+
+        Args:
+            soql (str): SOQL query, subqueries and aggregates are not supported by Bulk API 2.0
+            path (str | Path): file to write, ".csv" or ".parquet"
+            include_deleted (bool, optional): include deleted and archived records (queryAll). Defaults to False.
+            chunk_size (int, optional): rows per downloaded chunk. Defaults to 50000.
+            timeout (float, optional): seconds to wait for the job to finish. Defaults to 3600.
+
+        Raises:
+            BulkJobError: Job failed or timed out
+
+        Returns:
+            dict: export stats, the "job_id", "path", "rows", "seconds" and "rows_per_second"
+        """
+        path = Path(path)
+        file_format = path.suffix.lstrip(".").lower() or "csv"
+        if file_format not in ("csv", "parquet"):
+            raise SalesforceClientError(f"Unsupported export format: {file_format}")
+
+        start = time.monotonic()
+        job = self.create_bulk_query_job(soql, include_deleted=include_deleted)
+        self.wait_for_bulk_job(job["id"], timeout=timeout, job_type="query")
+
+        csv_path = path if file_format == "csv" else path.with_name(f"{path.name}.csv.part")
+        try:
+            with open(csv_path, "wb") as f:
+                rows = self.download_bulk_query_results(job["id"], f, chunk_size=chunk_size)
+            if file_format == "parquet":
+                from_object = re.search(r"\bFROM\s+(\w+)", soql, flags=re.IGNORECASE)
+                field_types = self._get_field_types(from_object.group(1)) if from_object else {}
+                csv_to_parquet(csv_path, path, field_types)
+        finally:
+            if csv_path != path and csv_path.exists():
+                csv_path.unlink()
+
+        seconds = time.monotonic() - start
+        stats = {
+            "job_id": job["id"],
+            "path": str(path),
+            "rows": rows,
+            "seconds": seconds,
+            "rows_per_second": rows / seconds if seconds else 0.0,
+        }
+        _log.info(f"Exported {rows} rows to {path} in {seconds:.1f}s ({stats['rows_per_second']:.0f} rows/sec)")
+        return stats
+
+    @instrumented()
+    def create_bulk_query_job(self, soql: str, include_deleted: bool = False) -> dict:
+        """Create a Bulk API 2.0 query job, Salesforce starts processing it right away.
+
+        Args:
+            soql (str): SOQL query
+            include_deleted (bool, optional): include deleted and archived records (queryAll). Defaults to False.
+
+        Returns:
+            dict: job info, including the job "id" and "state"
+        """
+        payload = {
+            "operation": "queryAll" if include_deleted else "query",
+            "query": soql,
+            "contentType": "CSV",
+            "lineEnding": "LF",
+        }
+        return self._bulk_request("POST", "query/", json=payload).json()
+
+    @instrumented()
+    def download_bulk_query_results(
+        self,
+        job_id: str,
+        f: BinaryIO,
+        chunk_size: int = DEFAULT_BULK_QUERY_CHUNK_SIZE,
+    ) -> int:
+        """Stream the CSV results of a completed query job to a binary file, one chunk at a time.
+
+        Every chunk comes with its own header row, only the one of the first chunk is written.
+
+        Args:
+            job_id (str): id of the query job
+            f (BinaryIO): file to write the CSV document to
+            chunk_size (int, optional): rows per downloaded chunk. Defaults to 50000.
+
+        Returns:
+            int: number of rows written, excluding the header
+        """
+        rows = 0
+        locator = None
+        while True:
+            params = {"maxRecords": chunk_size}
+            if locator:
+                params["locator"] = locator
+            response = self._bulk_request(
+                "GET",
+                f"query/{job_id}/results",
+                params=params,
+                headers={"Accept": "text/csv"},
+                stream=True,
             )
+            with response:
+                skip_header = locator is not None
+                for block in response.iter_content(chunk_size=1024 * 1024):
+                    data = block
+                    if skip_header:
+                        header_end = data.find(b"\n")
+                        if header_end == -1:
+                            continue
+                        data = data[header_end + 1 :]
+                        skip_header = False
+                    f.write(data)
+            rows += int(response.headers.get("Sforce-NumberOfRecords", 0))
+            locator = response.headers.get("Sforce-Locator")
+            if not locator or locator == "null":
+                return rows
+
+    def _bulk_request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """Make a request against the Bulk API 2.0 endpoints of the connection.
+
+        Args:
+            method (str): HTTP method
+            path (str): path relative to the "jobs/" endpoint, e.g., ingest/<job_id>/
+            **kwargs: additional parameters to pass to the request, e.g., json, data, headers
+
+        Returns:
+            requests.Response: response of the request
+        """
+        return self._request(method, f"{self.connection.bulk2_url}{path}", name=path, **kwargs)
+
+    def _request(self, method: str, url: str, name: str = "", **kwargs) -> requests.Response:
+        """Make a request with the session and headers of the connection, logging in again if the session expired.
+
+        Args:
+            method (str): HTTP method
+            url (str): URL of the request
+            name (str, optional): name of the resource in the error messages. Defaults to "".
+            **kwargs: additional parameters to pass to the request, e.g., json, data, headers
 
-    def update_property(self, property_id: str, **kwargs) -> dict:
+        Returns:
+            requests.Response: response of the request, successful or 304 Not Modified
+        """
+        headers = kwargs.pop("headers", {})
+        response = self.session.request(method, url, headers={**self.connection.headers, **headers}, **kwargs)
+        # the session expired, log in again like simple_salesforce does for its own calls
+        if response.status_code == requests.codes.unauthorized and _refresh_connection_session(self.connection):
+            response = self.session.request(method, url, headers={**self.connection.headers, **headers}, **kwargs)
+        if (
+            response.status_code >= requests.codes.multiple_choices
+            and response.status_code != requests.codes.not_modified
+        ):
+            from simple_salesforce.util import exception_handler
+
+            exception_handler(response, name=name)
+        return response
+
+    @instrumented("Property__c")
+    def update_property(
+        self,
+        property_id: str,
+        *,
+        fields: Optional[list] = None,
+        fetch: Optional[bool] = None,
+        **kwargs,
+    ) -> Union[dict, Future]:
         """Update an existing Property.
 
         Args:
             property_id (str): id of contact to update
+            fields (list, optional): fields of the updated record to return. Defaults to all fields.
+            fetch (bool, optional): re-fetch the record after the update. If False, only
+                {"Id": property_id, "success": True} is returned. Defaults to True.
+                `fields` and `fetch` can't be passed when the update is queued by a `write_behind` queue.
             **kwargs: additional parameters to update
 
         Raises:
-            Exception: Error updating record
+            RecordWriteError: Error updating record
+            ValueError: `fields` or `fetch` passed with a `write_behind` queue
 
         Returns:
-            dict: OrderedDict([...])
+            dict: OrderedDict([...]), or a Future of the RecordResult when the client has a `write_behind` queue
         """
+        if self.write_behind is not None:
+            return self._submit_update("Property__c", property_id, kwargs, fields=fields, fetch=fetch)
+        if fetch is None:
+            fetch = True
+
+        changes = self._changed_fields("Property__c", property_id, kwargs)
+        if kwargs and not changes:
+            return (
+                {"Id": property_id, "success": True}
+                if not fetch
+                else self._get_record("Property__c", property_id, fields)
+            )
+
         updated_record = self.connection.Property__c.update(
             property_id,
-            {
-                **kwargs,
-            },
+            self._serialize_record("Property__c", changes),
         )
+        self._invalidate_record("Property__c", property_id)
 
         if updated_record == requests.codes.no_content:
-            prop = self.connection.Property__c.get(property_id)
+            if not fetch:
+                return {"Id": property_id, "success": True}
+            prop = self._get_record("Property__c", property_id, fields)
             return prop
         else:
-            raise Exception(f"Failed to update property {property_id} with error: {updated_record['errors']}")
+            raise RecordWriteError(
+                f"Failed to update property {property_id} with error: {updated_record['errors']}",
+                updated_record["errors"],
+            )
 
-    def get_first_property(self) -> dict:
+    @instrumented("Property__c")
+    def get_first_property(self, fields: Optional[list] = None) -> dict:
         """Get a property (for testing mainly)
 
+        Args:
+            fields (list, optional): fields to return, validated against the object description. Defaults to all fields.
+
         Returns:
             dict: OrderedDict([('attributes',
             OrderedDict([('type', 'Property__c'),
@@ -248,7 +1351,8 @@ class SalesforceClient:
             ('Id', 'a0256000005mDNrAAM'),
             ...
         """
-        prop = self.connection.query("Select FIELDS(ALL) from Property__c limit 1")
+        select = self._select_list("Property__c", fields) if fields else "FIELDS(ALL)"
+        prop = self.connection.query(format_soql("Select {:literal} from Property__c limit 1", select))
         if prop:
             if prop["totalSize"] > 0:
                 return prop["records"][0]
@@ -256,12 +1360,15 @@ class SalesforceClient:
                 # no records
                 return {}
         else:
-            raise Exception("Failed to return a property")
+            raise SalesforceClientError("Failed to return a property")
 
-    def find_property_by_name(self, name: str) -> dict:
+    @instrumented("Property__c")
+    def find_property_by_name(self, name: str, fields: Optional[list] = None) -> dict:
         """Retrieve an existing Property by name
         Args:
             name (str): name of the property
+            fields (list, optional): fields to return, which are selected by the lookup query itself
+                so the record is not fetched a second time. Defaults to all fields.
 
         Returns:
             dict: OrderedDict([(
@@ -271,28 +1378,42 @@ class SalesforceClient:
             ('Name', '123 Made Up St'),
             ...
         """
+        prop = self._get_indexed_record("Property__c", "Name", name, fields)
+        if prop:
+            return prop
 
         # clean name
         name = name.strip().replace("'", "\\'")
 
-        property_exist = self.connection.query(format_soql("Select Id from Property__c where Name = {}", name))
+        property_exist = self.connection.query(
+            format_soql(
+                "Select {:literal} from Property__c where Name = {}",
+                self._select_list("Property__c", fields, "Name"),
+                name,
+            ),
+        )
         if len(property_exist["records"]) == 1:
-            # if there is a single record, then it exist, but
-            # we need to get the entire record for the request
-            prop = self.get_property_by_id(property_exist["records"][0]["Id"])
+            prop = property_exist["records"][0]
+            self._index_record("Property__c", "Name", prop["Name"], prop["Id"])
+            if not fields:
+                # if there is a single record, then it exist, but
+                # we need to get the entire record for the request
+                prop = self.get_property_by_id(prop["Id"])
             return prop
         elif len(property_exist["records"]) > 1:
             # there are multiple properties with the same name, raise error
-            raise Exception(f"Failed to return Property {name}...multiple properties with that name found")
+            raise DuplicateRecordError(f"Failed to return Property {name}...multiple properties with that name found")
         else:
             # there is no account, return empty dict
             return {}
 
-    def get_property_by_id(self, property_id: str) -> dict:
+    @instrumented("Property__c")
+    def get_property_by_id(self, property_id: str, fields: Optional[list] = None) -> dict:
         """Return the property by the salesforce property ID.
 
         Args:
             property_id (str): ID of the property to return
+            fields (list, optional): fields to return, validated against the object description. Defaults to all fields.
 
         Returns:
             dict: OrderedDict([(
@@ -302,29 +1423,39 @@ class SalesforceClient:
             ('Name', '123 Made Up St'),
             ...
         """
+        from simple_salesforce.exceptions import SalesforceResourceNotFound
+
         try:
-            return self.connection.Property__c.get(property_id)
-        except BaseException:
-            raise Exception("Error retrieving property by ID")
+            return self._get_record("Property__c", property_id, fields)
+        except SalesforceResourceNotFound as e:
+            raise RecordNotFoundError(f"Property {property_id} not found") from e
 
-    def get_account_by_account_id(self, account_id: str) -> dict:
+    @instrumented("Account")
+    def get_account_by_account_id(self, account_id: str, fields: Optional[list] = None) -> dict:
         """Return the account by the account ID.
 
         Args:
             account_id (str): ID of the account to return
+            fields (list, optional): fields to return, validated against the object description. Defaults to all fields.
 
         Returns:
             dict: {
                 Account info...
             }
         """
-        return self.connection.Account.get(account_id)
+        return self._get_record("Account", account_id, fields)
 
-    def find_account_by_name(self, name: str) -> dict:
+    @instrumented("Account")
+    def find_account_by_name(self, name: str, fields: Optional[list] = None) -> dict:
         """Find a record on the Account table by passed name.
 
         Args:
             name (str): name of the account to find
+            fields (list, optional): fields to return, which are selected by the lookup query itself
+                so the record is not fetched a second time. Defaults to all fields.
+
+        Raises:
+            DuplicateRecordError: Multiple accounts with the name
 
         Returns:
             dict: OrderedDict([
@@ -335,30 +1466,56 @@ class SalesforceClient:
                 ('Name', 'Scrumptious Ice Cream'),
                 ('Type', 'Ice Cream Shop'),
         """
+        account = self._get_indexed_record("Account", "Name", name, fields)
+        if account:
+            return account
 
         # clean name
         name = name.strip().replace("'", "\\'")
 
-        account_exist = self.connection.query(format_soql("Select Id from Account where Name = {}", name))
+        account_exist = self.connection.query(
+            format_soql(
+                "Select {:literal} from Account where Name = {}",
+                self._select_list("Account", fields, "Name"),
+                name,
+            ),
+        )
         if len(account_exist["records"]) == 1:
-            # if there is a single record, then it exist, but
-            # we need to get the entire record for the request
-            account = self.get_account_by_account_id(account_exist["records"][0]["Id"])
+            account = account_exist["records"][0]
+            self._index_record("Account", "Name", account["Name"], account["Id"])
+            if not fields:
+                # if there is a single record, then it exist, but
+                # we need to get the entire record for the request
+                account = self.get_account_by_account_id(account["Id"])
             return account
+        elif len(account_exist["records"]) > 1:
+            # there are multiple accounts with the same name, raise error
+            raise DuplicateRecordError(f"Failed to return Account {name}...multiple accounts with that name found")
         else:
             # there is no account, return empty dict
             return {}
 
-    def create_account(self, name: str, **kwargs) -> dict:
+    @instrumented("Account")
+    def create_account(
+        self,
+        name: str,
+        *,
+        fields: Optional[list] = None,
+        fetch: bool = True,
+        **kwargs,
+    ) -> dict:
         """Create a record on the Account table.
 
         Args:
             name (str): name of the account to create
+            fields (list, optional): fields of the created record to return. Defaults to all fields.
+            fetch (bool, optional): re-fetch the record after the create. If False, only
+                {"Id": <id>, "success": True} is returned. Defaults to True.
             **kwargs: additional parameters to pass to the create method
 
         Raises:
-            Exception: Property not found
-            Exception: Error creating record
+            DuplicateRecordError: Record already exists
+            RecordWriteError: Error creating record
 
         Returns:
             dict: OrderedDict([
@@ -369,85 +1526,129 @@ class SalesforceClient:
                 ('Name', 'Scrumptious Ice Cream'),
                 ('Type', 'Ice Cream Shop'),
         """
-        account = self.find_account_by_name(name)
+        account = self.find_account_by_name(name, fields=["Id"])
         if account:
-            raise Exception(f"Account {name} already exists.")
+            raise DuplicateRecordError(f"Account {name} already exists.")
         else:
             new_record = self.connection.Account.create(
-                {
-                    "Name": name,
-                    **kwargs,
-                },
+                self._serialize_record("Account", {"Name": name, **kwargs}),
             )
             if new_record["success"]:
                 # The new_record is now just a "success" type recall with an ID. We
                 # want to return the full record, so now "get" the record.
-                account = self.connection.Account.get(new_record["id"])
+                self._index_record("Account", "Name", name, new_record["id"])
+                if not fetch:
+                    return {"Id": new_record["id"], "success": True}
+                account = self._get_record("Account", new_record["id"], fields)
                 return account
             else:
-                raise Exception(f"Failed to create account {name} with error: {new_record['errors']}")
+                raise RecordWriteError(
+                    f"Failed to create account {name} with error: {new_record['errors']}",
+                    new_record["errors"],
+                )
 
-    def create_contact(self, email: str, **kwargs) -> dict:
+    @instrumented("Contact")
+    def create_contact(
+        self,
+        email: str,
+        *,
+        fields: Optional[list] = None,
+        fetch: bool = True,
+        **kwargs,
+    ) -> dict:
         """Create a contact on the Contact table.
 
         Args:
             name (str): email of the contact to create
+            fields (list, optional): fields of the created record to return. Defaults to all fields.
+            fetch (bool, optional): re-fetch the record after the create. If False, only
+                {"Id": <id>, "success": True} is returned. Defaults to True.
             **kwargs: additional parameters to pass to the create method
 
         Raises:
-            Exception: Property not found
-            Exception: Error creating record
+            DuplicateRecordError: Record already exists
+            RecordWriteError: Error creating record
 
         Returns:
             dict: OrderedDict([
         """
-        account = self.find_contact_by_email(email)
+        account = self.find_contact_by_email(email, fields=["Id"])
 
         if account:
-            raise Exception(f"Contact {email} already exists.")
+            raise DuplicateRecordError(f"Contact {email} already exists.")
 
         else:
             new_record = self.connection.Contact.create(
-                {
-                    "Email": email,
-                    **kwargs,
-                },
+                self._serialize_record("Contact", {"Email": email, **kwargs}),
             )
             if new_record["success"]:
                 # The new_record is now just a "success" type recall with an ID. We
                 # want to return the full record, so now "get" the record.
-                account = self.connection.Contact.get(new_record["id"])
+                self._index_record("Contact", "Email", email, new_record["id"])
+                if not fetch:
+                    return {"Id": new_record["id"], "success": True}
+                account = self._get_record("Contact", new_record["id"], fields)
                 return account
             else:
-                raise Exception(f"Failed to create contact {email} with error: {new_record['errors']}")
+                raise RecordWriteError(
+                    f"Failed to create contact {email} with error: {new_record['errors']}",
+                    new_record["errors"],
+                )
 
-    def update_contact(self, contact_id: str, **kwargs) -> dict:
+    @instrumented("Contact")
+    def update_contact(
+        self,
+        contact_id: str,
+        *,
+        fields: Optional[list] = None,
+        fetch: Optional[bool] = None,
+        **kwargs,
+    ) -> Union[dict, Future]:
         """Update an existing Contact.
 
         Args:
             contact_id (str): id of contact to update
+            fields (list, optional): fields of the updated record to return. Defaults to all fields.
+            fetch (bool, optional): re-fetch the record after the update. If False, only
+                {"Id": <id>, "success": True} is returned. Defaults to True.
+                `fields` and `fetch` can't be passed when the update is queued by a `write_behind` queue.
             **kwargs: additional parameters to update
 
         Raises:
-            Exception: Error updating record
+            RecordWriteError: Error updating record
+            ValueError: `fields` or `fetch` passed with a `write_behind` queue
 
         Returns:
-            dict: OrderedDict([
+            dict: OrderedDict([...]), or a Future of the RecordResult when the client has a `write_behind` queue
         """
+        if self.write_behind is not None:
+            return self._submit_update("Contact", contact_id, kwargs, fields=fields, fetch=fetch)
+        if fetch is None:
+            fetch = True
+
+        changes = self._changed_fields("Contact", contact_id, kwargs)
+        if kwargs and not changes:
+            return {"Id": contact_id, "success": True} if not fetch else self._get_record("Contact", contact_id, fields)
+
         updated_record = self.connection.Contact.update(
             contact_id,
-            {
-                **kwargs,
-            },
+            self._serialize_record("Contact", changes),
         )
+        self._invalidate_record("Contact", contact_id)
 
         if updated_record == requests.codes.no_content:
-            account = self.connection.Contact.get(contact_id)
+            if not fetch:
+                return {"Id": contact_id, "success": True}
+            account = self._get_record("Contact", contact_id, fields)
             return account
         else:
-            raise Exception(f"Failed to update contact {contact_id} with error: {updated_record['errors']}")
+            raise RecordWriteError(
+                f"Failed to update contact {contact_id} with error: {updated_record['errors']}",
+                updated_record["errors"],
+            )
 
-    def update_account_by_id(self, account_id: str, update_data: dict) -> dict:
+    @instrumented("Account")
+    def update_account_by_id(self, account_id: str, update_data: dict) -> Union[dict, Future]:
         """Update the fields of an existing account on Salesforce
 
         Args:
@@ -455,10 +1656,16 @@ class SalesforceClient:
             update_data (dict): fields to update on Salesforce account
 
         Returns:
-            dict: updated account record
+            dict: updated account record, or a Future of the RecordResult when the client has a `write_behind` queue
         """
-        return self.connection.Account.update(account_id, update_data)
+        if self.write_behind is not None:
+            return self._submit_update("Account", account_id, update_data)
 
+        status = self.connection.Account.update(account_id, self._serialize_record("Account", update_data))
+        self._invalidate_record("Account", account_id)
+        return status
+
+    @instrumented("Account")
     def delete_account_by_id(self, account_id: str) -> bool:
         """Delete a record on the Account table by passed id.
 
@@ -469,41 +1676,889 @@ class SalesforceClient:
             bool: did the account get deleted successfully?
         """
         status = self.connection.Account.delete(account_id)
+        self._invalidate_record("Account", account_id)
+        if self.record_index is not None:
+            self.record_index.discard_id("Account", account_id)
         return status == requests.codes.no_content
 
-    def find_contact_by_email(self, email: str) -> dict:
+    @instrumented("Contact")
+    def find_contact_by_email(self, email: str, fields: Optional[list] = None) -> dict:
         """Find the contact in the Salesforce contact table and return the info
 
         Args:
             email (str): email of the contact to find. Email must be unique across the entire system
+            fields (list, optional): fields to return, which are selected by the lookup query itself
+                so the record is not fetched a second time. Defaults to all fields.
 
         Returns:
             dict: dictionary of contact information
         """
+        contact = self._get_indexed_record("Contact", "Email", email, fields)
+        if contact:
+            return contact
+
         contact_info = self.connection.query(
-            format_soql("Select Id, Email, Account.Name from Contact where Email = {}", email),
+            format_soql(
+                "Select {:literal} from Contact where Email = {}",
+                self._select_list("Contact", fields, "Email", "Account.Name"),
+                email,
+            ),
         )
         if len(contact_info["records"]) == 1:
-            # contact exists, return the full record
-            return self.connection.Contact.get(contact_info["records"][0]["Id"])
+            contact = contact_info["records"][0]
+            self._index_record("Contact", "Email", email, contact["Id"])
+            if not fields:
+                # contact exists, return the full record
+                contact = self._get_record("Contact", contact["Id"])
+            return contact
+
+        return {}
+
+    @instrumented("Contact")
+    def create_or_update_contact_on_account(
+        self,
+        contact_email: str,
+        account_name: Optional[str] = None,
+        *,
+        fields: Optional[list] = None,
+        **kwargs,
+    ) -> dict:
+        """Create the contact, or update it if a contact with the email exists, and optionally link
+        it to an account that is created if it does not exist.
+
+        This takes two Composite API requests: one to look up the contact and the account, and
+        one to create the account, create or update the contact and fetch it, rolled back together
+        if any of these fails.
+
+        Args:
+            contact_email (str): email of the contact. Email must be unique across the entire system
+            account_name (str, optional): name of the account to link the contact to. Defaults to None.
+            fields (list, optional): fields of the contact to return. Defaults to all fields.
+            **kwargs: fields of the contact to set, e.g., LastName or AccountId
+
+        Raises:
+            DuplicateRecordError: Multiple contacts with the email, or multiple accounts with the name
+            SalesforceClientError: Error writing the records
+
+        Returns:
+            dict: the created or updated contact
+        """
+        if fields:
+            self._validate_fields("Contact", fields)
+
+        lookup = self.composite_request()
+        lookup.query(format_soql("SELECT Id FROM Contact WHERE Email = {}", contact_email), "contact")
+        if account_name:
+            lookup.query(format_soql("SELECT Id FROM Account WHERE Name = {}", account_name), "account")
+        found = self.composite(lookup)
+
+        contacts = found["contact"]["body"]["records"]
+        if len(contacts) > 1:
+            raise DuplicateRecordError(f"Multiple contacts found with email {contact_email}")
+
+        write = self.composite_request(all_or_none=True)
+        record = self._serialize_record("Contact", kwargs)
+        if account_name:
+            accounts = found["account"]["body"]["records"]
+            if len(accounts) > 1:
+                raise DuplicateRecordError(f"Multiple accounts found with name {account_name}")
+            if accounts:
+                record["AccountId"] = accounts[0]["Id"]
+            else:
+                write.create("Account", {"Name": account_name}, "newAccount")
+                record["AccountId"] = reference("newAccount")
+        if contacts:
+            write.update("Contact", contacts[0]["Id"], record, "contact")
+            contact_id = contacts[0]["Id"]
+        else:
+            write.create("Contact", {"Email": contact_email, **record}, "newContact")
+            contact_id = reference("newContact")
+        write.get("Contact", contact_id, "result", fields)
+        results = self.composite(write)
+
+        contact = results["result"]["body"]
+        self._invalidate_record("Contact", contact["Id"])
+        self._index_record("Contact", "Email", contact_email, contact["Id"])
+        if "newAccount" in results:
+            self._index_record("Account", "Name", account_name, results["newAccount"]["body"]["id"])
+        return contact
+
+    def composite_request(self, all_or_none: bool = False) -> CompositeRequest:
+        """Return a builder of a Composite API request for the API version of the connection, see `composite`
+
+        Args:
+            all_or_none (bool, optional): roll back all the subrequests if one fails. Defaults to False.
+
+        Returns:
+            CompositeRequest: empty request
+        """
+        return CompositeRequest(self.connection.sf_version, all_or_none=all_or_none)
+
+    @instrumented()
+    def composite(self, request: CompositeRequest, raise_on_error: bool = True) -> dict:
+        """Run the subrequests of a Composite API request in a single round trip.
+
+            request = sf.composite_request(all_or_none=True)
+            request.create("Account", {"Name": "Scrumptious Ice Cream"}, "newAccount")
+            request.create("Contact", {"LastName": "Hendricks", "AccountId": reference("newAccount")}, "newContact")
+            contact_id = sf.composite(request)["newContact"]["body"]["id"]
+
+        Records written through this method are not removed from the record cache.
+
+        Args:
+            request (CompositeRequest): request built with `composite_request`
+            raise_on_error (bool, optional): raise if any subrequest failed. Defaults to True.
+
+        Raises:
+            SalesforceClientError: A subrequest failed
+
+        Returns:
+            dict: {reference ID: {"body": ..., "httpStatusCode": ..., "httpHeaders": ...}} of each subrequest
+        """
+        if not len(request):
+            return {}
+
+        response = self.connection.restful("composite", method="POST", json=request.to_payload())
+        results = {result["referenceId"]: result for result in response["compositeResponse"]}
+        if raise_on_error:
+            errors = {
+                reference_id: result["body"]
+                for reference_id, result in results.items()
+                if result["httpStatusCode"] >= requests.codes.multiple_choices
+            }
+            if errors:
+                raise SalesforceClientError(f"Composite request failed with errors: {errors}")
+        return results
+
+    @instrumented()
+    def find_records_by_field(
+        self,
+        object_name: str,
+        field_name: str,
+        keys: Iterable[str],
+        fields: Optional[list] = None,
+        raise_on_duplicates: bool = True,
+    ) -> dict:
+        """Find many records by the value of a field using `WHERE <field> IN (...)` queries.
+
+        The keys are split across as many queries as needed to keep each SOQL statement
+        under MAX_SOQL_LENGTH. Matching ignores surrounding whitespace and is case-insensitive,
+        unless the field is in `index.CASE_SENSITIVE_FIELDS`, the same as Salesforce does for these fields.
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Account
+            field_name (str): field to match the keys against, e.g., Name
+            keys (Iterable[str]): values of the field to find
+            fields (list, optional): fields to return. Defaults to all the fields of the object, which are
+                retrieved with `get_records_by_ids` after the Ids are resolved.
+            raise_on_duplicates (bool, optional): raise if a key matches more than one record. Otherwise
+                the key is returned as not found. Defaults to True.
+
+        Raises:
+            DuplicateRecordError: multiple records found for a key
+
+        Returns:
+            dict: {key: record} for each key as given, the record is an empty dict if not found
+        """
+        keys = [key for key in keys if key and key.strip()]
+        if fields:
+            self._validate_fields(object_name, fields)
+        select_fields = list(dict.fromkeys(["Id", field_name, *(fields or [])]))
+
+        found = self._get_indexed_records(object_name, field_name, keys, select_fields if fields else None)
+        remaining = list(
+            dict.fromkeys(key.strip() for key in keys if normalize_key(object_name, field_name, key) not in found),
+        )
+        prefix = format_soql(
+            "SELECT {:literal} FROM {:literal} WHERE {:literal} IN ",
+            ", ".join(select_fields),
+            object_name,
+            field_name,
+        )
+
+        matches: dict = {}
+        for chunk in self._chunk_soql_literals(remaining, MAX_SOQL_LENGTH - len(prefix)):
+            for record in self.connection.query_all(f"{prefix}({', '.join(chunk)})")["records"]:
+                matches.setdefault(normalize_key(object_name, field_name, record[field_name]), []).append(record)
+
+        duplicates = sorted(key for key, records in matches.items() if len(records) > 1)
+        if duplicates and raise_on_duplicates:
+            raise DuplicateRecordError(
+                f"Failed to return {object_name} records...multiple records found for {field_name} in {duplicates}",
+            )
+
+        queried = {key: records[0] for key, records in matches.items() if len(records) == 1}
+        if not fields and queried:
+            # only the Ids were queried, get the entire records in bulk
+            full_records = self.get_records_by_ids(object_name, [record["Id"] for record in queried.values()])
+            # records deleted since the query are returned as empty dicts
+            queried = {key: record for key, record in zip(queried.keys(), full_records) if record}
+        if self.record_index is not None:
+            self.record_index.update(object_name, field_name, ((key, record["Id"]) for key, record in queried.items()))
+
+        found.update(queried)
+        return {key: found.get(normalize_key(object_name, field_name, key), {}) for key in keys}
+
+    @instrumented("Account")
+    def find_accounts_by_names(self, names: Iterable[str], **kwargs) -> dict:
+        """Find many records on the Account table by name. See `find_records_by_field`.
+
+        Args:
+            names (Iterable[str]): names of the accounts to find
+            **kwargs: additional parameters to pass to `find_records_by_field`
+
+        Returns:
+            dict: {name: account} for each name, the account is an empty dict if not found
+        """
+        return self.find_records_by_field("Account", "Name", names, **kwargs)
+
+    @instrumented("Property__c")
+    def find_properties_by_names(self, names: Iterable[str], **kwargs) -> dict:
+        """Find many records on the Property__c table by name. See `find_records_by_field`.
+
+        Args:
+            names (Iterable[str]): names of the properties to find
+            **kwargs: additional parameters to pass to `find_records_by_field`
+
+        Returns:
+            dict: {name: property} for each name, the property is an empty dict if not found
+        """
+        return self.find_records_by_field("Property__c", "Name", names, **kwargs)
+
+    @instrumented("Contact")
+    def find_contacts_by_emails(self, emails: Iterable[str], **kwargs) -> dict:
+        """Find many records on the Contact table by email. See `find_records_by_field`.
+
+        Args:
+            emails (Iterable[str]): emails of the contacts to find
+            **kwargs: additional parameters to pass to `find_records_by_field`
+
+        Returns:
+            dict: {email: contact} for each email, the contact is an empty dict if not found
+        """
+        return self.find_records_by_field("Contact", "Email", emails, **kwargs)
+
+    @instrumented("Benchmark__c")
+    def get_benchmarks_by_custom_ids(self, salesforce_benchmark_ids: Iterable[str], **kwargs) -> dict:
+        """Find many records on the Benchmark__c table by Salesforce Benchmark ID. See `find_records_by_field`.
+
+        Args:
+            salesforce_benchmark_ids (Iterable[str]): Salesforce Benchmark IDs of the benchmarks to find
+            **kwargs: additional parameters to pass to `find_records_by_field`
+
+        Returns:
+            dict: {salesforce_benchmark_id: benchmark} for each ID, the benchmark is an empty dict if not found
+        """
+        return self.find_records_by_field(
+            "Benchmark__c",
+            "Salesforce_Benchmark_ID__c",
+            salesforce_benchmark_ids,
+            **kwargs,
+        )
+
+    @staticmethod
+    def _chunk_soql_literals(keys: list, max_length: int) -> list:
+        """Quote the keys as SOQL literals and group them so each group fits in `max_length` characters
+
+        Args:
+            keys (list): values to quote
+            max_length (int): maximum length of the comma separated literals of a group
+
+        Returns:
+            list[list[str]]: groups of quoted literals
+        """
+        chunks: list = []
+        length = max_length
+        for key in keys:
+            literal = format_soql("{}", key)
+            if length + len(literal) + 2 > max_length:
+                chunks.append([])
+                length = 0
+            chunks[-1].append(literal)
+            length += len(literal) + 2
+        return chunks
+
+    @instrumented()
+    def create_records(self, object_name: str, records: Iterable[dict], all_or_none: bool = False) -> list:
+        """Create many records with the sObject Collections API, 200 records per request.
+
+        Unlike `create_account` and `create_contact`, this does not check whether the
+        records already exist and does not re-fetch the created records. When the governor
+        prefers Bulk API 2.0, the records are created with a bulk job instead.
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Contact
+            records (Iterable[dict]): field values of the records to create
+            all_or_none (bool, optional): roll back the whole request if any record fails. Defaults to False.
+
+        Returns:
+            list[RecordResult]: one result per record, in the order of the records
+        """
+        records = list(records)
+        if not all_or_none and self.governor is not None and self.governor.prefer_bulk(len(records)):
+            _log.info(f"Creating {len(records)} {object_name} records with Bulk API 2.0 to save API requests")
+            return self._bulk_ingest(object_name, records, "insert")
+
+        results = []
+        for chunk in chunked(records, SOBJECT_COLLECTION_SIZE):
+            response = self.connection.restful(
+                "composite/sobjects",
+                method="POST",
+                json={"allOrNone": all_or_none, "records": self._collection_records(object_name, chunk)},
+            )
+            results.extend(
+                RecordResult.from_collection_result(result, record, created=True)
+                for result, record in zip(response, chunk)
+            )
+        return results
+
+    @instrumented()
+    def update_records(self, object_name: str, records: Iterable[dict], all_or_none: bool = False) -> list:
+        """Update many records with the sObject Collections API, 200 records per request.
+
+        When the governor prefers Bulk API 2.0, the records are updated with a bulk job instead.
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Contact
+            records (Iterable[dict]): field values to update, each must contain the record "Id"
+            all_or_none (bool, optional): roll back the whole request if any record fails. Defaults to False.
+
+        Returns:
+            list[RecordResult]: one result per record, in the order of the records
+        """
+        records = list(records)
+        if not all_or_none and self.governor is not None and self.governor.prefer_bulk(len(records)):
+            _log.info(f"Updating {len(records)} {object_name} records with Bulk API 2.0 to save API requests")
+            return self._bulk_ingest(object_name, records, "update")
+
+        results = []
+        for chunk in chunked(records, SOBJECT_COLLECTION_SIZE):
+            response = self.connection.restful(
+                "composite/sobjects",
+                method="PATCH",
+                json={"allOrNone": all_or_none, "records": self._collection_records(object_name, chunk)},
+            )
+            for record in chunk:
+                self._invalidate_record(object_name, record["Id"])
+            results.extend(
+                RecordResult.from_collection_result(result, record) for result, record in zip(response, chunk)
+            )
+        return results
+
+    @instrumented()
+    def upsert_records(
+        self,
+        object_name: str,
+        records: Iterable[dict],
+        external_id_field: str = "Id",
+        all_or_none: bool = False,
+    ) -> list:
+        """Upsert many records with the sObject Collections API, 200 records per request, keyed on an external
+        ID field. See `bulk_upsert` for large volumes.
+
+        When the governor prefers Bulk API 2.0, the records are upserted with a bulk job instead.
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Benchmark__c
+            records (Iterable[dict]): records to upsert, each must contain the `external_id_field`
+            external_id_field (str, optional): field to match existing records on. Defaults to "Id".
+            all_or_none (bool, optional): roll back the whole request if any record fails. Defaults to False.
+
+        Returns:
+            list[RecordResult]: one result per record, in the order of the records
+        """
+        records = list(records)
+        if not all_or_none and self.governor is not None and self.governor.prefer_bulk(len(records)):
+            _log.info(f"Upserting {len(records)} {object_name} records with Bulk API 2.0 to save API requests")
+            return self.bulk_upsert(object_name, records, external_id_field=external_id_field)
+
+        results = []
+        for chunk in chunked(records, SOBJECT_COLLECTION_SIZE):
+            response = self.connection.restful(
+                f"composite/sobjects/{object_name}/{external_id_field}",
+                method="PATCH",
+                json={"allOrNone": all_or_none, "records": self._collection_records(object_name, chunk)},
+            )
+            for result, record in zip(response, chunk):
+                if result.get("id"):
+                    self._invalidate_record(object_name, result["id"])
+                    self._index_record(object_name, external_id_field, record.get(external_id_field), result["id"])
+                results.append(
+                    RecordResult.from_collection_result(result, record, created=bool(result.get("created"))),
+                )
+        return results
+
+    @instrumented()
+    def get_records_by_ids(self, object_name: str, ids: Iterable[str], fields: Optional[list] = None) -> list:
+        """Retrieve many records by Id with the sObject Collections API, 2000 records per request.
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Contact
+            ids (Iterable[str]): Ids of the records to return
+            fields (list, optional): fields to return. Defaults to all the fields of the object.
+
+        Returns:
+            list[dict]: one record per Id, in the order of the Ids. Records that are not found are empty dicts.
+        """
+        fields = fields or self._get_field_names(object_name)
+        records = []
+        for chunk in chunked(ids, SOBJECT_COLLECTION_RETRIEVE_SIZE):
+            response = self.connection.restful(
+                f"composite/sobjects/{object_name}",
+                method="POST",
+                json={"ids": chunk, "fields": fields},
+            )
+            records.extend(record or {} for record in response)
+        return records
+
+    @instrumented()
+    def delete_records_by_ids(self, object_name: str, ids: Iterable[str], all_or_none: bool = False) -> list:
+        """Delete many records by Id with the sObject Collections API, 200 records per request.
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Contact
+            ids (Iterable[str]): Ids of the records to delete
+            all_or_none (bool, optional): roll back the whole request if any record fails. Defaults to False.
+
+        Returns:
+            list[RecordResult]: one result per Id, in the order of the Ids
+        """
+        results = []
+        for chunk in chunked(ids, SOBJECT_COLLECTION_SIZE):
+            response = self.connection.restful(
+                "composite/sobjects",
+                method="DELETE",
+                params={"ids": ",".join(chunk), "allOrNone": str(all_or_none).lower()},
+            )
+            chunk_results = [
+                RecordResult.from_collection_result(result, {"Id": id_}) for result, id_ in zip(response, chunk)
+            ]
+            for result in chunk_results:
+                # the records that failed to be deleted are still cached and indexed correctly
+                if result.success:
+                    self._invalidate_record(object_name, result.record["Id"])
+                    if self.record_index is not None:
+                        self.record_index.discard_id(object_name, result.record["Id"])
+            results.extend(chunk_results)
+        _log.debug(f"Deleted {sum(result.success for result in results)} of {len(results)} {object_name} records")
+        return results
+
+    @instrumented("Account")
+    def create_accounts(self, records: Iterable[dict], **kwargs) -> list:
+        """Create many records on the Account table. See `create_records`.
+
+        Args:
+            records (Iterable[dict]): accounts to create, each must contain the "Name"
+            **kwargs: additional parameters to pass to `create_records`
+
+        Returns:
+            list[RecordResult]: one result per account
+        """
+        return self.create_records("Account", records, **kwargs)
+
+    @instrumented("Account")
+    def update_accounts(self, records: Iterable[dict], **kwargs) -> list:
+        """Update many records on the Account table. See `update_records`.
+
+        Args:
+            records (Iterable[dict]): fields to update, each must contain the account "Id"
+            **kwargs: additional parameters to pass to `update_records`
 
+        Returns:
+            list[RecordResult]: one result per account
+        """
+        return self.update_records("Account", records, **kwargs)
+
+    @instrumented("Contact")
+    def create_contacts(self, records: Iterable[dict], **kwargs) -> list:
+        """Create many records on the Contact table. See `create_records`.
+
+        Args:
+            records (Iterable[dict]): contacts to create, each should contain the "Email"
+            **kwargs: additional parameters to pass to `create_records`
+
+        Returns:
+            list[RecordResult]: one result per contact
+        """
+        return self.create_records("Contact", records, **kwargs)
+
+    @instrumented("Contact")
+    def update_contacts(self, records: Iterable[dict], **kwargs) -> list:
+        """Update many records on the Contact table. See `update_records`.
+
+        Args:
+            records (Iterable[dict]): fields to update, each must contain the contact "Id"
+            **kwargs: additional parameters to pass to `update_records`
+
+        Returns:
+            list[RecordResult]: one result per contact
+        """
+        return self.update_records("Contact", records, **kwargs)
+
+    @instrumented()
+    def warm_index(self, object_names: Optional[Iterable[str]] = None) -> dict:
+        """Fill the record index with one query per object. Values shared by several records are not indexed.
+
+        Args:
+            object_names (Iterable[str], optional): objects to index. Defaults to all of INDEXED_FIELDS
+                (Account, Contact, Property__c and Benchmark__c).
+
+        Raises:
+            SalesforceClientError: the client has no record index
+
+        Returns:
+            dict: number of records indexed per object
+        """
+        if self.record_index is None:
+            raise SalesforceClientError("Cannot warm the index, the client was created without a record_index")
+
+        counts = {}
+        for object_name in object_names or INDEXED_FIELDS:
+            field_name = INDEXED_FIELDS[object_name]
+            ids: dict = {}
+            duplicates = set()
+            soql = format_soql(
+                "SELECT Id, {:literal} FROM {:literal} WHERE {:literal} != null",
+                field_name,
+                object_name,
+                field_name,
+            )
+            for record in self.connection.query_all_iter(soql):
+                key = normalize_key(object_name, field_name, record[field_name])
+                if key in ids:
+                    duplicates.add(key)
+                ids[key] = record["Id"]
+
+            self.record_index.clear(object_name)
+            self.record_index.update(
+                object_name,
+                field_name,
+                ((key, record_id) for key, record_id in ids.items() if key not in duplicates),
+            )
+            counts[object_name] = len(ids) - len(duplicates)
+        return counts
+
+    def _get_indexed_record(
+        self,
+        object_name: str,
+        field_name: str,
+        value: str,
+        fields: Optional[list] = None,
+    ) -> dict:
+        """Return the record that the record index maps the value to, skipping the lookup query
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Account
+            field_name (str): indexed field, e.g., Name
+            value (str): value of the field
+            fields (list, optional): fields to return. Defaults to all fields.
+
+        Returns:
+            dict: record, or an empty dict if the value is not indexed or the index is out of date
+        """
+        if self.record_index is None or not value:
+            return {}
+        record_id = self.record_index.get(object_name, field_name, value)
+        if not record_id:
+            return {}
+
+        from simple_salesforce.exceptions import SalesforceResourceNotFound
+
+        try:
+            record = self._get_record(
+                object_name,
+                record_id,
+                list(dict.fromkeys([*fields, field_name])) if fields else None,
+            )
+        except SalesforceResourceNotFound:
+            record = {}
+        key = normalize_key(object_name, field_name, value)
+        if record and normalize_key(object_name, field_name, record.get(field_name) or "") == key:
+            return record
+
+        # the record was deleted or its field was changed since it was indexed
+        self.record_index.discard(object_name, field_name, value)
         return {}
 
-    def create_or_update_contact_on_account(self, contact_email: str, **kwargs) -> dict:
-        # find the contact
-        contact = self.find_contact_by_email(contact_email)
+    def _get_indexed_records(self, object_name: str, field_name: str, keys: list, fields: Optional[list]) -> dict:
+        """Bulk version of `_get_indexed_record`: retrieve the indexed records with a single collections request
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Account
+            field_name (str): indexed field, e.g., Name
+            keys (list): values of the field
+            fields (list, optional): fields to return, None for all fields
+
+        Returns:
+            dict: {normalized key: record} of the keys found through the index
+        """
+        if self.record_index is None:
+            return {}
+        record_ids = {
+            normalize_key(object_name, field_name, key): self.record_index.get(object_name, field_name, key)
+            for key in keys
+        }
+        record_ids = {key: record_id for key, record_id in record_ids.items() if record_id}
+        if not record_ids:
+            return {}
+
+        found = {}
+        records = self.get_records_by_ids(object_name, list(record_ids.values()), fields=fields)
+        for key, record in zip(record_ids, records):
+            if record and normalize_key(object_name, field_name, record.get(field_name) or "") == key:
+                found[key] = record
+            else:
+                self.record_index.discard(object_name, field_name, key)
+        return found
+
+    def _index_record(self, object_name: str, field_name: str, value: Optional[str], record_id: str) -> None:
+        """Add a record to the record index, if it is enabled and the field is the one that the index serves for the
+        object, see `INDEXED_FIELDS`
+        """
+        if self.record_index is not None and value and INDEXED_FIELDS.get(object_name) == field_name:
+            self.record_index.add(object_name, field_name, value, record_id)
+
+    def _get_record(self, object_name: str, record_id: str, fields: Optional[list] = None) -> dict:
+        """Return the record, from the record cache if it is enabled and holds the record
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Property__c
+            record_id (str): Id of the record
+            fields (list, optional): fields to return. Defaults to all fields.
+
+        Returns:
+            dict: record
+        """
+        if self.record_cache is not None:
+            record = self.record_cache.get(object_name, record_id)
+            if record is not None:
+                return self._project_record(record, fields) if fields else record
+
+        if fields:
+            # partial records are not cached, they would be served to callers that want all fields
+            self._validate_fields(object_name, fields)
+            return getattr(self.connection, object_name).get(record_id, params={"fields": ",".join(fields)})
+
+        record = getattr(self.connection, object_name).get(record_id)
+        if self.record_cache is not None:
+            self.record_cache.set(object_name, record_id, record)
+        return record
+
+    @instrumented()
+    def prefetch_records(self, object_name: str, ids: Iterable[str]) -> int:
+        """Load many records into the record cache with the sObject Collections API, 2000 records
+        per request, e.g., as the snapshot that `skip_unchanged_writes` compares updates against.
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Benchmark__c
+            ids (Iterable[str]): Ids of the records to load
+
+        Raises:
+            SalesforceClientError: The record cache is not enabled
+
+        Returns:
+            int: number of records that were found and cached
+        """
+        if self.record_cache is None:
+            raise SalesforceClientError(
+                "Prefetching records requires a record cache, pass `record_cache` to the client",
+            )
+
+        count = 0
+        for record in self.get_records_by_ids(object_name, ids):
+            if record:
+                self.record_cache.set(object_name, record["Id"], record)
+                count += 1
+        return count
+
+    def _changed_fields(self, object_name: str, record_id: str, updates: dict) -> dict:
+        """Return the updates that change the record, or all of them if `skip_unchanged_writes` is not enabled.
 
-        if not contact:
-            # create and assign to account
-            contact = self.create_contact(contact_email, **kwargs)
+        The current record comes from the record cache, or is fetched (only the updated fields
+        when the cache is not enabled).
+        """
+        if not self.skip_unchanged_writes or not updates:
+            return updates
+
+        fields = None if self.record_cache is not None else list(updates)
+        current = self._get_record(object_name, record_id, fields)
+        changes = changed_fields(current, updates, self._get_field_types(object_name))
+        if not changes:
+            with self._skipped_writes_lock:
+                self.skipped_writes += 1
+            _log.debug(f"Skipped the update of {object_name} {record_id}, no field changed")
+        return changes
+
+    def _submit_update(self, object_name: str, record_id: str, values: dict, **read_args) -> Future:
+        """Queue an update with the write-behind queue. The Future resolves to the RecordResult of the write, there
+        is no updated record to re-fetch or to project, so the `fields` and `fetch` of the update method can't be
+        passed in `read_args`.
+
+        Raises:
+            ValueError: `fields` or `fetch` passed
+        """
+        passed = [name for name, value in read_args.items() if value is not None]
+        if passed:
+            raise ValueError(
+                f"{' and '.join(passed)} can't be passed to the {object_name} updates queued by the write-behind "
+                "queue, their Future resolves to the RecordResult of the write",
+            )
+        return self.write_behind.submit(object_name, record_id, values)
+
+    def _write_updates(self, object_name: str, updates: dict, use_bulk: bool) -> dict:
+        """Write the coalesced updates of a `WriteBehindQueue`, comparing them with the current records in one
+        batch when `skip_unchanged_writes` is enabled
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Property__c
+            updates (dict): record Id to the field values to update
+            use_bulk (bool): write the records with Bulk API 2.0 instead of the sObject Collections API
+
+        Returns:
+            dict: record Id to its RecordResult
+        """
+        outcomes = {}
+        if self.skip_unchanged_writes:
+            updates = self._changed_updates(object_name, updates)
+            for record_id in [record_id for record_id, changes in updates.items() if not changes]:
+                outcomes[record_id] = RecordResult(success=True, record_id=record_id, record={"Id": record_id})
+                del updates[record_id]
+        if not updates:
+            return outcomes
+
+        records = [{"Id": record_id, **fields} for record_id, fields in updates.items()]
+        if use_bulk:
+            results = self._bulk_ingest(object_name, records, "update")
         else:
-            # update contact with name and account Id, etc?
-            contact = self.update_contact(contact["Id"], **kwargs)
+            results = self.update_records(object_name, records)
+        for result in results:
+            outcomes[result.record.get("Id") or result.record_id] = result
+        return outcomes
+
+    def _changed_updates(self, object_name: str, updates: dict) -> dict:
+        """Batched `_changed_fields` of the updates of many records, fetching the current records in one request
+        per 2000 records
+
+        Returns:
+            dict: record Id to the updates that change the record, empty for the unchanged records
+        """
+        fields = sorted({field for values in updates.values() for field in values})
+        current = self.get_records_by_ids(object_name, list(updates), fields=fields)
+        field_types = self._get_field_types(object_name)
+
+        changes = {}
+        for (record_id, values), record in zip(updates.items(), current):
+            # missing records are written as they are, so that their result has the error of Salesforce
+            changes[record_id] = changed_fields(record, values, field_types) if record else values
+            if not changes[record_id]:
+                with self._skipped_writes_lock:
+                    self.skipped_writes += 1
+        return changes
+
+    @staticmethod
+    def _project_record(record: dict, fields: list) -> dict:
+        """Return a copy of the record with only the fields (plus the attributes and Id)"""
+        wanted = {field.casefold() for field in fields} | {"attributes", "id"}
+        return {key: value for key, value in record.items() if key.casefold() in wanted}
+
+    def _select_list(self, object_name: str, fields: Optional[list], *required: str) -> str:
+        """Build the SELECT list of a query: the Id, the required fields and the validated requested fields
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Account
+            fields (list, optional): requested fields
+            *required (str): fields that are always selected, e.g., the field that is filtered on
+
+        Returns:
+            str: comma separated field names
+        """
+        if fields:
+            self._validate_fields(object_name, fields)
+        return ", ".join(dict.fromkeys(["Id", *required, *(fields or [])]))
+
+    def _validate_fields(self, object_name: str, fields: list) -> None:
+        """Check that the fields exist on the object. Relationship fields (e.g., Account.Name) are not checked.
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Account
+            fields (list): field names
+
+        Raises:
+            SalesforceClientError: Unknown field
+        """
+        fields = [field for field in fields if "." not in field and field.casefold() != "id"]
+        if not fields:
+            return
+
+        names = {name.casefold() for name in self._get_field_names(object_name)}
+        unknown = [field for field in fields if field.casefold() not in names]
+        if unknown:
+            raise SalesforceClientError(f"Unknown fields on {object_name}: {unknown}")
+
+    def _invalidate_record(self, object_name: str, record_id: str) -> None:
+        """Remove a record that was changed by this client from the record cache, if it is enabled"""
+        if self.record_cache is not None:
+            self.record_cache.invalidate(object_name, record_id)
+
+    def _collection_records(self, object_name: str, records: list) -> list:
+        """Add the "attributes" envelope that the sObject Collections API requires to each record"""
+        return [
+            {
+                "attributes": {"type": object_name},
+                **self._serialize_record(
+                    object_name,
+                    {key: value for key, value in record.items() if key != "attributes"},
+                ),
+            }
+            for record in records
+        ]
+
+    def _serialize_record(self, object_name: str, record: dict) -> dict:
+        """Convert the values of a create or update payload to the JSON values of their field types, see
+        `schema.serialize_value`. Payloads of only JSON values are sent as they are, without describing the object.
+        """
+        if all(isinstance(value, JSON_TYPES) for value in record.values()):
+            return dict(record)
+        return serialize_record(record, self._get_field_types(object_name))
+
+    def _fetch_schema(self, path: str, if_modified_since: Optional[str]) -> tuple:
+        """Fetch a describe resource for the schema registry, unless it was not modified since `if_modified_since`
+
+        Returns:
+            tuple: (body or None if not modified, Last-Modified header)
+        """
+        headers = {"If-Modified-Since": if_modified_since} if if_modified_since else {}
+        response = self._request("GET", f"{self.connection.base_url}{path}", name=path, headers=headers)
+        if response.status_code == requests.codes.not_modified:
+            return None, if_modified_since
+        return response.json(), response.headers.get("Last-Modified")
+
+    def _get_field_names(self, object_name: str) -> list:
+        """Return the names of all the fields of an object, describing the object on first use
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Account
+
+        Returns:
+            list[str]: field names
+        """
+        return list(self._get_field_types(object_name))
 
-        return None
+    def _get_field_types(self, object_name: str) -> dict:
+        """Return the Salesforce type of each field of an object, from the description cached by the schema registry
 
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Account
+
+        Returns:
+            dict: field type by field name, e.g., {"Id": "id", "Name": "string"}
+        """
+        return self.schema_registry.field_types(object_name)
+
+    @instrumented()
     def create_custom_field(self, object_name: str, field_name: str, length: int, description: str) -> dict:
-        """Right now this only creates a new string field of "LongTextArea"
+        """Right now this only creates a new string field of "LongTextArea", see `create_custom_fields` for other
+        types, for many fields at once and for per-field results
 
         Args:
             object_name (str): Name of the salesforce object (table), e.g., Account, Benchmarking
@@ -511,10 +2566,13 @@ class SalesforceClient:
             length (int): Length of field
             description (str): Description of the field
 
+        Raises:
+            Exception: The Metadata API rejected the field, as raised by simple_salesforce
+
         Returns:
-            dict: _description_
+            dict: result of `mdapi.CustomField.create`
         """
-        length = max(256, length)
+        length = max(LONG_TEXT_AREA_MIN_LENGTH, length)
 
         # check if the field already exists
         custom_field = self.mdapi.CustomField(
@@ -527,6 +2585,109 @@ class SalesforceClient:
         )
         return self.mdapi.CustomField.create(custom_field)
 
+    @instrumented()
+    def create_custom_fields(
+        self,
+        object_name: str,
+        specs: Iterable[CustomFieldSpec],
+        timeout: float = 600,
+        max_poll_interval: float = 10,
+    ) -> list:
+        """Create many custom fields on an object with a single Metadata API deployment, skipping the fields that
+        already exist.
+
+        The object is described once to find the existing fields, then the new fields are deployed together in a
+        zip package and the deployment status is polled until it finishes, so provisioning 100 fields takes about
+        as long as creating one. The deployment is rolled back if any field fails.
+
+            sf.create_custom_fields("Benchmark__c", [
+                CustomFieldSpec("Site_EUI", "Number", precision=12, scale=2),
+                CustomFieldSpec("Compliance_Status", "Picklist", picklist_values=["Compliant", "Not Compliant"]),
+            ])
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Benchmark__c
+            specs (Iterable[CustomFieldSpec]): fields to create
+            timeout (float, optional): seconds to wait for the deployment to finish. Defaults to 600.
+            max_poll_interval (float, optional): maximum seconds between polls of the deployment status.
+                Defaults to 10.
+
+        Raises:
+            SalesforceClientError: Unsupported field type, a Picklist without values, or the deployment did not
+                finish within the timeout
+
+        Returns:
+            list[RecordResult]: one result per spec, in order, with the field full name in `record`.
+                Fields that already existed succeed with created=False.
+        """
+        specs = list(specs)
+        existing = {name.casefold() for name in self._get_field_names(object_name)}
+        results = {}
+        pending = []
+        for spec in specs:
+            metadata = spec.to_metadata(object_name)
+            if spec.api_name.casefold() in existing:
+                results[metadata["fullName"]] = RecordResult(success=True, record={"fullName": metadata["fullName"]})
+            else:
+                pending.append(metadata)
+
+        if pending:
+            _log.info(f"Deploying {len(pending)} custom fields on {object_name}")
+            status, errors = self._deploy_custom_fields(object_name, pending, timeout, max_poll_interval)
+            for metadata in pending:
+                full_name = metadata["fullName"]
+                if status == "Succeeded":
+                    results[full_name] = RecordResult(success=True, created=True, record={"fullName": full_name})
+                    continue
+                # the component failures don't name the fields, attribute them by the field named in their message
+                field_name = full_name.split(".", 1)[1]
+                field_errors = [error for error in errors if field_name.casefold() in error.casefold()]
+                results[full_name] = RecordResult(
+                    success=False,
+                    errors=field_errors or errors or [f"Deployment finished in state {status}"],
+                    record={"fullName": full_name},
+                )
+            self.schema_registry.invalidate(object_name)
+        return [results[f"{object_name}.{spec.api_name}"] for spec in specs]
+
+    def _deploy_custom_fields(self, object_name: str, fields: list, timeout: float, max_poll_interval: float) -> tuple:
+        """Deploy custom fields with the Metadata API and poll the deployment until it finishes
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Benchmark__c
+            fields (list): CustomField metadata of the fields, see `CustomFieldSpec.to_metadata`
+            timeout (float): seconds to wait for the deployment to finish
+            max_poll_interval (float): maximum seconds between polls
+
+        Raises:
+            SalesforceClientError: Deployment did not finish within the timeout
+
+        Returns:
+            tuple: (final status of the deployment, list of the component error messages)
+        """
+        package = custom_fields_package(object_name, fields, self.connection.sf_version)
+        # sandbox=False makes the deployment roll back on any error, in sandboxes too
+        deployment_id, _ = self.mdapi.deploy(io.BytesIO(package), sandbox=False)
+        if deployment_id is None:
+            raise SalesforceClientError(f"The deployment of {len(fields)} {object_name} fields was not accepted")
+        deadline = time.monotonic() + timeout
+        interval = 0.5
+        while True:
+            status, state_detail, deployment_detail, _ = self.mdapi.check_deploy_status(deployment_id)
+            if status in METADATA_DEPLOY_FINISHED_STATES:
+                break
+            if time.monotonic() + interval > deadline:
+                raise SalesforceClientError(
+                    f"Timed out waiting for deployment {deployment_id} in state {status}: {state_detail}",
+                )
+            time.sleep(interval)
+            interval = min(interval * 2, max_poll_interval)
+
+        errors = [f"{error['status']}: {error['message']}" for error in (deployment_detail or {}).get("errors") or []]
+        if status != "Succeeded":
+            _log.warning(f"Deployment {deployment_id} of {len(fields)} {object_name} fields {status}: {errors}")
+        return status, errors
+
     #     custom_object = mdapi.CustomObject(
     #     fullName = "CustomObject__c",
     #     label = "Custom Object",
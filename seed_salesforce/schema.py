@@ -0,0 +1,300 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import datetime
+import json
+import logging
+import os
+import re
+import threading
+import time
+from decimal import Decimal
+from email.utils import formatdate
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+from seed_salesforce.exceptions import SalesforceClientError
+
+_log = logging.getLogger(__name__)
+
+# seconds a description is used before it is revalidated with If-Modified-Since
+DEFAULT_SCHEMA_MAX_AGE = 60 * 60
+# REST API resource listing the objects of the org
+DESCRIBE_GLOBAL_PATH = "sobjects/"
+# values that are sent to the REST API as they are
+JSON_TYPES = (str, bool, int, float, type(None))
+
+
+def _to_utc(value: datetime.datetime) -> datetime.datetime:
+    # Salesforce reads datetimes without an offset as UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=datetime.timezone.utc)
+    return value.astimezone(datetime.timezone.utc)
+
+
+def _milliseconds(value: Union[datetime.datetime, datetime.time]) -> str:
+    return f"{value.microsecond // 1000:03d}"
+
+
+def _serialize_datetime(value: Any) -> Any:
+    if isinstance(value, datetime.datetime):
+        value = _to_utc(value)
+        return f"{value:%Y-%m-%dT%H:%M:%S}.{_milliseconds(value)}Z"
+    if isinstance(value, datetime.date):
+        return f"{value.isoformat()}T00:00:00.000Z"
+    return value
+
+
+def _serialize_date(value: Any) -> Any:
+    if isinstance(value, datetime.datetime):
+        return value.date().isoformat()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return value
+
+
+def _serialize_time(value: Any) -> Any:
+    if isinstance(value, datetime.time):
+        return f"{value:%H:%M:%S}.{_milliseconds(value)}Z"
+    return value
+
+
+def _serialize_boolean(value: Any) -> Any:
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "1", "yes")
+    return bool(value)
+
+
+def _serialize_number(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return value
+
+
+def _serialize_int(value: Any) -> Any:
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return _serialize_number(value)
+
+
+def _serialize_multipicklist(value: Any) -> Any:
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return ";".join(str(item) for item in value)
+    return value
+
+
+def _serialize_text(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return format(value, "f")
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return value
+
+
+SERIALIZERS = {
+    "boolean": _serialize_boolean,
+    "int": _serialize_int,
+    "double": _serialize_number,
+    "currency": _serialize_number,
+    "percent": _serialize_number,
+    "date": _serialize_date,
+    "datetime": _serialize_datetime,
+    "time": _serialize_time,
+    "multipicklist": _serialize_multipicklist,
+    "string": _serialize_text,
+    "textarea": _serialize_text,
+    "picklist": _serialize_text,
+    "email": _serialize_text,
+    "phone": _serialize_text,
+    "url": _serialize_text,
+    "id": _serialize_text,
+    "reference": _serialize_text,
+}
+
+
+def _serialize_untyped(value: Any) -> Any:
+    """Convert a value of a field of unknown type to its JSON representation"""
+    if isinstance(value, datetime.datetime):
+        return _serialize_datetime(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return _serialize_number(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    return value
+
+
+def serialize_value(value: Any, field_type: Optional[str]) -> Any:
+    """Convert a Python value to the JSON value that the REST API expects for a field type, e.g.,
+    a datetime to "2024-01-02T03:04:05.000Z" or a Decimal to a number. None is kept, it nulls the field.
+
+    Args:
+        value (Any): value of the field
+        field_type (str, optional): Salesforce type of the field, from `describe`
+
+    Returns:
+        Any: value that json.dumps can serialize
+    """
+    if value is None:
+        return None
+    serializer = SERIALIZERS.get(field_type or "")
+    if serializer is not None:
+        value = serializer(value)
+    return _serialize_untyped(value)
+
+
+def serialize_record(record: dict, field_types: dict) -> dict:
+    """Convert the values of a create or update payload with `serialize_value`
+
+    Args:
+        record (dict): field values, field names are matched case-insensitively
+        field_types (dict): Salesforce field type by field name, see `SchemaRegistry.field_types`
+
+    Returns:
+        dict: field values that json.dumps can serialize
+    """
+    types = {name.casefold(): field_type for name, field_type in field_types.items()}
+    return {name: serialize_value(value, types.get(name.casefold())) for name, value in record.items()}
+
+
+class SchemaRegistry:
+    def __init__(self, cache_dir: Optional[Union[str, Path]] = None, max_age: float = DEFAULT_SCHEMA_MAX_AGE) -> None:
+        """Cache of the descriptions of the objects of an org, in memory and optionally on disk.
+
+        A cached description is used for `max_age` seconds, then revalidated with an If-Modified-Since
+        request that only downloads it again if the object changed. Descriptions kept on disk are shared
+        by the processes using the same `cache_dir`, use one directory per org.
+
+        Args:
+            cache_dir (str | Path, optional): directory to keep the descriptions in, as JSON files. Defaults to None.
+            max_age (float, optional): seconds before a description is revalidated. Defaults to 1 hour.
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_age = max_age
+        # called with (REST API path, If-Modified-Since value or None) to fetch a resource, returns (body, Last-Modified),
+        # with body None if it was not modified. Set by the client the registry is passed to.
+        self.fetcher: Optional[Callable[[str, Optional[str]], tuple]] = None
+
+        self.requests = 0
+        self.not_modified = 0
+        self._entries: dict = {}
+        self._field_types: dict = {}
+        self._lock = threading.RLock()
+
+    def describe_global(self) -> dict:
+        """Return the list of the objects of the org, as returned by the sobjects/ resource"""
+        return self._get(DESCRIBE_GLOBAL_PATH)
+
+    def describe(self, object_name: str) -> dict:
+        """Return the description of an object, as returned by its sobjects/<object>/describe/ resource
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Benchmark__c
+
+        Returns:
+            dict: description, with its "fields"
+        """
+        return self._get(f"sobjects/{object_name}/describe/")
+
+    def object_names(self) -> list:
+        """Return the names of the objects of the org, sorted"""
+        return sorted(sobject["name"] for sobject in self.describe_global()["sobjects"])
+
+    def field_types(self, object_name: str) -> dict:
+        """Return the Salesforce type of each field of an object
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Account
+
+        Returns:
+            dict: field type by field name, e.g., {"Id": "id", "Name": "string"}
+        """
+        with self._lock:
+            describe = self.describe(object_name)
+            cached = self._field_types.get(object_name)
+            if cached is None or cached[0] is not describe:
+                cached = (describe, {field["name"]: field["type"] for field in describe["fields"]})
+                self._field_types[object_name] = cached
+            return cached[1]
+
+    def invalidate(self, object_name: Optional[str] = None) -> None:
+        """Forget the description of an object, or every description, in memory and on disk
+
+        Args:
+            object_name (str, optional): Name of the salesforce object. Defaults to None, for all the objects.
+        """
+        with self._lock:
+            paths = [f"sobjects/{object_name}/describe/"] if object_name else [*self._entries, DESCRIBE_GLOBAL_PATH]
+            for path in paths:
+                self._entries.pop(path, None)
+            if object_name:
+                self._field_types.pop(object_name, None)
+            else:
+                self._field_types.clear()
+
+            if self.cache_dir is not None:
+                files = [self._file(path) for path in paths] if object_name else self.cache_dir.glob("*.json")
+                for file in files:
+                    file.unlink(missing_ok=True)
+
+    def stats(self) -> dict:
+        """Return the number of descriptions fetched and of revalidations that found them unchanged
+
+        Returns:
+            dict: {"requests": int, "not_modified": int, "size": int}
+        """
+        with self._lock:
+            return {"requests": self.requests, "not_modified": self.not_modified, "size": len(self._entries)}
+
+    def _get(self, path: str) -> dict:
+        """Return a cached resource, fetching or revalidating it if it is missing or older than `max_age`"""
+        with self._lock:
+            entry = self._entries.get(path) or self._read(path)
+            if entry is not None and time.time() - entry["checked_at"] < self.max_age:
+                self._entries[path] = entry
+                return entry["body"]
+            if self.fetcher is None:
+                raise SalesforceClientError(f"Cannot fetch {path}, the schema registry is not attached to a client")
+
+            self.requests += 1
+            body, last_modified = self.fetcher(path, entry["last_modified"] if entry else None)
+            if body is None:
+                self.not_modified += 1
+                entry["checked_at"] = time.time()
+            else:
+                entry = {
+                    "body": body,
+                    # without a Last-Modified header, the resource is revalidated against the time it was fetched
+                    "last_modified": last_modified or formatdate(usegmt=True),
+                    "checked_at": time.time(),
+                }
+            self._entries[path] = entry
+            self._write(path, entry)
+            return entry["body"]
+
+    def _file(self, path: str) -> Path:
+        return self.cache_dir / f"{re.sub(r'[^A-Za-z0-9_]+', '-', path).strip('-')}.json"
+
+    def _read(self, path: str) -> Optional[dict]:
+        if self.cache_dir is None:
+            return None
+        try:
+            return json.loads(self._file(path).read_text())
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            _log.warning(f"Ignoring the corrupt schema cache file {self._file(path)}")
+            return None
+
+    def _write(self, path: str, entry: dict) -> None:
+        if self.cache_dir is None:
+            return
+        file = self._file(path)
+        # unique per process, the processes sharing the directory replace the file atomically
+        tmp_file = file.with_name(f"{file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_file.write_text(json.dumps(entry))
+        os.replace(tmp_file, file)
@@ -0,0 +1,222 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Optional, Union
+
+# Salesforce expires sessions after 2 hours of inactivity by default, the client logs in again
+# when a cached session turns out to be expired earlier
+DEFAULT_SESSION_MAX_AGE = 2 * 60 * 60
+# connection params that identify the user and org of a session, secrets are left out of the cache key
+SESSION_KEY_PARAMS = ("username", "instance", "instance_url", "domain", "organizationId", "consumer_key")
+
+
+def session_cache_key(connection_params: dict) -> str:
+    """Return the cache key of the sessions of a set of connection params
+
+    Args:
+        connection_params (dict): parameters passed to `simple_salesforce.Salesforce`
+
+    Returns:
+        str: hash of the user and org of the connection params
+    """
+    identity = {name: connection_params.get(name) for name in SESSION_KEY_PARAMS}
+    return hashlib.sha256(json.dumps(identity, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class SessionCache(ABC):
+    """Base class of the stores of Salesforce sessions shared by the clients of many processes.
+
+    A session is a dict of {"session_id": ..., "instance_url": ..., "created_at": ...}. Logins are
+    serialized across processes with a lock file, so that a pool of workers starting together
+    logs in once. Subclasses implement `_load`, `_save` and `_delete`.
+    """
+
+    def __init__(
+        self,
+        lock_path: Union[str, Path],
+        max_age: float = DEFAULT_SESSION_MAX_AGE,
+        lock_timeout: float = 60,
+    ) -> None:
+        """
+        Args:
+            lock_path (str | Path): path of the lock file
+            max_age (float, optional): seconds after which a cached session is not reused. Defaults to 2 hours.
+            lock_timeout (float, optional): seconds after which the lock of a crashed process is broken.
+                Defaults to 60.
+        """
+        self.lock_path = Path(lock_path)
+        self.max_age = max_age
+        self.lock_timeout = lock_timeout
+        self._lock = threading.RLock()
+        self._lock_depth = 0
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the cached session of a key, or None if there is none or it is too old
+
+        Args:
+            key (str): cache key, see `session_cache_key`
+
+        Returns:
+            dict | None: {"session_id": ..., "instance_url": ..., "created_at": ...}
+        """
+        with self._lock:
+            value = self._load(key)
+        if not value:
+            return None
+        session = json.loads(value)
+        if time.time() - session["created_at"] > self.max_age:
+            return None
+        return session
+
+    def set(self, key: str, session_id: str, instance_url: str) -> None:
+        """Cache a session
+
+        Args:
+            key (str): cache key, see `session_cache_key`
+            session_id (str): session id (access token) of the session
+            instance_url (str): URL of the instance of the session, e.g., https://<domain>.my.salesforce.com
+        """
+        session = {"session_id": session_id, "instance_url": instance_url, "created_at": time.time()}
+        with self._lock:
+            self._save(key, json.dumps(session))
+
+    def delete(self, key: str) -> None:
+        """Remove the cached session of a key
+
+        Args:
+            key (str): cache key, see `session_cache_key`
+        """
+        with self._lock:
+            self._delete(key)
+
+    @contextlib.contextmanager
+    def lock(self) -> Iterator[None]:
+        """Hold the lock of the cache across threads and processes, e.g., while logging in. Reentrant."""
+        with self._lock:
+            if self._lock_depth:
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                return
+
+            while True:
+                try:
+                    fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                    break
+                except FileExistsError:
+                    try:
+                        if time.time() - self.lock_path.stat().st_mtime > self.lock_timeout:
+                            # the process holding the lock died without releasing it
+                            self.lock_path.unlink()
+                    except FileNotFoundError:
+                        pass
+                    time.sleep(0.05)
+            os.close(fd)
+            self._lock_depth = 1
+            try:
+                yield
+            finally:
+                self._lock_depth = 0
+                with contextlib.suppress(FileNotFoundError):
+                    self.lock_path.unlink()
+
+    @abstractmethod
+    def _load(self, key: str) -> Optional[str]:
+        """Return the JSON of the cached session, or None if there is none"""
+
+    @abstractmethod
+    def _save(self, key: str, value: str) -> None:
+        """Store the JSON of a session"""
+
+    @abstractmethod
+    def _delete(self, key: str) -> None:
+        """Remove a session, if it is cached"""
+
+
+class FileSessionCache(SessionCache):
+    def __init__(self, path: Union[str, Path], **kwargs) -> None:
+        """Session cache kept in a JSON file readable only by its owner, rewritten atomically on every change
+
+        Args:
+            path (str | Path): path of the JSON file, created on the first save. The lock file is
+                created next to it.
+            **kwargs: additional parameters to pass to `SessionCache`, e.g., max_age
+        """
+        self.path = Path(path)
+        super().__init__(self.path.with_name(f"{self.path.name}.lock"), **kwargs)
+
+    def _read(self) -> dict:
+        # other processes may have changed the file, always read it again
+        try:
+            return json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return {}
+
+    def _load(self, key: str) -> Optional[str]:
+        return self._read().get(key)
+
+    def _save(self, key: str, value: str) -> None:
+        with self.lock():
+            sessions = self._read()
+            sessions[key] = value
+            self._write(sessions)
+
+    def _delete(self, key: str) -> None:
+        with self.lock():
+            sessions = self._read()
+            if sessions.pop(key, None) is not None:
+                self._write(sessions)
+
+    def _write(self, sessions: dict) -> None:
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        fd = os.open(tmp_path, os.O_CREAT | os.O_TRUNC | os.O_WRONLY, 0o600)
+        with os.fdopen(fd, "w") as file:
+            json.dump(sessions, file, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+class KeyringSessionCache(SessionCache):
+    def __init__(
+        self,
+        service_name: str = "seed-salesforce",
+        lock_path: Optional[Union[str, Path]] = None,
+        **kwargs,
+    ) -> None:
+        """Session cache kept in the keyring of the operating system. Requires keyring.
+
+        Args:
+            service_name (str, optional): keyring service to store the sessions under. Defaults to "seed-salesforce".
+            lock_path (str | Path, optional): path of the lock file. Defaults to a file in the temporary directory.
+            **kwargs: additional parameters to pass to `SessionCache`, e.g., max_age
+        """
+        try:
+            import keyring
+        except ImportError as e:
+            raise ImportError(
+                "Caching sessions in the keyring requires keyring, install it with `pip install keyring`",
+            ) from e
+
+        self._keyring = keyring
+        self.service_name = service_name
+        super().__init__(lock_path or Path(tempfile.gettempdir()) / f"{service_name}-session.lock", **kwargs)
+
+    def _load(self, key: str) -> Optional[str]:
+        return self._keyring.get_password(self.service_name, key)
+
+    def _save(self, key: str, value: str) -> None:
+        self._keyring.set_password(self.service_name, key, value)
+
+    def _delete(self, key: str) -> None:
+        with contextlib.suppress(self._keyring.errors.PasswordDeleteError):
+            self._keyring.delete_password(self.service_name, key)
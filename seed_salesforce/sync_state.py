@@ -0,0 +1,154 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import datetime
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Union
+
+# objects that `SalesforceClient.iter_changes` syncs by default
+SYNC_OBJECTS = ("Property__c", "Benchmark__c", "Account", "Contact")
+
+
+def parse_datetime(value: str) -> datetime.datetime:
+    """Parse a datetime returned by the REST API, e.g., 2024-01-02T03:04:05.000+0000"""
+    return datetime.datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f%z")
+
+
+@dataclass
+class ChangeEvent:
+    """A record that was created, updated or deleted since the last sync
+
+    `record` holds the queried fields of the record, flattened like the records of
+    `SalesforceClient.iter_query`.
+    """
+
+    object_name: str
+    record_id: str
+    system_modstamp: datetime.datetime
+    deleted: bool = False
+    record: dict = field(default_factory=dict)
+
+
+class SyncState(ABC):
+    """Base class of the stores of the per-object high-water marks of an incremental sync.
+
+    A high-water mark is the latest SystemModstamp that was synced for an object. Subclasses
+    implement `_load`, `_save` and `_delete`.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+
+    def get(self, object_name: str) -> Optional[datetime.datetime]:
+        """Return the high-water mark of an object, or None if it was never synced
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Property__c
+
+        Returns:
+            datetime | None: latest synced SystemModstamp, in UTC
+        """
+        with self._lock:
+            value = self._load(object_name)
+        return datetime.datetime.fromisoformat(value) if value else None
+
+    def set(self, object_name: str, mark: datetime.datetime) -> None:
+        """Save the high-water mark of an object
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Property__c
+            mark (datetime): latest synced SystemModstamp, must be timezone aware
+        """
+        with self._lock:
+            self._save(object_name, mark.astimezone(datetime.timezone.utc).isoformat())
+
+    def reset(self, object_name: str) -> None:
+        """Forget the high-water mark of an object so that the next sync reads all its records
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Property__c
+        """
+        with self._lock:
+            self._delete(object_name)
+
+    @abstractmethod
+    def _load(self, object_name: str) -> Optional[str]:
+        """Return the stored high-water mark of an object in ISO format, or None if there is none"""
+
+    @abstractmethod
+    def _save(self, object_name: str, value: str) -> None:
+        """Store the high-water mark of an object in ISO format"""
+
+    @abstractmethod
+    def _delete(self, object_name: str) -> None:
+        """Remove the high-water mark of an object, if there is one"""
+
+
+class JSONSyncState(SyncState):
+    def __init__(self, path: Union[str, Path]) -> None:
+        """Sync state kept in a JSON file of {object_name: high-water mark}, rewritten atomically on every change
+
+        Args:
+            path (str | Path): path of the JSON file, created on the first save
+        """
+        super().__init__()
+        self.path = Path(path)
+        self._marks: dict = json.loads(self.path.read_text()) if self.path.exists() else {}
+
+    def _load(self, object_name: str) -> Optional[str]:
+        return self._marks.get(object_name)
+
+    def _save(self, object_name: str, value: str) -> None:
+        self._marks[object_name] = value
+        self._write()
+
+    def _delete(self, object_name: str) -> None:
+        if self._marks.pop(object_name, None) is not None:
+            self._write()
+
+    def _write(self) -> None:
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        tmp_path.write_text(json.dumps(self._marks, indent=2, sort_keys=True))
+        os.replace(tmp_path, self.path)
+
+
+class SQLiteSyncState(SyncState):
+    def __init__(self, path: Union[str, Path]) -> None:
+        """Sync state kept in a SQLite database, e.g., alongside a SQLite record cache or index
+
+        Args:
+            path (str | Path): path of the SQLite database
+        """
+        super().__init__()
+        self._connection = sqlite3.connect(str(path), check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS sync_state (object_name TEXT PRIMARY KEY, high_water_mark TEXT NOT NULL)",
+            )
+
+    def close(self) -> None:
+        """Close the database connection"""
+        self._connection.close()
+
+    def _load(self, object_name: str) -> Optional[str]:
+        row = self._connection.execute(
+            "SELECT high_water_mark FROM sync_state WHERE object_name = ?",
+            (object_name,),
+        ).fetchone()
+        return row[0] if row else None
+
+    def _save(self, object_name: str, value: str) -> None:
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO sync_state (object_name, high_water_mark) VALUES (?, ?)",
+                (object_name, value),
+            )
+
+    def _delete(self, object_name: str) -> None:
+        with self._connection:
+            self._connection.execute("DELETE FROM sync_state WHERE object_name = ?", (object_name,))
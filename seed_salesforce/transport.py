@@ -0,0 +1,88 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import logging
+import socket
+import time
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+from seed_salesforce.governor import ApiGovernor
+from seed_salesforce.retry import RetryPolicy
+
+_log = logging.getLogger(__name__)
+
+# matches the default number of workers of `SalesforceClient.map_concurrent`
+DEFAULT_POOL_SIZE = 10
+
+
+class SalesforceHTTPAdapter(HTTPAdapter):
+    def __init__(
+        self,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        governor: Optional[ApiGovernor] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        **kwargs,
+    ) -> None:
+        """Transport adapter for the Salesforce session.
+
+        Keeps up to `pool_size` connections open to the instance so that concurrent calls
+        reuse connections instead of opening (and TLS negotiating) a new one per request,
+        and enables TCP keep-alive so idle pooled connections survive long bulk job polls.
+        If a governor is given, every request waits for it and reports its API usage to it.
+        If a retry policy is given, requests that fail with a transient error are retried.
+
+        Args:
+            pool_size (int, optional): number of connections to keep per host. Defaults to 10.
+            governor (ApiGovernor, optional): throttle of the requests. Defaults to None.
+            retry_policy (RetryPolicy, optional): retries of the transient errors. Defaults to None.
+            **kwargs: additional parameters to pass to `HTTPAdapter`, e.g., max_retries
+        """
+        self.pool_size = pool_size
+        self.governor = governor
+        self.retry_policy = retry_policy
+        super().__init__(pool_connections=pool_size, pool_maxsize=pool_size, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        kwargs.setdefault(
+            "socket_options",
+            [*HTTPConnection.default_socket_options, (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)],
+        )
+        super().init_poolmanager(*args, **kwargs)
+
+    def send(self, request, *args, **kwargs):
+        policy = self.retry_policy
+        # streamed request bodies, e.g., file uploads, can't be sent twice
+        retryable = policy is not None and not hasattr(request.body, "read")
+        attempt = 1
+        while True:
+            if self.governor is not None:
+                self.governor.acquire()
+            if policy is not None:
+                policy.record_request()
+
+            try:
+                response = super().send(request, *args, **kwargs)
+            except requests.exceptions.RequestException as e:
+                error_class = policy.classify_exception(e) if retryable else None
+                if not retryable or not policy.should_retry(error_class, request.method, attempt):
+                    raise
+                delay = policy.backoff(attempt)
+            else:
+                if self.governor is not None:
+                    self.governor.update_from_header(response.headers.get("Sforce-Limit-Info"))
+                error_class = policy.classify_response(response) if retryable else None
+                if not retryable or not policy.should_retry(error_class, request.method, attempt):
+                    # read by the response hook of `ClientMetrics` to count the retries
+                    response.attempts = attempt
+                    return response
+                delay = policy.backoff(attempt, policy.retry_after(response))
+                response.close()
+
+            _log.info(
+                f"Retrying {request.method} {request.path_url} in {delay:.1f}s after {error_class} (attempt {attempt})",
+            )
+            time.sleep(delay)
+            attempt += 1
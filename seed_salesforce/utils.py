@@ -0,0 +1,242 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import csv
+import datetime
+import io
+from collections import defaultdict, deque
+from collections.abc import Iterable, Iterator
+from decimal import Decimal
+from itertools import islice
+from pathlib import Path
+from typing import Any, Optional, Union
+
+
+def format_soql(query: str, *args, **kwargs) -> str:
+    """Format a SOQL query with `simple_salesforce.format_soql`, which quotes and escapes the values.
+
+    simple_salesforce is imported on the first call so that importing this package stays fast.
+
+    Args:
+        query (str): query with str.format placeholders, e.g., "SELECT Id FROM Account WHERE Name = {}"
+        *args: values of the positional placeholders
+        **kwargs: values of the named placeholders
+
+    Returns:
+        str: SOQL query
+    """
+    from simple_salesforce import format_soql as simple_salesforce_format_soql
+
+    return simple_salesforce_format_soql(query, *args, **kwargs)
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    """Lazily split an iterable into lists of at most `size` items.
+
+    Args:
+        iterable (Iterable): items to split
+        size (int): maximum number of items per chunk
+
+    Returns:
+        Iterator[list]: chunks of the iterable, the last one may be shorter
+    """
+    if size < 1:
+        raise ValueError(f"Chunk size must be a positive integer, got {size}")
+
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def flatten_record(record: dict, prefix: str = "") -> dict:
+    """Flatten a record returned by a SOQL query into a plain dict.
+
+    The "attributes" envelope is dropped, parent relationships are flattened into dotted
+    keys (e.g., {"Account": {"Name": "x"}} becomes {"Account.Name": "x"}), and child
+    relationship subqueries become lists of flattened records.
+
+    Args:
+        record (dict): record as returned by the REST API
+        prefix (str, optional): prefix of the keys, used for the relationships. Defaults to "".
+
+    Returns:
+        dict: flattened record
+    """
+    flat: dict = {}
+    for key, value in record.items():
+        if key == "attributes":
+            continue
+        if isinstance(value, dict) and "records" in value:
+            flat[f"{prefix}{key}"] = [flatten_record(child) for child in value["records"]]
+        elif isinstance(value, dict):
+            flat.update(flatten_record(value, prefix=f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def split_call_args(item: Any) -> tuple:
+    """Turn an item of a batch of calls into the positional and keyword arguments of the call.
+
+    A dict is passed as keyword arguments, a tuple as positional arguments and anything
+    else as the single positional argument.
+
+    Args:
+        item (Any): arguments of a single call
+
+    Returns:
+        tuple: (args, kwargs)
+    """
+    if isinstance(item, dict):
+        return (), item
+    if isinstance(item, tuple):
+        return item, {}
+    return (item,), {}
+
+
+def to_csv_value(value: Any) -> str:
+    """Convert a Python value into the string format that the Bulk API expects in a CSV cell.
+
+    Note that an empty cell leaves the field unchanged on update/upsert; pass "#N/A" to
+    explicitly null a field.
+
+    Args:
+        value (Any): value to convert
+
+    Returns:
+        str: CSV cell value
+    """
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return format(value, "f")
+    return str(value)
+
+
+def records_to_csv_batches(records: Iterable[dict], batch_size: int, max_bytes: int) -> Iterator[str]:
+    """Serialize records into CSV documents of at most `batch_size` rows and roughly `max_bytes` bytes.
+
+    The header of each document is the union of the keys of the records in that
+    document, in order of first appearance. Only one chunk of records is held in
+    memory at a time.
+
+    Args:
+        records (Iterable[dict]): records to serialize
+        batch_size (int): maximum number of rows per CSV document
+        max_bytes (int): maximum size of a CSV document in bytes (UTF-8 encoded)
+
+    Returns:
+        Iterator[str]: CSV documents, each including the header row
+    """
+    for chunk in chunked(records, batch_size):
+        header = list(dict.fromkeys(key for record in chunk for key in record))
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(header)
+        header_size = size = len(buffer.getvalue().encode("utf-8"))
+        for record in chunk:
+            row = io.StringIO()
+            csv.writer(row, lineterminator="\n").writerow([to_csv_value(record.get(key)) for key in header])
+            row_text = row.getvalue()
+            row_size = len(row_text.encode("utf-8"))
+            if size + row_size > max_bytes and size > header_size:
+                # current document is full, emit it and start a new one with the same header
+                yield buffer.getvalue()
+                buffer = io.StringIO()
+                writer = csv.writer(buffer, lineterminator="\n")
+                writer.writerow(header)
+                size = header_size
+            buffer.write(row_text)
+            size += row_size
+        yield buffer.getvalue()
+
+
+def bulk_results_in_order(records: list, results: list) -> list:
+    """Order the results of Bulk API 2.0 ingest jobs, which list the successful records first, like the records.
+
+    The results echo the submitted CSV row of each record, they are matched to the records on these values.
+    Identical records are interchangeable, they keep the order of their results.
+
+    Args:
+        records (list): submitted records
+        results (list[RecordResult]): results of the jobs that the records were submitted with
+
+    Returns:
+        list[RecordResult]: one result per record, in the order of the records. Results that don't match a record,
+            e.g., because Salesforce reformatted a value, take the places left, in the order they were returned.
+    """
+
+    def row_key(record: dict) -> tuple:
+        # empty cells are missing from the records, but present in the rows of the results
+        return tuple(sorted((name, cell) for name, value in record.items() if (cell := to_csv_value(value)) != ""))
+
+    positions: dict = defaultdict(deque)
+    for index, record in enumerate(records):
+        positions[row_key(record)].append(index)
+
+    ordered: list = [None] * len(records)
+    unmatched = []
+    for result in results:
+        indexes = positions.get(row_key(result.record))
+        if indexes:
+            ordered[indexes.popleft()] = result
+        else:
+            unmatched.append(result)
+    remaining = iter(unmatched)
+    ordered = [result if result is not None else next(remaining, None) for result in ordered]
+    return [result for result in ordered if result is not None] + list(remaining)
+
+
+def csv_to_parquet(
+    csv_path: Union[str, Path],
+    parquet_path: Union[str, Path],
+    field_types: Optional[dict] = None,
+) -> None:
+    """Convert a CSV file exported from Salesforce to Parquet, one block at a time.
+
+    The columns are typed with the Salesforce field types (from `describe`), columns
+    without a known type, e.g., relationship fields, are kept as strings. Requires pyarrow.
+
+    Args:
+        csv_path (str | Path): CSV file with a header row
+        parquet_path (str | Path): Parquet file to write
+        field_types (dict, optional): Salesforce field type by column name, e.g., {"Amount": "currency"}
+    """
+    try:
+        import pyarrow as pa
+        from pyarrow import csv as pa_csv
+        from pyarrow import parquet as pq
+    except ImportError as e:
+        raise ImportError("Exporting to Parquet requires pyarrow, install it with `pip install pyarrow`") from e
+
+    arrow_types = {
+        "boolean": pa.bool_(),
+        "int": pa.int64(),
+        "double": pa.float64(),
+        "currency": pa.float64(),
+        "percent": pa.float64(),
+        "date": pa.date32(),
+        "datetime": pa.timestamp("ms", tz="UTC"),
+    }
+    with open(csv_path, "rb") as f:
+        columns = next(csv.reader(io.TextIOWrapper(f, encoding="utf-8")), [])
+    field_types = field_types or {}
+    column_types = {column: arrow_types.get(field_types.get(column), pa.string()) for column in columns}
+
+    reader = pa_csv.open_csv(
+        str(csv_path),
+        convert_options=pa_csv.ConvertOptions(
+            column_types=column_types,
+            strings_can_be_null=True,
+            timestamp_parsers=[pa_csv.ISO8601],
+        ),
+    )
+    with pq.ParquetWriter(str(parquet_path), reader.schema) as writer:
+        for batch in reader:
+            writer.write_batch(batch)
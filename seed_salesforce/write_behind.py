@@ -0,0 +1,231 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+from seed_salesforce.results import RecordResult
+
+_log = logging.getLogger(__name__)
+
+DEFAULT_WRITE_BEHIND_MAX_RECORDS = 1000
+DEFAULT_WRITE_BEHIND_MAX_DELAY = 2.0
+DEFAULT_WRITE_BEHIND_BULK_THRESHOLD = 2000
+
+
+class _PendingWrite:
+    """Coalesced field values of the queued updates of a record, and the futures of the updates"""
+
+    def __init__(self) -> None:
+        self.fields: dict = {}
+        self.futures: list = []
+
+
+class WriteBehindQueue:
+    def __init__(
+        self,
+        max_records: int = DEFAULT_WRITE_BEHIND_MAX_RECORDS,
+        max_delay: Optional[float] = DEFAULT_WRITE_BEHIND_MAX_DELAY,
+        bulk_threshold: int = DEFAULT_WRITE_BEHIND_BULK_THRESHOLD,
+        on_result: Optional[Callable[[RecordResult], None]] = None,
+    ) -> None:
+        """Buffer of record updates that coalesces the pending updates of the same record into one write.
+
+        Each update is merged into the pending update of its (object, Id), the later values of a field
+        replacing the earlier ones. The pending updates are written with the sObject Collections API
+        (Bulk API 2.0 from `bulk_threshold` records of an object) when `max_records` records are pending,
+        in the thread submitting the last one, when the oldest update has waited `max_delay` seconds, in
+        a background thread, or on `flush`. Call `close` (or use the queue as a context manager) to write
+        the updates still pending before exiting.
+
+        Args:
+            max_records (int, optional): number of pending records to write at. Defaults to 1000.
+            max_delay (float, optional): seconds an update waits at most before it is written, None to only
+                write on size or `flush`. Defaults to 2.
+            bulk_threshold (int, optional): number of records of an object to write with Bulk API 2.0 at.
+                Defaults to 2000.
+            on_result (Callable, optional): called with the RecordResult of each written record, e.g.,
+                to log the failures. Defaults to None.
+        """
+        if max_records < 1:
+            raise ValueError(f"max_records must be a positive integer, got {max_records}")
+
+        self.max_records = max_records
+        self.max_delay = max_delay
+        self.bulk_threshold = bulk_threshold
+        self.on_result = on_result
+        # called with (object name, {Id: fields}, use bulk) and returns {Id: RecordResult}, set by the client
+        # the queue is passed to
+        self.writer: Optional[Callable] = None
+
+        self.submitted = 0
+        self.coalesced = 0
+        self.written = 0
+        self.flushes = 0
+
+        self._pending: OrderedDict = OrderedDict()
+        self._oldest: Optional[float] = None
+        self._closed = False
+        self._condition = threading.Condition()
+        # flushes run one at a time, so the writes of a record are applied in the order they were queued.
+        # Reentrant for the callbacks of the futures that queue more updates.
+        self._flush_lock = threading.RLock()
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        """Number of records with pending updates"""
+        return len(self._pending)
+
+    def __enter__(self) -> "WriteBehindQueue":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def submit(
+        self,
+        object_name: str,
+        record_id: str,
+        fields: dict,
+        callback: Optional[Callable[[Future], None]] = None,
+    ) -> Future:
+        """Queue an update of a record
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Property__c
+            record_id (str): Id of the record
+            fields (dict): field values to update
+            callback (Callable, optional): called with the future once the record is written. Defaults to None.
+
+        Raises:
+            RuntimeError: The queue is closed or not attached to a client
+
+        Returns:
+            Future: resolves to the RecordResult of the coalesced write of the record, or raises the error
+                of the request that failed
+        """
+        if self.writer is None:
+            raise RuntimeError("The write-behind queue must be passed to a SalesforceClient before use")
+
+        future: Future = Future()
+        if callback is not None:
+            future.add_done_callback(callback)
+
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The write-behind queue is closed")
+            key = (object_name, record_id)
+            if key in self._pending:
+                self.coalesced += 1
+            else:
+                self._pending[key] = _PendingWrite()
+            self._pending[key].fields.update(fields)
+            self._pending[key].futures.append(future)
+            self.submitted += 1
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+                self._condition.notify()
+            full = len(self._pending) >= self.max_records
+            self._start_thread()
+
+        if full:
+            self.flush()
+        return future
+
+    def flush(self) -> list:
+        """Write the pending updates now
+
+        Returns:
+            list[RecordResult]: one result per written record. Records of an object whose write failed as
+                a whole have no result, their futures raise the error.
+        """
+        with self._flush_lock:
+            with self._condition:
+                pending, self._pending = self._pending, OrderedDict()
+                self._oldest = None
+            if not pending:
+                return []
+
+            by_object: dict = {}
+            for (object_name, record_id), write in pending.items():
+                by_object.setdefault(object_name, {})[record_id] = write
+
+            results = []
+            for object_name, writes in by_object.items():
+                results.extend(self._write(object_name, writes))
+            self.flushes += 1
+            return results
+
+    def close(self) -> None:
+        """Write the pending updates and stop the background thread"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def metrics(self) -> dict:
+        """Counts of the queued updates, the written records and the flushes"""
+        return {
+            "submitted": self.submitted,
+            "written": self.written,
+            "coalesced": self.coalesced,
+            "pending": len(self._pending),
+            "flushes": self.flushes,
+        }
+
+    def _write(self, object_name: str, writes: dict) -> list:
+        updates = {record_id: write.fields for record_id, write in writes.items()}
+        try:
+            outcomes = self.writer(object_name, updates, len(updates) >= self.bulk_threshold)
+        except Exception as e:
+            _log.warning(f"Failed to write {len(updates)} pending {object_name} updates: {e}")
+            for write in writes.values():
+                for future in write.futures:
+                    future.set_exception(e)
+            return []
+
+        results = []
+        for record_id, write in writes.items():
+            result = outcomes.get(record_id) or RecordResult(
+                success=False,
+                record_id=record_id,
+                errors=["No result was returned for the record"],
+                record={"Id": record_id, **write.fields},
+            )
+            self.written += 1
+            for future in write.futures:
+                future.set_result(result)
+            if self.on_result is not None:
+                try:
+                    self.on_result(result)
+                except Exception:
+                    # the background thread must keep writing
+                    _log.exception(f"on_result failed for {object_name} {record_id}")
+            results.append(result)
+        return results
+
+    def _start_thread(self) -> None:
+        """Start the thread writing the updates after `max_delay`, called with the condition held"""
+        if self.max_delay is None or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="seed-salesforce-write-behind", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if self._closed:
+                    return
+                if self._oldest is None:
+                    self._condition.wait()
+                    continue
+                remaining = self._oldest + self.max_delay - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+            self.flush()
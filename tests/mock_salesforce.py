@@ -0,0 +1,1074 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import argparse
+import csv
+import datetime
+import io
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from seed_salesforce.salesforce_client import SalesforceClient
+from seed_salesforce.transport import SalesforceHTTPAdapter
+
+# objects of the org and the type of their fields, besides the system fields every object has
+DEFAULT_OBJECTS = {
+    "Account": {"Name": "string", "BillingCity": "string"},
+    "Contact": {"FirstName": "string", "LastName": "string", "Email": "email", "AccountId": "reference"},
+    "Property__c": {"Name": "string", "Gross_Floor_Area__c": "double", "Property_Type__c": "picklist"},
+    "Benchmark__c": {
+        "Name": "string",
+        "Salesforce_Benchmark_ID__c": "string",
+        "ENERGY_STAR_Score__c": "double",
+        "Site_EUI__c": "double",
+        "Year_Ending__c": "date",
+        "Property__c": "reference",
+    },
+}
+# deleted records are not kept, IsDeleted is always false
+SYSTEM_FIELDS = {"Id": "id", "IsDeleted": "boolean", "SystemModstamp": "datetime"}
+KEY_PREFIXES = {"Account": "001", "Contact": "003"}
+# number of records per page of the query results, Salesforce's default
+DEFAULT_PAGE_SIZE = 2000
+DEFAULT_DAILY_API_LIMIT = 100000
+# connections the transport adapter of `mock_client` keeps open, enough for the concurrent benchmarks
+MOCK_POOL_SIZE = 32
+NUMBER_TYPES = ("double", "currency", "percent")
+
+API_PATH = re.compile(r"^/services/data/(?P<version>v\d+\.\d+)/(?P<resource>.*)$")
+SOAP_LOGIN_PATH = re.compile(r"^/services/Soap/u/\d+\.\d+$")
+# host of the SOAP login of simple_salesforce, for the default "login" domain
+LOGIN_URL = "https://login.salesforce.com"
+MOCK_SESSION_ID = "mock-session"
+SOQL = re.compile(
+    r"^\s*SELECT\s+(?P<fields>.+?)\s+FROM\s+(?P<object>\w+)"
+    r"(?:\s+WHERE\s+(?P<where>.+?))?"
+    r"(?:\s+ORDER\s+BY\s+(?P<order>\w+)(?:\s+(?P<direction>ASC|DESC))?)?"
+    r"(?:\s+LIMIT\s+(?P<limit>\d+))?\s*$",
+    flags=re.IGNORECASE | re.DOTALL,
+)
+SOQL_CONDITION = re.compile(
+    r"\s*(?P<field>\w+)\s*(?P<operator>!=|>=|<=|=|>|<|\bIN\b)\s*(?P<value>\([^)]*\)|'(?:[^'\\]|\\.)*'|[^\s)]+)\s*",
+    flags=re.IGNORECASE,
+)
+SOQL_AND = re.compile(r"AND\b", flags=re.IGNORECASE)
+SOQL_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|[^,\s]+")
+REFERENCE = re.compile(r"@\{(?P<reference_id>\w+)\.(?P<path>[\w.\[\]]+)\}")
+BULK_RESULT_PATHS = ("successfulResults", "failedResults", "unprocessedrecords")
+COMPARISONS = {
+    "=": lambda value, literal: value == literal,
+    "!=": lambda value, literal: value != literal,
+    ">": lambda value, literal: value is not None and value > literal,
+    ">=": lambda value, literal: value is not None and value >= literal,
+    "<": lambda value, literal: value is not None and value < literal,
+    "<=": lambda value, literal: value is not None and value <= literal,
+    "IN": lambda value, literal: value in literal,
+}
+
+
+class MockError(Exception):
+    """Error response of the mock, returned as the [{"message": ..., "errorCode": ...}] body of Salesforce"""
+
+    def __init__(self, status: int, error_code: str, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+        self.error_code = error_code
+        self.message = message
+
+    def body(self) -> list:
+        return [{"message": self.message, "errorCode": self.error_code, "fields": []}]
+
+
+@dataclass
+class MockRequest:
+    """Request to an API resource, e.g., the sobjects/Account/ resource of /services/data/v59.0/sobjects/Account/"""
+
+    method: str
+    resource: str
+    version: str
+    params: dict = field(default_factory=dict)
+    headers: Any = field(default_factory=dict)
+    body: bytes = b""
+
+    def json(self) -> Any:
+        return json.loads(self.body or b"null")
+
+
+def _now() -> str:
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return f"{now:%Y-%m-%dT%H:%M:%S}.{now.microsecond // 1000:03d}+0000"
+
+
+def _casefold(value: Any) -> Any:
+    # Salesforce compares text case-insensitively
+    return value.casefold() if isinstance(value, str) else value
+
+
+def _parse_literal(literal: str) -> Any:
+    """Return the Python value of a SOQL literal, e.g., 'O\\'Brien', 12.5, true, null or 2024-01-01T00:00:00Z"""
+    if literal.startswith("'"):
+        return re.sub(r"\\(.)", r"\1", literal[1:-1])
+    if literal.startswith("("):
+        return {_casefold(_parse_literal(item)) for item in SOQL_LITERAL.findall(literal[1:-1])}
+    keywords = {"null": None, "true": True, "false": False}
+    if literal.lower() in keywords:
+        return keywords[literal.lower()]
+    try:
+        return float(literal)
+    except ValueError:
+        return literal
+
+
+def _csv_value(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return str(value).lower()
+    return str(value)
+
+
+def _to_csv(rows: list, columns: list) -> str:
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=columns, lineterminator="\n", extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows({column: _csv_value(row.get(column)) for column in columns} for row in rows)
+    return output.getvalue()
+
+
+class MockSalesforce:
+    def __init__(
+        self,
+        objects: Optional[dict] = None,
+        seed: int = 0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        **settings,
+    ) -> None:
+        """Local stand-in for the REST query, sObject, Composite and Bulk API 2.0 endpoints that `SalesforceClient`
+        uses, served over HTTP from a background thread, for offline tests and benchmarks.
+
+            with MockSalesforce(latency=0.02) as mock:
+                mock.seed("Contact", [{"LastName": "Hendricks", "Email": "richard@example.com"}])
+                sf = mock.client()
+                sf.find_contacts_by_emails(["richard@example.com"])
+                mock.stats()["requests"]
+
+        Records are kept in memory and bulk jobs complete as soon as their upload is complete. Queries support
+        `WHERE` conditions joined with AND (=, !=, <, <=, >, >= and IN), `ORDER BY` a single field and `LIMIT`.
+
+        Args:
+            objects (dict, optional): fields types by field name of each object, added to `DEFAULT_OBJECTS`.
+                Defaults to None.
+            seed (int, optional): seed of the random injection of errors. Defaults to 0.
+            host (str, optional): address to listen on. Defaults to 127.0.0.1.
+            port (int, optional): port to listen on. Defaults to 0, for any free port.
+            **settings: initial settings, which `configure` changes later:
+                latency (float): seconds to wait before answering each request. Defaults to 0.
+                page_size (int): maximum number of records per page of the query results. Defaults to 2000.
+                error_rate (float): share of the requests that fail with `error_status`. Defaults to 0.
+                error_status (int): HTTP status of the injected errors. Defaults to 503.
+                error_code (str): Salesforce error code of the injected errors. Defaults to SERVER_UNAVAILABLE.
+                daily_api_limit (int): daily API requests reported in /limits and Sforce-Limit-Info.
+                    Defaults to 100000.
+        """
+        self.objects = {
+            name: {**SYSTEM_FIELDS, **fields} for name, fields in {**DEFAULT_OBJECTS, **(objects or {})}.items()
+        }
+        self.latency = 0.0
+        self.page_size = DEFAULT_PAGE_SIZE
+        self.error_rate = 0.0
+        self.error_status = 503
+        self.error_code = "SERVER_UNAVAILABLE"
+        self.daily_api_limit = DEFAULT_DAILY_API_LIMIT
+        self.configure(**settings)
+        self.last_modified = formatdate(usegmt=True)
+
+        self._random = random.Random(seed)  # noqa: S311
+        self._lock = threading.RLock()
+        self._ids = itertools.count(1)
+        self._injected_errors: list = []
+        self._undo: Optional[list] = None
+        self.reset()
+
+        self._server = ThreadingHTTPServer((host, port), _MockRequestHandler)
+        self._server.daemon_threads = True
+        self._server.mock = self
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "MockSalesforce":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    @property
+    def instance_url(self) -> str:
+        """URL to pass to the client as its "instance_url", e.g., http://127.0.0.1:50123"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> None:
+        """Serve the requests from a background thread"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop serving and close the socket"""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def serve_forever(self) -> None:
+        """Serve the requests from this thread until interrupted"""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def client(self, login: bool = False, **kwargs) -> SalesforceClient:
+        """Return a client connected to the mock, see `mock_client`"""
+        return mock_client(self.instance_url, login=login, **kwargs)
+
+    def reset(self) -> None:
+        """Forget the records, the bulk jobs, the query cursors and the request counts"""
+        with self._lock:
+            self.records: dict = {name: {} for name in self.objects}
+            self.jobs: dict = {}
+            self.cursors: dict = {}
+            self.requests: Counter = Counter()
+            self.errors = 0
+
+    def stats(self) -> dict:
+        """Return the number of API requests served, in total and by endpoint, and of the errors injected
+
+        Returns:
+            dict: {"requests": int, "by_endpoint": {"GET query": int, ...}, "errors": int}
+        """
+        with self._lock:
+            return {
+                "requests": sum(self.requests.values()),
+                "by_endpoint": dict(sorted(self.requests.items())),
+                "errors": self.errors,
+            }
+
+    def configure(self, **settings) -> None:
+        """Change the latency, page size or error injection settings, e.g., configure(latency=0.05)"""
+        for name, value in settings.items():
+            if name not in ("latency", "page_size", "error_rate", "error_status", "error_code", "daily_api_limit"):
+                raise ValueError(f"Unknown mock setting: {name}")
+            setattr(self, name, value)
+
+    def inject_error(
+        self,
+        status: int = 503,
+        error_code: str = "SERVER_UNAVAILABLE",
+        message: str = "Injected error",
+        count: int = 1,
+        resource: str = "",
+    ) -> None:
+        """Fail the next `count` requests to the resources starting with `resource`, e.g., "composite/sobjects"
+
+        Args:
+            status (int, optional): HTTP status of the responses. Defaults to 503.
+            error_code (str, optional): Salesforce error code of the responses. Defaults to SERVER_UNAVAILABLE.
+            message (str, optional): error message. Defaults to "Injected error".
+            count (int, optional): number of requests to fail. Defaults to 1.
+            resource (str, optional): prefix of the resources to fail, relative to the API version.
+                Defaults to "", for all the resources.
+        """
+        with self._lock:
+            self._injected_errors.append(
+                {"error": MockError(status, error_code, message), "count": count, "resource": resource},
+            )
+
+    def seed(self, object_name: str, records: list) -> list:
+        """Add records directly, without counting requests, setting their Id unless they have one
+
+        Args:
+            object_name (str): Name of the salesforce object, e.g., Contact
+            records (list): field values of the records
+
+        Returns:
+            list[str]: Ids of the records
+        """
+        with self._lock:
+            ids = []
+            for record in records:
+                record_id = record.get("Id") or self._new_id(object_name)
+                self.records[object_name][record_id] = {
+                    **self._check_fields(object_name, record),
+                    "Id": record_id,
+                    "IsDeleted": False,
+                    "SystemModstamp": _now(),
+                }
+                ids.append(record_id)
+            return ids
+
+    def handle(self, method: str, path: str, headers: Any, body: bytes) -> tuple:
+        """Answer a request, see `_MockRequestHandler`
+
+        Returns:
+            tuple: (status, body, headers), the body is JSON data, a CSV document or None
+        """
+        url = urlsplit(path)
+        params = dict(parse_qsl(url.query))
+        if url.path.startswith("/mock/"):
+            return self._admin(method, url.path, body)
+        if method == "POST" and SOAP_LOGIN_PATH.match(url.path):
+            return self._login()
+
+        match = API_PATH.match(url.path)
+        resource = match.group("resource") if match else url.path
+        with self._lock:
+            self.requests[f"{method} {self._endpoint(resource)}"] += 1
+            used = sum(self.requests.values())
+        headers_out = {"Sforce-Limit-Info": f"api-usage={used}/{self.daily_api_limit}"}
+        if self.latency:
+            time.sleep(self.latency)
+
+        try:
+            self._raise_injected_error(resource)
+            if match is None:
+                raise MockError(404, "NOT_FOUND", f"The requested resource does not exist: {url.path}")
+            request = MockRequest(method, resource, match.group("version"), params, headers, body)
+            with self._lock:
+                status, payload, response_headers = self._dispatch(request)
+        except MockError as e:
+            return e.status, e.body(), headers_out
+        return status, payload, {**headers_out, **response_headers}
+
+    def _login(self) -> tuple:
+        """Answer the SOAP login of simple_salesforce with a session on this mock, whatever the credentials"""
+        with self._lock:
+            self.requests["POST login"] += 1
+        body = (
+            '<?xml version="1.0" encoding="UTF-8"?><soapenv:Envelope '
+            'xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/"><soapenv:Body><loginResponse><result>'
+            f"<serverUrl>{self.instance_url}/services/Soap/u/59.0</serverUrl>"
+            f"<sessionId>{MOCK_SESSION_ID}</sessionId>"
+            "</result></loginResponse></soapenv:Body></soapenv:Envelope>"
+        )
+        return 200, body, {"Content-Type": "text/xml"}
+
+    @staticmethod
+    def _endpoint(resource: str) -> str:
+        """Name of the endpoint of a resource in the stats, e.g., sobjects for sobjects/Account/001..."""
+        parts = resource.strip("/").split("/")
+        if parts[0] in ("composite", "jobs") and len(parts) > 1:
+            return "/".join(parts[:2])
+        return parts[0]
+
+    def _raise_injected_error(self, resource: str) -> None:
+        with self._lock:
+            for injected in self._injected_errors:
+                if injected["count"] > 0 and resource.startswith(injected["resource"]):
+                    injected["count"] -= 1
+                    self.errors += 1
+                    raise injected["error"]
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.errors += 1
+                raise MockError(self.error_status, self.error_code, "Injected error")
+
+    def _admin(self, method: str, path: str, body: bytes) -> tuple:
+        """Control the mock from another process: GET /mock/stats, POST /mock/reset, POST /mock/config with the
+        settings of `configure` and POST /mock/records/<object> with a list of records to `seed`
+        """
+        actions = {
+            ("GET", "/mock/stats"): lambda: (200, self.stats()),
+            ("POST", "/mock/reset"): lambda: (204, self.reset()),
+            ("POST", "/mock/config"): lambda: (204, self.configure(**json.loads(body))),
+        }
+        try:
+            if method == "POST" and path.startswith("/mock/records/"):
+                object_name = path.removeprefix("/mock/records/")
+                self._check_object(object_name)
+                return 201, {"ids": self.seed(object_name, json.loads(body))}, {}
+            if (method, path) not in actions:
+                raise MockError(404, "NOT_FOUND", f"Unknown mock resource {method} {path}")
+            status, payload = actions[(method, path)]()
+        except ValueError as e:
+            return 400, [{"message": str(e), "errorCode": "INVALID_MOCK_REQUEST", "fields": []}], {}
+        except MockError as e:
+            return e.status, e.body(), {}
+        return status, payload, {}
+
+    def _dispatch(self, request: MockRequest) -> tuple:
+        resource = request.resource.strip("/")
+        for method, pattern, handler in ROUTES:
+            match = re.fullmatch(pattern, resource)
+            if match and method == request.method:
+                status, payload, *headers = getattr(self, handler)(request, *match.groups())
+                return status, payload, headers[0] if headers else {}
+        raise MockError(404, "NOT_FOUND", f"The requested resource does not exist: {request.method} {resource}")
+
+    # records
+
+    def _new_id(self, object_name: str) -> str:
+        prefix = KEY_PREFIXES.get(object_name, f"a{sorted(self.objects).index(object_name):02d}")
+        # like Salesforce Ids, unique in their first 15 characters, with a 3 character suffix
+        return f"{prefix}{next(self._ids):012d}AAA"
+
+    def _check_object(self, object_name: str) -> dict:
+        if object_name not in self.objects:
+            raise MockError(404, "NOT_FOUND", f"The requested resource does not exist: sObject type '{object_name}'")
+        return self.objects[object_name]
+
+    def _field_name(self, object_name: str, name: str) -> str:
+        """Return the name of a field as described, field names are case-insensitive"""
+        for field_name in self._check_object(object_name):
+            if field_name.casefold() == name.casefold():
+                return field_name
+        raise MockError(400, "INVALID_FIELD", f"No such column '{name}' on entity '{object_name}'")
+
+    def _check_fields(self, object_name: str, record: dict) -> dict:
+        return {
+            self._field_name(object_name, name): value
+            for name, value in record.items()
+            if name not in ("attributes", *SYSTEM_FIELDS)
+        }
+
+    def _find_record(self, object_name: str, record_id: str) -> dict:
+        record = self.records[object_name].get(record_id)
+        if record is None:
+            raise MockError(404, "NOT_FOUND", "The requested resource does not exist")
+        return record
+
+    def _find_by_field(self, object_name: str, field_name: str, value: Any) -> list:
+        field_name = self._field_name(object_name, field_name)
+        value = _casefold(value)
+        return [record for record in self.records[object_name].values() if _casefold(record.get(field_name)) == value]
+
+    def _write(self, object_name: str, record_id: str, values: Optional[dict]) -> None:
+        """Create, update or delete (when `values` is None) a record, keeping the undo log of allOrNone requests"""
+        records = self.records[object_name]
+        if self._undo is not None:
+            self._undo.append((object_name, record_id, records.get(record_id)))
+        if values is None:
+            records.pop(record_id, None)
+        else:
+            records[record_id] = {
+                **records.get(record_id, {}),
+                **values,
+                "Id": record_id,
+                "IsDeleted": False,
+                "SystemModstamp": _now(),
+            }
+
+    def _create(self, object_name: str, record: dict) -> str:
+        values = self._check_fields(object_name, record)
+        record_id = self._new_id(object_name)
+        self._write(object_name, record_id, values)
+        return record_id
+
+    def _update(self, object_name: str, record_id: str, record: dict) -> None:
+        self._find_record(object_name, record_id)
+        self._write(object_name, record_id, self._check_fields(object_name, record))
+
+    def _output(self, request: MockRequest, object_name: str, record: dict, fields: Optional[list] = None) -> dict:
+        fields = fields or list(self.objects[object_name])
+        return {
+            "attributes": {
+                "type": object_name,
+                "url": f"/services/data/{request.version}/sobjects/{object_name}/{record['Id']}",
+            },
+            **{name: record.get(name) for name in fields},
+        }
+
+    def _collection_result(self, write, *args) -> dict:
+        try:
+            return {"id": write(*args), "success": True, "errors": []}
+        except MockError as e:
+            return {"success": False, "errors": [{"statusCode": e.error_code, "message": e.message, "fields": []}]}
+
+    # REST API
+
+    def _limits(self, _request: MockRequest) -> tuple:
+        used = sum(self.requests.values())
+        return 200, {"DailyApiRequests": {"Max": self.daily_api_limit, "Remaining": self.daily_api_limit - used}}
+
+    def _describe_global(self, _request: MockRequest) -> tuple:
+        return 200, {
+            "sobjects": [{"name": name, "label": name, "custom": name.endswith("__c")} for name in self.objects],
+        }
+
+    def _describe(self, request: MockRequest, object_name: str) -> tuple:
+        headers = {"Last-Modified": self.last_modified}
+        if request.headers.get("If-Modified-Since") == self.last_modified:
+            return 304, None, headers
+        fields = [
+            {"name": name, "label": name, "type": field_type}
+            for name, field_type in self._check_object(object_name).items()
+        ]
+        return 200, {"name": object_name, "fields": fields}, headers
+
+    def _create_record(self, request: MockRequest, object_name: str) -> tuple:
+        return 201, {"id": self._create(object_name, request.json()), "success": True, "errors": []}
+
+    def _get_record(self, request: MockRequest, object_name: str, record_id: str) -> tuple:
+        fields = request.params.get("fields")
+        fields = [self._field_name(object_name, name.strip()) for name in fields.split(",")] if fields else None
+        return 200, self._output(request, object_name, self._find_record(object_name, record_id), fields)
+
+    def _update_record(self, request: MockRequest, object_name: str, record_id: str) -> tuple:
+        self._update(object_name, record_id, request.json())
+        return 204, None
+
+    def _delete_record(self, _request: MockRequest, object_name: str, record_id: str) -> tuple:
+        self._find_record(object_name, record_id)
+        self._write(object_name, record_id, None)
+        return 204, None
+
+    def _get_record_by_field(self, request: MockRequest, object_name: str, field_name: str, value: str) -> tuple:
+        records = self._find_by_field(object_name, field_name, unquote(value))
+        if not records:
+            raise MockError(404, "NOT_FOUND", "The requested resource does not exist")
+        return 200, self._output(request, object_name, records[0])
+
+    def _upsert_record(self, request: MockRequest, object_name: str, field_name: str, value: str) -> tuple:
+        value = unquote(value)
+        records = self._find_by_field(object_name, field_name, value)
+        if len(records) > 1:
+            raise MockError(300, "MULTIPLE_CHOICES", f"More than one record found for {field_name} {value}")
+        if records:
+            self._update(object_name, records[0]["Id"], request.json())
+            return 200, {"id": records[0]["Id"], "success": True, "errors": [], "created": False}
+        record_id = self._create(object_name, {**request.json(), field_name: value})
+        return 201, {"id": record_id, "success": True, "errors": [], "created": True}
+
+    def _query(self, request: MockRequest, endpoint: str) -> tuple:
+        # queryAll also returns the deleted records of Salesforce, the mock does not keep them
+        object_name, fields, records = self._run_soql(request.params.get("q", ""))
+        if fields == ["COUNT()"]:
+            return 200, {"totalSize": len(records), "done": True, "records": []}
+        records = [self._output(request, object_name, record, fields) for record in records]
+        cursor = f"01g{next(self._ids):015d}"
+        self.cursors[cursor] = records
+        return 200, self._query_page(request, endpoint, cursor, 0)
+
+    def _query_more(self, request: MockRequest, endpoint: str, locator: str) -> tuple:
+        cursor, _, offset = locator.partition("-")
+        if cursor not in self.cursors:
+            raise MockError(400, "INVALID_QUERY_LOCATOR", "invalid query locator")
+        return 200, self._query_page(request, endpoint, cursor, int(offset or 0))
+
+    def _query_page(self, request: MockRequest, endpoint: str, cursor: str, offset: int) -> dict:
+        batch_size = re.search(r"batchSize=(\d+)", request.headers.get("Sforce-Query-Options") or "")
+        page_size = min(self.page_size, int(batch_size.group(1))) if batch_size else self.page_size
+        records = self.cursors[cursor]
+        end = offset + page_size
+        page = {"totalSize": len(records), "done": end >= len(records), "records": records[offset:end]}
+        if page["done"]:
+            del self.cursors[cursor]
+        else:
+            page["nextRecordsUrl"] = f"/services/data/{request.version}/{endpoint}/{cursor}-{end}"
+        return page
+
+    def _run_soql(self, soql: str) -> tuple:
+        """Return the object, the selected fields and the matching records of a query
+
+        Returns:
+            tuple: (object name, list of field names, list of records)
+        """
+        match = SOQL.match(soql)
+        if match is None:
+            raise MockError(400, "MALFORMED_QUERY", f"The mock cannot run the query: {soql}")
+        object_name = match.group("object")
+        self._check_object(object_name)
+        fields = match.group("fields").strip()
+        if fields.upper() == "COUNT()":
+            fields = ["COUNT()"]
+        else:
+            fields = [self._field_name(object_name, name.strip()) for name in fields.split(",")]
+        conditions = self._parse_where(object_name, match.group("where") or "")
+
+        records = [
+            record
+            for record in self.records[object_name].values()
+            if all(
+                COMPARISONS[operator](_casefold(record.get(name)), literal) for name, operator, literal in conditions
+            )
+        ]
+        if match.group("order"):
+            order = self._field_name(object_name, match.group("order"))
+            records.sort(
+                key=lambda record: (record.get(order) is not None, record.get(order) or ""),
+                reverse=(match.group("direction") or "").upper() == "DESC",
+            )
+        if match.group("limit"):
+            records = records[: int(match.group("limit"))]
+        return object_name, fields, records
+
+    def _parse_where(self, object_name: str, where: str) -> list:
+        """Parse conditions joined with AND into (field name, operator, value) tuples"""
+        conditions = []
+        position = 0
+        while position < len(where):
+            if conditions:
+                connector = SOQL_AND.match(where, position)
+                if connector is None:
+                    raise MockError(400, "MALFORMED_QUERY", f"The mock only supports AND conditions: {where}")
+                position = connector.end()
+            condition = SOQL_CONDITION.match(where, position)
+            if condition is None:
+                raise MockError(400, "MALFORMED_QUERY", f"The mock cannot parse the condition: {where[position:]}")
+            literal = _parse_literal(condition.group("value"))
+            conditions.append(
+                (
+                    self._field_name(object_name, condition.group("field")),
+                    condition.group("operator").upper(),
+                    literal if isinstance(literal, set) else _casefold(literal),
+                ),
+            )
+            position = condition.end()
+        return conditions
+
+    # Composite API
+
+    def _create_collection(self, request: MockRequest) -> tuple:
+        return 200, self._run_collection(
+            request.json(),
+            lambda record: self._create(record["attributes"]["type"], record),
+        )
+
+    def _update_collection(self, request: MockRequest) -> tuple:
+        def update(record: dict) -> str:
+            self._update(record["attributes"]["type"], record.get("Id", ""), record)
+            return record["Id"]
+
+        return 200, self._run_collection(request.json(), update)
+
+    def _delete_collection(self, request: MockRequest) -> tuple:
+        def delete(record_id: str) -> str:
+            for object_name, records in self.records.items():
+                if record_id in records:
+                    self._write(object_name, record_id, None)
+                    return record_id
+            raise MockError(404, "ENTITY_IS_DELETED", "entity is deleted")
+
+        ids = [record_id for record_id in request.params.get("ids", "").split(",") if record_id]
+        return 200, [self._collection_result(delete, record_id) for record_id in ids]
+
+    def _upsert_collection(self, request: MockRequest, object_name: str, field_name: str) -> tuple:
+        created = set()
+
+        def upsert(record: dict) -> str:
+            value = record.get(field_name)
+            if not value and field_name != "Id":
+                raise MockError(400, "MISSING_ARGUMENT", f"{field_name} not specified")
+            records = self._find_by_field(object_name, field_name, value) if value else []
+            if len(records) > 1:
+                raise MockError(300, "MULTIPLE_CHOICES", f"More than one record found for {field_name} {value}")
+            if records:
+                self._update(object_name, records[0]["Id"], record)
+                return records[0]["Id"]
+            record_id = self._create(object_name, record)
+            created.add(record_id)
+            return record_id
+
+        results = self._run_collection(request.json(), upsert)
+        for result in results:
+            result["created"] = result.get("id") in created
+        return 200, results
+
+    def _run_collection(self, payload: dict, write) -> list:
+        self._undo = [] if payload.get("allOrNone") else None
+        try:
+            results = [self._collection_result(write, record) for record in payload["records"]]
+            if self._undo is not None and not all(result["success"] for result in results):
+                self._rollback()
+                for result in results:
+                    if result["success"]:
+                        result.update(id=None, success=False)
+                        result["errors"] = [{"statusCode": "ALL_OR_NONE_OPERATION_ROLLED_BACK", "message": ""}]
+            return results
+        finally:
+            self._undo = None
+
+    def _retrieve_collection(self, request: MockRequest, object_name: str) -> tuple:
+        payload = request.json()
+        fields = [self._field_name(object_name, name) for name in payload["fields"]]
+        records = self.records[object_name]
+        return 200, [
+            self._output(request, object_name, records[record_id], fields) if record_id in records else None
+            for record_id in payload["ids"]
+        ]
+
+    def _composite(self, request: MockRequest) -> tuple:
+        payload = request.json()
+        all_or_none = payload.get("allOrNone", False)
+        self._undo = [] if all_or_none else None
+        responses: list = []
+        results: dict = {}
+        try:
+            for subrequest in payload["compositeRequest"]:
+                response = self._run_subrequest(subrequest, results)
+                results[subrequest["referenceId"]] = response
+                responses.append(response)
+            failed = any(response["httpStatusCode"] >= 400 for response in responses)  # noqa: PLR2004
+            if all_or_none and failed:
+                self._rollback()
+                for response in responses:
+                    if response["httpStatusCode"] < 400:  # noqa: PLR2004
+                        response.update(
+                            body=MockError(400, "PROCESSING_HALTED", "The transaction was rolled back").body(),
+                            httpHeaders={},
+                            httpStatusCode=400,
+                        )
+        finally:
+            self._undo = None
+        return 200, {"compositeResponse": responses}
+
+    def _run_subrequest(self, subrequest: dict, results: dict) -> dict:
+        def resolve(value: Any) -> Any:
+            if isinstance(value, dict):
+                return {key: resolve(item) for key, item in value.items()}
+            if isinstance(value, str):
+                return REFERENCE.sub(lambda match: str(self._resolve_reference(results, **match.groupdict())), value)
+            return value
+
+        try:
+            url = urlsplit(resolve(subrequest["url"]))
+            match = API_PATH.match(url.path)
+            if match is None:
+                raise MockError(404, "NOT_FOUND", f"The requested resource does not exist: {url.path}")
+            body = json.dumps(resolve(subrequest["body"])).encode() if "body" in subrequest else b""
+            status, payload, headers = self._dispatch(
+                MockRequest(
+                    subrequest["method"],
+                    match.group("resource"),
+                    match.group("version"),
+                    dict(parse_qsl(url.query)),
+                    {},
+                    body,
+                ),
+            )
+        except MockError as e:
+            status, payload, headers = e.status, e.body(), {}
+        return {
+            "body": payload,
+            "httpHeaders": headers,
+            "httpStatusCode": status,
+            "referenceId": subrequest["referenceId"],
+        }
+
+    @staticmethod
+    def _resolve_reference(results: dict, reference_id: str, path: str) -> Any:
+        response = results.get(reference_id)
+        if response is None or response["httpStatusCode"] >= 400:  # noqa: PLR2004
+            raise MockError(400, "PROCESSING_HALTED", f"Invalid reference specified: {reference_id}")
+        value = response["body"]
+        try:
+            for key in re.findall(r"\w+|\[\d+\]", path):
+                value = value[int(key[1:-1])] if key.startswith("[") else value[key]
+        except (KeyError, IndexError, TypeError):
+            raise MockError(400, "INVALID_FIELD", f"Invalid reference path: {reference_id}.{path}") from None
+        return value
+
+    def _rollback(self) -> None:
+        for object_name, record_id, previous in reversed(self._undo):
+            if previous is None:
+                self.records[object_name].pop(record_id, None)
+            else:
+                self.records[object_name][record_id] = previous
+        self._undo = []
+
+    # Bulk API 2.0
+
+    def _job_info(self, job: dict) -> dict:
+        return {key: value for key, value in job.items() if not key.startswith("_")}
+
+    def _find_job(self, job_id: str) -> dict:
+        if job_id not in self.jobs:
+            raise MockError(404, "NOT_FOUND", f"Job {job_id} does not exist")
+        return self.jobs[job_id]
+
+    def _create_ingest_job(self, request: MockRequest) -> tuple:
+        payload = request.json()
+        self._check_object(payload["object"])
+        job = {
+            "id": f"750{next(self._ids):015d}",
+            "object": payload["object"],
+            "operation": payload["operation"],
+            "externalIdFieldName": payload.get("externalIdFieldName"),
+            "jobType": "V2Ingest",
+            "state": "Open",
+            "numberRecordsProcessed": 0,
+            "numberRecordsFailed": 0,
+            "_data": "",
+            "_results": {},
+        }
+        self.jobs[job["id"]] = job
+        return 200, self._job_info(job)
+
+    def _upload_job_data(self, request: MockRequest, job_id: str) -> tuple:
+        job = self._find_job(job_id)
+        if job["state"] != "Open" or job["_data"]:
+            raise MockError(409, "INVALIDJOBSTATE", f"Job {job_id} does not accept data")
+        job["_data"] = request.body.decode("utf-8")
+        return 201, None
+
+    def _set_job_state(self, request: MockRequest, job_type: str, job_id: str) -> tuple:
+        job = self._find_job(job_id)
+        state = request.json()["state"]
+        if state == "Aborted" and job["state"] not in ("JobComplete", "Failed"):
+            job["state"] = "Aborted"
+        elif state == "UploadComplete" and job_type == "ingest" and job["state"] == "Open":
+            self._process_ingest_job(job)
+        else:
+            raise MockError(409, "INVALIDJOBSTATE", f"Cannot set job {job_id} in state {job['state']} to {state}")
+        return 200, self._job_info(job)
+
+    def _get_job(self, _request: MockRequest, _job_type: str, job_id: str) -> tuple:
+        return 200, self._job_info(self._find_job(job_id))
+
+    def _process_ingest_job(self, job: dict) -> None:
+        """Write the records of an ingest job right away and keep its results CSV documents"""
+        object_name = job["object"]
+        field_types = self.objects[object_name]
+        rows = list(csv.DictReader(io.StringIO(job["_data"])))
+        columns = list(rows[0]) if rows else []
+        succeeded, failed = [], []
+        external_id_field = job["externalIdFieldName"]
+        # Ids by external ID of the records of the object, to match the rows of upserts without scanning them all
+        external_ids: dict = {}
+        if job["operation"] == "upsert" and external_id_field != "Id":
+            external_id_field = self._field_name(object_name, external_id_field)
+            for record_id, record in self.records[object_name].items():
+                external_ids.setdefault(_casefold(record.get(external_id_field)), []).append(record_id)
+        for row in rows:
+            # Bulk API 2.0 ignores empty values rather than nulling the fields
+            record = {
+                name: self._parse_csv_value(value, field_types.get(name)) for name, value in row.items() if value != ""
+            }
+            try:
+                record_id, created = self._ingest_record(job, record, external_ids)
+                succeeded.append({"sf__Id": record_id, "sf__Created": created, **row})
+            except MockError as e:
+                failed.append({"sf__Id": row.get("Id", ""), "sf__Error": f"{e.error_code}:{e.message}", **row})
+
+        job["_results"] = {
+            "successfulResults": _to_csv(succeeded, ["sf__Id", "sf__Created", *columns]),
+            "failedResults": _to_csv(failed, ["sf__Id", "sf__Error", *columns]),
+            "unprocessedrecords": _to_csv([], columns),
+        }
+        job.update(state="JobComplete", numberRecordsProcessed=len(rows), numberRecordsFailed=len(failed))
+
+    @staticmethod
+    def _parse_csv_value(value: str, field_type: Optional[str]) -> Any:
+        if field_type in NUMBER_TYPES:
+            return float(value)
+        if field_type == "int":
+            return int(value)
+        if field_type == "boolean":
+            return value.lower() == "true"
+        return value
+
+    def _ingest_record(self, job: dict, record: dict, external_ids: dict) -> tuple:
+        """Write a record of an ingest job, `external_ids` lists the Ids of the records by external ID for upserts
+
+        Returns:
+            tuple: (record Id, True if the record was created)
+        """
+        object_name = job["object"]
+        operation = job["operation"]
+        if operation == "insert":
+            return self._create(object_name, record), True
+        if operation in ("delete", "hardDelete"):
+            self._find_record(object_name, record.get("Id", ""))
+            self._write(object_name, record["Id"], None)
+            return record["Id"], False
+        if operation == "update" or job["externalIdFieldName"] == "Id":
+            self._update(object_name, record.get("Id", ""), record)
+            return record["Id"], False
+
+        external_id_field = self._field_name(object_name, job["externalIdFieldName"])
+        external_id = _casefold(record.get(external_id_field))
+        existing = external_ids.setdefault(external_id, [])
+        if len(existing) > 1:
+            raise MockError(400, "DUPLICATE_EXTERNAL_ID", f"{external_id_field} matches several records")
+        if existing:
+            self._update(object_name, existing[0], record)
+            return existing[0], False
+        existing.append(self._create(object_name, record))
+        return existing[0], True
+
+    def _get_job_results(self, _request: MockRequest, job_id: str, path: str) -> tuple:
+        job = self._find_job(job_id)
+        if job["state"] != "JobComplete":
+            raise MockError(409, "INVALIDJOBSTATE", f"Job {job_id} is not complete")
+        return 200, job["_results"][path], {"Content-Type": "text/csv"}
+
+    def _create_query_job(self, request: MockRequest) -> tuple:
+        payload = request.json()
+        object_name, fields, records = self._run_soql(payload["query"])
+        job = {
+            "id": f"750{next(self._ids):015d}",
+            "object": object_name,
+            "operation": payload["operation"],
+            "jobType": "V2Query",
+            "state": "JobComplete",
+            "numberRecordsProcessed": len(records),
+            "_fields": fields,
+            "_records": records,
+        }
+        self.jobs[job["id"]] = job
+        return 200, self._job_info(job)
+
+    def _get_query_results(self, request: MockRequest, job_id: str) -> tuple:
+        job = self._find_job(job_id)
+        offset = int(request.params.get("locator") or 0)
+        end = offset + int(request.params.get("maxRecords") or len(job["_records"]))
+        rows = job["_records"][offset:end]
+        headers = {
+            "Content-Type": "text/csv",
+            "Sforce-NumberOfRecords": str(len(rows)),
+            "Sforce-Locator": str(end) if end < len(job["_records"]) else "null",
+        }
+        return 200, _to_csv(rows, job["_fields"]), headers
+
+
+# (method, resource pattern relative to the API version, handler), the first match handles the request
+ROUTES = [
+    ("GET", r"limits", "_limits"),
+    ("GET", r"sobjects", "_describe_global"),
+    ("GET", r"sobjects/(\w+)/describe", "_describe"),
+    ("POST", r"sobjects/(\w+)", "_create_record"),
+    ("GET", r"sobjects/(\w+)/(\w+)", "_get_record"),
+    ("PATCH", r"sobjects/(\w+)/(\w+)", "_update_record"),
+    ("DELETE", r"sobjects/(\w+)/(\w+)", "_delete_record"),
+    ("GET", r"sobjects/(\w+)/(\w+)/([^/]+)", "_get_record_by_field"),
+    ("PATCH", r"sobjects/(\w+)/(\w+)/([^/]+)", "_upsert_record"),
+    ("GET", r"(query|queryAll)", "_query"),
+    ("GET", r"(query|queryAll)/([\w-]+)", "_query_more"),
+    ("POST", r"composite", "_composite"),
+    ("POST", r"composite/sobjects", "_create_collection"),
+    ("PATCH", r"composite/sobjects", "_update_collection"),
+    ("DELETE", r"composite/sobjects", "_delete_collection"),
+    ("PATCH", r"composite/sobjects/(\w+)/(\w+)", "_upsert_collection"),
+    ("POST", r"composite/sobjects/(\w+)", "_retrieve_collection"),
+    ("POST", r"jobs/ingest", "_create_ingest_job"),
+    ("PUT", r"jobs/ingest/(\w+)/batches", "_upload_job_data"),
+    ("GET", rf"jobs/ingest/(\w+)/({'|'.join(BULK_RESULT_PATHS)})", "_get_job_results"),
+    ("POST", r"jobs/query", "_create_query_job"),
+    ("GET", r"jobs/query/(\w+)/results", "_get_query_results"),
+    ("PATCH", r"jobs/(ingest|query)/(\w+)", "_set_job_state"),
+    ("GET", r"jobs/(ingest|query)/(\w+)", "_get_job"),
+]
+
+
+class _MockRequestHandler(BaseHTTPRequestHandler):
+    # keep the connections open, like Salesforce does, so the connection pool of the client is exercised
+    protocol_version = "HTTP/1.1"
+    # send the headers and the body of a response in one segment, delayed acknowledgements stall split ones
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def _handle(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        status, payload, headers = self.server.mock.handle(self.command, self.path, self.headers, body)
+
+        if payload is None:
+            data = b""
+        elif isinstance(payload, str):
+            data = payload.encode("utf-8")
+            headers.setdefault("Content-Type", "text/csv")
+        else:
+            data = json.dumps(payload).encode("utf-8")
+            headers.setdefault("Content-Type", "application/json")
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle  # noqa: N815
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class MockTransportAdapter(SalesforceHTTPAdapter):
+    """Transport adapter sending the https:// requests of simple_salesforce to the plain HTTP mock"""
+
+    def __init__(self, *args, target: Optional[str] = None, **kwargs) -> None:
+        # URL of the mock to send the requests to instead of their own host, e.g., for the login requests
+        self.target = target
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, *args, **kwargs):
+        if self.target is None:
+            request.url = f"http://{request.url.removeprefix('https://')}"
+        else:
+            request.url = f"{self.target}{urlsplit(request.url).path}"
+        return super().send(request, *args, **kwargs)
+
+
+def mock_client(instance_url: str, login: bool = False, **kwargs) -> SalesforceClient:
+    """Return a client with a session on a mock, running in this process or another one
+
+    Args:
+        instance_url (str): URL of the mock, e.g., http://127.0.0.1:50123
+        login (bool, optional): connect with a username and password, logging in to the mock on the first call,
+            rather than with a session. Defaults to False.
+        **kwargs: additional parameters to pass to `SalesforceClient`, e.g., governor
+
+    Returns:
+        SalesforceClient: client, with the governor and retry policy applied to the requests to the mock
+    """
+    if login:
+        connection_params = {"username": "mock@example.com", "password": "password", "security_token": "token"}
+    else:
+        connection_params = {"session_id": MOCK_SESSION_ID, "instance_url": instance_url}
+    sf = SalesforceClient(connection_params=connection_params, **kwargs)
+    adapter_params = {
+        "pool_size": max(sf.pool_size, MOCK_POOL_SIZE),
+        "governor": sf.governor,
+        "retry_policy": sf.retry_policy,
+    }
+    # simple_salesforce always builds https:// URLs, the longer prefix takes precedence over the "https://" adapter
+    sf.session.mount(instance_url.replace("http://", "https://", 1), MockTransportAdapter(**adapter_params))
+    if login:
+        sf.session.mount(LOGIN_URL, MockTransportAdapter(target=instance_url, **adapter_params))
+    return sf
+
+
+def main(argv: Optional[list] = None) -> None:
+    """Serve a mock from the command line until interrupted, printing its instance URL on the first line"""
+    parser = argparse.ArgumentParser(description="Serve a local mock of the Salesforce APIs used by seed-salesforce")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to wait before each response")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE, help="records per page of query results")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of the requests failing with a 503")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the error injection")
+    args = parser.parse_args(argv)
+
+    mock = MockSalesforce(
+        latency=args.latency,
+        page_size=args.page_size,
+        error_rate=args.error_rate,
+        seed=args.seed,
+        host=args.host,
+        port=args.port,
+    )
+    print(mock.instance_url, flush=True)
+    mock.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import pytest
+
+from seed_salesforce.cache import MemoryRecordCache, RecordCache, SQLiteRecordCache
+
+
+class RecordCacheTests:
+    """Tests shared by the record cache backends, mixed into a TestCase that defines make_cache"""
+
+    def test_get_set_invalidate(self):
+        cache = self.make_cache()
+        assert cache.get("Property__c", "a0256000005mDNrAAM") is None
+
+        cache.set("Property__c", "a0256000005mDNrAAM", {"Id": "a0256000005mDNrAAM", "Name": "123 Made Up St"})
+        assert cache.get("Property__c", "a0256000005mDNrAAM")["Name"] == "123 Made Up St"
+        # the 15 character version of the Id shares the entry
+        assert cache.get("Property__c", "a0256000005mDNr")["Name"] == "123 Made Up St"
+        # the object name is part of the key
+        assert cache.get("Benchmark__c", "a0256000005mDNrAAM") is None
+
+        cache.invalidate("Property__c", "a0256000005mDNrAAM")
+        assert cache.get("Property__c", "a0256000005mDNrAAM") is None
+        assert cache.stats() == {"hits": 2, "misses": 3, "size": 0}
+
+    def test_returned_records_are_copies(self):
+        cache = self.make_cache()
+        cache.set("Account", "0018a00001qmgddAAA", {"Name": "Scrumptious Ice Cream"})
+        cache.get("Account", "0018a00001qmgddAAA")["Name"] = "changed"
+        assert cache.get("Account", "0018a00001qmgddAAA")["Name"] == "Scrumptious Ice Cream"
+
+    def test_ttl(self):
+        cache = self.make_cache(ttl=0.01)
+        cache.set("Account", "0018a00001qmgddAAA", {"Name": "Scrumptious Ice Cream"})
+        time.sleep(0.02)
+        assert cache.get("Account", "0018a00001qmgddAAA") is None
+        assert len(cache) == 0
+
+    def test_lru_eviction(self):
+        cache = self.make_cache(max_size=2)
+        cache.set("Account", "001000000000001", {"Name": "one"})
+        time.sleep(0.001)
+        cache.set("Account", "001000000000002", {"Name": "two"})
+        time.sleep(0.001)
+        # touch the first record so the second one is the least recently used
+        assert cache.get("Account", "001000000000001") is not None
+        time.sleep(0.001)
+        cache.set("Account", "001000000000003", {"Name": "three"})
+
+        assert cache.get("Account", "001000000000002") is None
+        assert cache.get("Account", "001000000000001") is not None
+        assert cache.get("Account", "001000000000003") is not None
+
+
+class RecordCacheTest(unittest.TestCase):
+    def test_incomplete_backends_fail_on_construction(self):
+        class IncompleteCache(RecordCache):
+            def clear(self):
+                pass
+
+        with pytest.raises(TypeError):
+            IncompleteCache()
+
+
+class MemoryRecordCacheTest(RecordCacheTests, unittest.TestCase):
+    def make_cache(self, **kwargs):
+        return MemoryRecordCache(**kwargs)
+
+
+class SQLiteRecordCacheTest(RecordCacheTests, unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.caches = []
+
+    def tearDown(self):
+        for cache in self.caches:
+            cache.close()
+        self.tempdir.cleanup()
+
+    def make_cache(self, **kwargs):
+        cache = SQLiteRecordCache(Path(self.tempdir.name) / f"cache{len(self.caches)}.sqlite", **kwargs)
+        self.caches.append(cache)
+        return cache
+
+    def test_persists_across_instances(self):
+        path = Path(self.tempdir.name) / "shared.sqlite"
+        cache = SQLiteRecordCache(path)
+        cache.set("Contact", "0038a00000abcdeAAA", {"Email": "a-user@somecompany.com"})
+        cache.close()
+
+        cache = SQLiteRecordCache(path)
+        self.caches.append(cache)
+        assert cache.get("Contact", "0038a00000abcdeAAA") == {"Email": "a-user@somecompany.com"}
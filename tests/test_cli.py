@@ -0,0 +1,136 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import csv
+import gzip
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from seed_salesforce.cli import EXIT_ERROR, EXIT_FAILED_RECORDS, main, read_records
+from tests.mock_salesforce import MockSalesforce
+
+BENCHMARKS = 120
+CHUNK_SIZE = 50
+
+
+class CliTest(unittest.TestCase):
+    def setUp(self):
+        self.mock = MockSalesforce()
+        self.mock.start()
+        self.sf = self.mock.client()
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tempdir.name)
+
+    def tearDown(self):
+        self.mock.stop()
+        self.tempdir.cleanup()
+
+    def run_cli(self, *argv):
+        return main(["--progress-interval", "0", *argv], sf=self.sf)
+
+    def test_upsert_mapped_gzip_csv_with_collections(self):
+        self.mock.seed("Benchmark__c", [{"Salesforce_Benchmark_ID__c": "BM-1", "Site_EUI__c": 70.0}])
+        path = self.path / "benchmarks.csv.gz"
+        with gzip.open(path, "wt", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Benchmark ID", "Site EUI", "Notes"])
+            writer.writerows([["BM-1", "80.5", "ignored"], ["BM-2", "", "ignored"]])
+
+        status = self.run_cli("upsert", "Benchmark__c", str(path), "--map", "Benchmark ID=Salesforce_Benchmark_ID__c")
+        assert status == 0
+        assert self.mock.stats()["by_endpoint"]["PATCH composite/sobjects"] == 1
+        assert {record["Salesforce_Benchmark_ID__c"] for record in self.mock.records["Benchmark__c"].values()} == {
+            "BM-1",
+            "BM-2",
+        }
+
+        status = self.run_cli("upsert", "Benchmark__c", str(path), "--map", "Site EUI=Site_EUI__c")
+        # without the external ID, the records can't be matched
+        assert status == EXIT_FAILED_RECORDS
+
+    def test_upsert_jsonl_from_stdin_in_bulk_chunks(self):
+        lines = "\n".join(
+            json.dumps({"Salesforce_Benchmark_ID__c": f"BM-{index}", "Site_EUI__c": 80 + index})
+            for index in range(BENCHMARKS)
+        )
+        stdin = io.TextIOWrapper(io.BytesIO(lines.encode()))
+        with mock.patch("sys.stdin", stdin):
+            status = self.run_cli(
+                "--format=jsonl",
+                f"--chunk-size={CHUNK_SIZE}",
+                f"--bulk-threshold={CHUNK_SIZE}",
+                "upsert",
+                "Benchmark__c",
+            )
+
+        assert status == 0
+        assert len(self.mock.records["Benchmark__c"]) == BENCHMARKS
+        stats = self.mock.stats()["by_endpoint"]
+        # two full chunks with Bulk API 2.0, the last 20 records with a collection request
+        assert (stats["POST jobs/ingest"], stats["PATCH composite/sobjects"]) == (2, 1)
+
+    def test_delete_reports_failures(self):
+        ids = self.mock.seed("Contact", [{"LastName": "Bachman"}])
+        path = self.path / "contacts.csv"
+        path.write_text(f"Id\n{ids[0]}\n003000000000000099\n")
+        errors = self.path / "errors.jsonl"
+
+        assert self.run_cli("delete", "Contact", str(path), "--errors", str(errors)) == EXIT_FAILED_RECORDS
+        assert self.mock.records["Contact"] == {}
+        [failure] = [json.loads(line) for line in errors.read_text().splitlines()]
+        assert failure["record"] == {"Id": "003000000000000099"}
+
+        path.write_text("LastName\nHendricks\n")
+        assert self.run_cli("delete", "Contact", str(path)) == EXIT_ERROR
+
+    def test_export(self):
+        self.mock.seed("Account", [{"Name": f"Account {index}"} for index in range(3)])
+
+        output = self.path / "accounts.jsonl.gz"
+        assert self.run_cli("export", "Account", str(output), "--fields", "Name") == 0
+        with gzip.open(output, "rb") as f:
+            records = list(read_records(f, "jsonl"))
+        assert sorted(record["Name"] for record in records) == ["Account 0", "Account 1", "Account 2"]
+        assert set(records[0]) == {"Id", "Name"}
+
+        output = self.path / "accounts.csv"
+        assert self.run_cli("--bulk-threshold=2", "export", "Account", str(output), "--fields", "Name") == 0
+        assert self.mock.stats()["by_endpoint"]["POST jobs/query"] == 1
+        with open(output, "rb") as f:
+            assert len(list(read_records(f, "csv"))) == len(records)
+
+    def test_upsert_json_array(self):
+        path = self.path / "benchmarks.json"
+        path.write_text(json.dumps([{"Salesforce_Benchmark_ID__c": "BM-1"}, {"Salesforce_Benchmark_ID__c": "BM-2"}]))
+
+        assert self.run_cli("upsert", "Benchmark__c", str(path)) == 0
+        assert len(self.mock.records["Benchmark__c"]) == 2  # noqa: PLR2004
+
+        path.write_text(json.dumps({"Salesforce_Benchmark_ID__c": "BM-3"}))
+        assert self.run_cli("upsert", "Benchmark__c", str(path)) == EXIT_ERROR
+
+    def test_export_json_and_bulk_export_formats(self):
+        self.mock.seed("Account", [{"Name": f"Account {index}"} for index in range(3)])
+
+        output = self.path / "accounts.json"
+        assert self.run_cli("export", "Account", str(output), "--fields", "Name") == 0
+        assert sorted(record["Name"] for record in json.loads(output.read_text())) == [
+            "Account 0",
+            "Account 1",
+            "Account 2",
+        ]
+
+        # Bulk API 2.0 query jobs are only exported to CSV and Parquet files
+        for output in ("accounts.jsonl", "accounts.csv.gz", "-"):
+            path = output if output == "-" else str(self.path / output)
+            assert self.run_cli("--api=bulk", "export", "Account", path) == EXIT_ERROR
+        assert "POST jobs/query" not in self.mock.stats()["by_endpoint"]
+
+    def test_config_is_required(self):
+        with pytest.raises(SystemExit):
+            main(["export", "Account"])
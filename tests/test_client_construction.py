@@ -0,0 +1,46 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+import pytest
+
+from seed_salesforce.cache import MemoryRecordCache
+from seed_salesforce.exceptions import SalesforceClientError
+from seed_salesforce.salesforce_client import ClientOptions, SalesforceClient
+
+CONNECTION_PARAMS = {
+    "instance": "https://example.invalid",
+    "username": "user@example.com",
+    "password": "password",
+    "security_token": "token",
+}
+
+
+class ClientConstructionTest(unittest.TestCase):
+    def test_import_does_not_load_simple_salesforce(self):
+        code = "import sys, seed_salesforce.salesforce_client; print('simple_salesforce' in sys.modules)"
+        # in a new interpreter, other tests have already imported simple_salesforce in this one
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout  # noqa: S603
+        assert output.strip() == "False"
+
+    def test_construction_does_not_log_in(self):
+        # the login would fail on the first call, the instance does not exist
+        sf = SalesforceClient(connection_params=CONNECTION_PARAMS)
+        assert sf._connection is None
+
+    def test_options_and_option_keyword_arguments(self):
+        options = ClientOptions(pool_size=2, record_cache=MemoryRecordCache())
+        sf = SalesforceClient(CONNECTION_PARAMS, options=options, pool_size=4)
+        # the keyword arguments override the options, which are left unchanged
+        assert (sf.pool_size, sf.record_cache) == (4, options.record_cache)
+        assert options.pool_size == 2  # noqa: PLR2004
+
+        with pytest.raises(TypeError):
+            SalesforceClient(CONNECTION_PARAMS, pool_sise=4)
+
+    def test_missing_config_file_fails_on_construction(self):
+        with pytest.raises(SalesforceClientError, match="Cannot find connection config file"):
+            SalesforceClient(connection_config_filepath=Path("does-not-exist.json"))
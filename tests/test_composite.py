@@ -0,0 +1,57 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import unittest
+
+import pytest
+
+from seed_salesforce.composite import COMPOSITE_MAX_SUBREQUESTS, CompositeRequest, reference
+
+
+class CompositeRequestTest(unittest.TestCase):
+    def test_to_payload(self):
+        request = CompositeRequest("59.0", all_or_none=True)
+        request.create("Account", {"Name": "Scrumptious Ice Cream"}, "newAccount")
+        request.create("Contact", {"LastName": "Hendricks", "AccountId": reference("newAccount")}, "newContact")
+        request.get("Contact", reference("newContact"), "contact", fields=["Id", "AccountId"])
+
+        assert request.to_payload() == {
+            "allOrNone": True,
+            "compositeRequest": [
+                {
+                    "method": "POST",
+                    "url": "/services/data/v59.0/sobjects/Account",
+                    "referenceId": "newAccount",
+                    "body": {"Name": "Scrumptious Ice Cream"},
+                },
+                {
+                    "method": "POST",
+                    "url": "/services/data/v59.0/sobjects/Contact",
+                    "referenceId": "newContact",
+                    "body": {"LastName": "Hendricks", "AccountId": "@{newAccount.id}"},
+                },
+                {
+                    "method": "GET",
+                    "url": "/services/data/v59.0/sobjects/Contact/@{newContact.id}?fields=Id,AccountId",
+                    "referenceId": "contact",
+                },
+            ],
+        }
+
+    def test_query_url_is_encoded(self):
+        request = CompositeRequest("59.0").query("SELECT Id FROM Contact WHERE Email = 'a+b@x.com'", "contact")
+        assert request.subrequests[0]["url"] == (
+            "/services/data/v59.0/query/?q=SELECT+Id+FROM+Contact+WHERE+Email+%3D+%27a%2Bb%40x.com%27"
+        )
+        assert reference("contact", "records[0].Id") == "@{contact.records[0].Id}"
+
+    def test_limits(self):
+        request = CompositeRequest("59.0")
+        request.delete("Account", "0018a00001qmgddAAA", "delete0")
+        with pytest.raises(Exception, match="Duplicate"):
+            request.delete("Account", "0018a00001qmgddAAA", "delete0")
+
+        for i in range(1, COMPOSITE_MAX_SUBREQUESTS):
+            request.delete("Account", "0018a00001qmgddAAA", f"delete{i}")
+        assert len(request) == COMPOSITE_MAX_SUBREQUESTS
+        with pytest.raises(Exception, match="at most 25"):
+            request.delete("Account", "0018a00001qmgddAAA", "one_too_many")
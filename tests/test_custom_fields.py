@@ -0,0 +1,129 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import io
+import unittest
+import xml.etree.ElementTree as ET
+import zipfile
+from unittest import mock
+
+import pytest
+
+from seed_salesforce.custom_fields import (
+    LONG_TEXT_AREA_MIN_LENGTH,
+    METADATA_NAMESPACE,
+    CustomFieldSpec,
+    custom_fields_package,
+)
+from seed_salesforce.exceptions import SalesforceClientError
+from seed_salesforce.salesforce_client import SalesforceClient
+from tests.mock_salesforce import MockSalesforce
+
+NAMESPACES = {"md": METADATA_NAMESPACE}
+
+
+class CustomFieldSpecTest(unittest.TestCase):
+    def test_to_metadata(self):
+        metadata = CustomFieldSpec("Site_EUI", "Number", precision=12, scale=2).to_metadata("Benchmark__c")
+        assert metadata == {
+            "fullName": "Benchmark__c.Site_EUI__c",
+            "label": "Site_EUI",
+            "type": "Number",
+            "description": "",
+            "precision": 12,
+            "scale": 2,
+        }
+
+        metadata = CustomFieldSpec("Notes__c", "LongTextArea", label="Notes", length=10).to_metadata("Property__c")
+        assert metadata["fullName"] == "Property__c.Notes__c"
+        assert metadata["label"] == "Notes"
+        assert metadata["length"] == LONG_TEXT_AREA_MIN_LENGTH
+
+        # length does not apply to dates
+        assert "length" not in CustomFieldSpec("Verified_On", "Date", length=10).to_metadata("Benchmark__c")
+
+    def test_picklist_metadata(self):
+        metadata = CustomFieldSpec("Status", "Picklist", picklist_values=["Compliant", "Exempt"]).to_metadata(
+            "Benchmark__c",
+        )
+        values = metadata["valueSet"]["valueSetDefinition"]["value"]
+        assert [value["fullName"] for value in values] == ["Compliant", "Exempt"]
+
+        with pytest.raises(SalesforceClientError, match="needs picklist_values"):
+            CustomFieldSpec("Status", "Picklist").to_metadata("Benchmark__c")
+
+    def test_unsupported_type(self):
+        with pytest.raises(SalesforceClientError, match="Unsupported custom field type"):
+            CustomFieldSpec("Location", "Geolocation").to_metadata("Property__c")
+
+    def test_custom_fields_package(self):
+        fields = [
+            CustomFieldSpec("Site_EUI", "Number", precision=12, scale=2).to_metadata("Benchmark__c"),
+            CustomFieldSpec("Status", "Picklist", picklist_values=["A & B"]).to_metadata("Benchmark__c"),
+        ]
+        with zipfile.ZipFile(io.BytesIO(custom_fields_package("Benchmark__c", fields, "59.0"))) as package:
+            # built by the test itself
+            manifest = ET.fromstring(package.read("package.xml"))  # noqa: S314
+            custom_object = ET.fromstring(package.read("objects/Benchmark__c.object"))  # noqa: S314
+
+        members = [member.text for member in manifest.findall("md:types/md:members", NAMESPACES)]
+        assert members == ["Benchmark__c.Site_EUI__c", "Benchmark__c.Status__c"]
+        assert manifest.findtext("md:types/md:name", namespaces=NAMESPACES) == "CustomField"
+        assert manifest.findtext("md:version", namespaces=NAMESPACES) == "59.0"
+
+        first, second = custom_object.findall("md:fields", NAMESPACES)
+        assert [child.tag.split("}")[1] for child in first][:2] == ["fullName", "description"]
+        assert first.findtext("md:fullName", namespaces=NAMESPACES) == "Site_EUI__c"
+        assert first.findtext("md:precision", namespaces=NAMESPACES) == "12"
+        path = "md:valueSet/md:valueSetDefinition/md:value/md:fullName"
+        assert second.findtext(path, namespaces=NAMESPACES) == "A & B"
+
+
+class CreateCustomFieldsTest(unittest.TestCase):
+    def setUp(self):
+        self.mock = MockSalesforce()
+        self.mock.start()
+        self.sf = self.mock.client()
+        self.mdapi = mock.Mock()
+        self.mdapi.deploy.return_value = ("0Af000000000001", "Queued")
+        patcher = mock.patch.object(SalesforceClient, "mdapi", new_callable=mock.PropertyMock, return_value=self.mdapi)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.mock.stop()
+
+    def test_deploys_the_new_fields_and_polls_the_deployment(self):
+        self.mdapi.check_deploy_status.side_effect = [
+            ("InProgress", None, None, None),
+            ("Succeeded", None, {"errors": []}, None),
+        ]
+        # Site_EUI__c already exists
+        specs = [
+            CustomFieldSpec("Site_Area", "Number"),
+            CustomFieldSpec("Site_EUI", "Number"),
+            CustomFieldSpec("Notes"),
+        ]
+        with mock.patch("time.sleep"):
+            results = self.sf.create_custom_fields("Benchmark__c", specs)
+
+        assert [(result.success, result.created) for result in results] == [(True, True), (True, False), (True, True)]
+        assert self.mdapi.deploy.call_count == 1
+        assert self.mdapi.check_deploy_status.call_count == 2  # noqa: PLR2004
+        with zipfile.ZipFile(self.mdapi.deploy.call_args.args[0]) as package:
+            custom_object = package.read("objects/Benchmark__c.object")
+        assert b"Notes__c" in custom_object
+        assert b"Site_EUI__c" not in custom_object
+
+    def test_failed_deployment_fails_all_the_new_fields(self):
+        errors = [
+            {
+                "type": "CustomField",
+                "file": "objects/Benchmark__c.object",
+                "status": "Error",
+                "message": "Bad_Field__c: invalid",
+            },
+        ]
+        self.mdapi.check_deploy_status.return_value = ("Failed", None, {"errors": errors}, None)
+        results = self.sf.create_custom_fields("Benchmark__c", [CustomFieldSpec("Bad_Field"), CustomFieldSpec("Good")])
+        assert [result.errors for result in results] == [["Error: Bad_Field__c: invalid"]] * 2
+        assert not any(result.success for result in results)
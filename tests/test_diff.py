@@ -0,0 +1,42 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import datetime
+import unittest
+from decimal import Decimal
+
+from seed_salesforce.diff import changed_fields, normalize_value
+
+
+class DiffTest(unittest.TestCase):
+    def test_normalize_value(self):
+        assert normalize_value("", "string") is None
+        assert normalize_value("75.50", "double") == normalize_value(75.5, "double") == Decimal("75.5")
+        assert normalize_value("false", "boolean") is False
+        assert normalize_value(datetime.date(2024, 1, 2), "date") == normalize_value("2024-01-02", "date")
+        assert normalize_value("2024-01-02T03:04:05.000+0000", "datetime") == normalize_value(
+            datetime.datetime(2024, 1, 1, 22, 4, 5, tzinfo=datetime.timezone(datetime.timedelta(hours=-5))),
+            "datetime",
+        )
+        assert normalize_value("Office ", "picklist") == normalize_value("office", "picklist")
+        assert normalize_value("Gas;Electric", "multipicklist") == normalize_value("electric;gas", "multipicklist")
+        # values of unknown types are compared as is
+        assert normalize_value("Office", None) != normalize_value("office", None)
+
+    def test_changed_fields(self):
+        current = {
+            "attributes": {"type": "Benchmark__c"},
+            "Id": "a0C8a00000abcdeAAA",
+            "ENERGY_STAR_Score__c": 75.0,
+            "Status__c": "Received",
+            "Notes__c": None,
+        }
+        field_types = {"ENERGY_STAR_Score__c": "double", "Status__c": "picklist", "Notes__c": "textarea"}
+
+        updates = {"energy_star_score__c": "75", "Status__c": "received", "Notes__c": ""}
+        assert changed_fields(current, updates, field_types) == {}
+
+        updates = {"ENERGY_STAR_Score__c": 80, "Status__c": "Received", "Year_Ending__c": "2023-12-31"}
+        assert changed_fields(current, updates, field_types) == {
+            "ENERGY_STAR_Score__c": 80,
+            "Year_Ending__c": "2023-12-31",
+        }
@@ -0,0 +1,97 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import threading
+import unittest
+
+import pytest
+
+from seed_salesforce.exceptions import ApiLimitError
+from seed_salesforce.governor import ApiGovernor
+from tests.mock_salesforce import MockSalesforce
+
+TIMEOUT = 10
+
+
+class ApiGovernorTest(unittest.TestCase):
+    def test_usage_from_header_and_limits(self):
+        governor = ApiGovernor()
+        assert governor.remaining is None
+
+        governor.update_from_header("api-usage=25/5000; per-app-api-usage=17/250(appName=sample-connected-app)")
+        assert (governor.used, governor.limit, governor.remaining) == (25, 5000, 4975)
+
+        governor.update_from_limits({"DailyApiRequests": {"Max": 15000, "Remaining": 12000}})
+        assert governor.metrics()["api_requests_remaining_fraction"] == pytest.approx(0.8)
+
+    def test_rate_slows_down_below_soft_reserve(self):
+        governor = ApiGovernor(soft_reserve=0.2, hard_reserve=0.1, max_rate=20, min_rate=2)
+        governor.update_from_header("api-usage=500/1000")
+        assert governor.rate == 20  # noqa: PLR2004
+        assert not governor.prefer_bulk(5000)
+
+        governor.update_from_header("api-usage=850/1000")
+        assert governor.rate == pytest.approx(11)
+        assert governor.prefer_bulk(5000)
+        assert not governor.prefer_bulk(10)
+
+    def test_hard_reserve(self):
+        governor = ApiGovernor(hard_reserve=0.05, max_rate=1000)
+        governor.update_from_header("api-usage=9990/10000")
+        with pytest.raises(ApiLimitError):
+            governor.acquire()
+
+    def test_polls_limits_without_throttling_the_poll(self):
+        governor = ApiGovernor(max_rate=1000, limits_poll_interval=300)
+
+        def poll():
+            # the poll is made through the throttled session too
+            governor.acquire()
+            governor.update_from_limits({"DailyApiRequests": {"Max": 1000, "Remaining": 10}})
+
+        governor.limits_poller = poll
+        with pytest.raises(ApiLimitError):
+            governor.acquire()
+        assert governor.remaining == 10  # noqa: PLR2004
+        assert governor.requests == 0
+
+    def test_polls_again_until_a_poll_succeeds(self):
+        governor = ApiGovernor(max_rate=1000, limits_poll_interval=300)
+        outcomes = [False, RuntimeError("Not connected"), None]
+        polls = []
+
+        def poll():
+            polls.append(len(polls))
+            outcome = outcomes[len(polls) - 1]
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        governor.limits_poller = poll
+        for _ in range(5):
+            governor.acquire()
+        # skipped, failed, then polled once for the poll interval
+        assert polls == [0, 1, 2]
+
+
+class ClientGovernorTest(unittest.TestCase):
+    def setUp(self):
+        self.mock = MockSalesforce()
+        self.mock.start()
+        self.mock.seed("Account", [{"Name": "Hooli"}])
+
+    def tearDown(self):
+        self.mock.stop()
+
+    def test_login_and_first_call_through_the_governor(self):
+        governor = ApiGovernor()
+        sf = self.mock.client(login=True, governor=governor)
+        results = []
+        # the login is the first request through the governor, a poll of /limits must not wait for the connection
+        thread = threading.Thread(target=lambda: results.append(sf.find_account_by_name("Hooli")), daemon=True)
+        thread.start()
+        thread.join(TIMEOUT)
+
+        assert not thread.is_alive()
+        assert results[0]["Name"] == "Hooli"
+        assert self.mock.stats()["by_endpoint"]["POST login"] == 1
+        assert governor.metrics()["api_requests_limit"] == self.mock.daily_api_limit
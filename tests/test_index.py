@@ -0,0 +1,140 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from seed_salesforce.index import RecordIndex
+from tests.mock_salesforce import MockSalesforce
+
+
+class RecordIndexTest(unittest.TestCase):
+    def test_lookup_is_normalized(self):
+        index = RecordIndex()
+        index.add("Account", "Name", "Scrumptious Ice Cream", "0018a00001qmgddAAA")
+        assert index.get("Account", "Name", "  scrumptious ICE cream ") == "0018a00001qmgddAAA"
+        assert index.get("Account", "Name", "Another Shop") is None
+        # objects and fields are indexed separately
+        assert index.get("Property__c", "Name", "Scrumptious Ice Cream") is None
+
+    def test_case_sensitive_fields(self):
+        index = RecordIndex()
+        index.add("Benchmark__c", "Salesforce_Benchmark_ID__c", "BM-1", "a0156000004bOpHAAU")
+        index.add("Benchmark__c", "Salesforce_Benchmark_ID__c", "bm-1", "a0156000004bOpIAAU")
+        assert index.get("Benchmark__c", "Salesforce_Benchmark_ID__c", " BM-1 ") == "a0156000004bOpHAAU"
+        assert index.get("Benchmark__c", "Salesforce_Benchmark_ID__c", "bm-1") == "a0156000004bOpIAAU"
+        assert index.get("Benchmark__c", "Salesforce_Benchmark_ID__c", "Bm-1") is None
+
+    def test_discard(self):
+        index = RecordIndex()
+        index.update(
+            "Contact",
+            "Email",
+            [("a-user@somecompany.com", "0038a00000abcdeAAA"), ("b-user@somecompany.com", "0038a00000fghijAAA")],
+        )
+        index.discard("Contact", "Email", "A-User@somecompany.com")
+        assert index.get("Contact", "Email", "a-user@somecompany.com") is None
+
+        index.discard_id("Contact", "0038a00000fghij")
+        assert len(index) == 0
+
+    def test_discard_id_after_the_value_moved_to_another_record(self):
+        index = RecordIndex()
+        index.add("Account", "Name", "Hooli", "0018a00000abcdeAAA")
+        index.add("Account", "Name", "Hooli", "0018a00000fghijAAA")
+        index.discard_id("Account", "0018a00000abcdeAAA")
+        assert index.get("Account", "Name", "Hooli") == "0018a00000fghijAAA"
+        index.discard_id("Account", "0018a00000fghijAAA")
+        assert len(index) == 0
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = Path(tempdir) / "index.sqlite"
+            index = RecordIndex(path)
+            index.add("Benchmark__c", "Salesforce_Benchmark_ID__c", "11999", "a0156000004bOpHAAU")
+            index.add("Account", "Name", "Scrumptious Ice Cream", "0018a00001qmgddAAA")
+            index.add("Contact", "Email", "richard@example.com", "0038a00000abcdeAAA")
+            index.clear("Account")
+            index.discard_id("Contact", "0038a00000abcdeAAA")
+            index.close()
+
+            index = RecordIndex(path)
+            assert index.get("Benchmark__c", "Salesforce_Benchmark_ID__c", "11999") == "a0156000004bOpHAAU"
+            assert index.get("Account", "Name", "Scrumptious Ice Cream") is None
+            assert len(index) == 1
+            index.close()
+
+
+class ClientIndexTest(unittest.TestCase):
+    def test_upserts_only_index_the_lookup_fields(self):
+        with MockSalesforce() as mock:
+            [property_id] = mock.seed("Property__c", [{"Name": "Building 1"}])
+            index = RecordIndex()
+            sf = mock.client(record_index=index)
+            sf.upsert_records("Property__c", [{"Id": property_id, "Gross_Floor_Area__c": 1000.0}])
+            sf.bulk_upsert("Property__c", [{"Id": property_id, "Name": "Building 1"}])
+            assert len(index) == 0
+
+            [result] = sf.upsert_records(
+                "Benchmark__c",
+                [{"Salesforce_Benchmark_ID__c": "BM-1"}],
+                "Salesforce_Benchmark_ID__c",
+            )
+            assert index.get("Benchmark__c", "Salesforce_Benchmark_ID__c", "BM-1") == result.record_id
+            assert index.get("Benchmark__c", "Salesforce_Benchmark_ID__c", "bm-1") is None
+            assert len(index) == 1
+
+    def test_failed_deletes_stay_indexed(self):
+        with MockSalesforce() as mock:
+            [account_id] = mock.seed("Account", [{"Name": "Hooli"}])
+            index = RecordIndex()
+            index.add("Account", "Name", "Hooli", account_id)
+            index.add("Account", "Name", "Pied Piper", "001000000000000099")
+            sf = mock.client(record_index=index)
+
+            results = sf.delete_records_by_ids("Account", [account_id, "001000000000000099"])
+            assert [result.success for result in results] == [True, False]
+            assert index.get("Account", "Name", "Hooli") is None
+            assert index.get("Account", "Name", "Pied Piper") == "001000000000000099"
+
+
+class FindRecordsByFieldTest(unittest.TestCase):
+    def test_results_are_keyed_as_given(self):
+        with MockSalesforce() as mock:
+            [account_id] = mock.seed("Account", [{"Name": "Hooli"}])
+            sf = mock.client(record_index=RecordIndex())
+            for _ in range(2):
+                # the second time through the index
+                accounts = sf.find_accounts_by_names([" Hooli ", "hooli", "Pied Piper", " "])
+                assert list(accounts) == [" Hooli ", "hooli", "Pied Piper"]
+                assert accounts[" Hooli "]["Id"] == accounts["hooli"]["Id"] == account_id
+                assert accounts["Pied Piper"] == {}
+
+    def test_case_sensitive_fields(self):
+        with MockSalesforce() as mock:
+            ids = mock.seed(
+                "Benchmark__c",
+                [{"Salesforce_Benchmark_ID__c": "BM-1"}, {"Salesforce_Benchmark_ID__c": "bm-1"}],
+            )
+            sf = mock.client()
+            benchmarks = sf.find_records_by_field(
+                "Benchmark__c",
+                "Salesforce_Benchmark_ID__c",
+                ["BM-1", "bm-1", "Bm-1"],
+            )
+            assert [benchmark.get("Id") for benchmark in benchmarks.values()] == [*ids, None]
+
+    def test_records_deleted_between_the_queries_are_not_found(self):
+        with MockSalesforce() as mock:
+            [account_id] = mock.seed("Account", [{"Name": "Hooli"}])
+            index = RecordIndex()
+            sf = mock.client(record_index=index)
+            get_records_by_ids = sf.get_records_by_ids
+
+            def delete_then_get(object_name, record_ids, **kwargs):
+                mock.records["Account"].pop(account_id)
+                return get_records_by_ids(object_name, record_ids, **kwargs)
+
+            sf.get_records_by_ids = delete_then_get
+            assert sf.find_accounts_by_names(["Hooli"]) == {"Hooli": {}}
+            assert len(index) == 0
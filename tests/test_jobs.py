@@ -0,0 +1,153 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import csv
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+import pytest
+
+from seed_salesforce.jobs import JobJournal, JobRunner
+from seed_salesforce.results import RecordResult
+from seed_salesforce.write_behind import WriteBehindQueue
+from tests.mock_salesforce import MockSalesforce
+
+
+class StubClient:
+    """Stand-in for SalesforceClient that runs calls in order and keeps Bulk API jobs in memory"""
+
+    write_behind = None
+
+    def __init__(self, fail_after=None):
+        self.calls = []
+        self.fail_after = fail_after
+        self.jobs = {}
+        self.aborted = []
+        self.created = []
+
+    def map_concurrent(self, method, items, max_workers=1, return_exceptions=False):
+        assert max_workers == 1
+        assert return_exceptions
+        results = []
+        for item in items:
+            try:
+                results.append(getattr(self, method)(**item))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def update_benchmark(self, salesforce_benchmark_id):
+        if self.fail_after is not None and len(self.calls) >= self.fail_after:
+            raise KeyboardInterrupt
+        self.calls.append(salesforce_benchmark_id)
+        if salesforce_benchmark_id == "bad":
+            raise Exception("Error updating benchmark")
+        return {"Id": f"id-{salesforce_benchmark_id}"}
+
+    def create_bulk_ingest_job(self, object_name, operation, external_id_field=None):
+        job_id = f"750{len(self.jobs)}"
+        self.created.append((object_name, operation, external_id_field))
+        self.jobs[job_id] = None
+        return {"id": job_id}
+
+    def upload_bulk_job_data(self, job_id, data):
+        if self.fail_after is not None and len(self.jobs) > self.fail_after:
+            raise KeyboardInterrupt
+        self.jobs[job_id] = list(csv.DictReader(io.StringIO(data)))
+
+    def close_bulk_job(self, job_id):
+        return {"id": job_id}
+
+    def abort_bulk_job(self, job_id):
+        self.aborted.append(job_id)
+
+    def collect_bulk_job(self, object_name, job_id, timeout=3600):
+        assert (object_name, timeout) == ("Property__c", 3600)
+        return [RecordResult(success=True, record_id=row["Id"], record=row, job_id=job_id) for row in self.jobs[job_id]]
+
+
+class JobRunnerTest(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tempdir.name) / "journal.sqlite"
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def runner(self, client):
+        runner = JobRunner(client, self.path)
+        self.addCleanup(runner.journal.close)
+        return runner
+
+    def test_run_resumes_after_interruption(self):
+        items = [{"salesforce_benchmark_id": key} for key in ["B1", "B2", "bad", "B4", "B5"]]
+
+        client = StubClient(fail_after=3)
+        with pytest.raises(KeyboardInterrupt):
+            self.runner(client).run(
+                "benchmarks",
+                items,
+                "update_benchmark",
+                key=lambda item: item["salesforce_benchmark_id"],
+                checkpoint_size=2,
+            )
+
+        # only the first checkpoint was journaled, the failed item is retried
+        client = StubClient()
+        summary = self.runner(client).run(
+            "benchmarks",
+            items,
+            "update_benchmark",
+            key=lambda item: item["salesforce_benchmark_id"],
+            checkpoint_size=2,
+        )
+        assert client.calls == ["bad", "B4", "B5"]
+        assert (summary.succeeded, summary.failed, summary.skipped) == (2, 1, 2)
+
+        results = JobJournal(self.path).results("benchmarks")
+        assert results["B1"].record_id == "id-B1"
+        assert not results["bad"].success
+        assert results["bad"].errors == ["Exception: Error updating benchmark"]
+
+    def test_run_waits_for_the_write_behind_queue(self):
+        with MockSalesforce() as mock:
+            ids = mock.seed("Property__c", [{"Name": "Building 1"}, {"Name": "Building 2"}])
+            queue = WriteBehindQueue(max_delay=None)
+            sf = mock.client(write_behind=queue)
+            items = [
+                {"property_id": ids[0], "Name": "Renamed"},
+                {"property_id": "a00000000000000099", "Name": "Missing"},
+            ]
+            summary = self.runner(sf).run("properties", items, "update_property", key=lambda item: item["property_id"])
+            queue.close()
+
+            assert mock.records["Property__c"][ids[0]]["Name"] == "Renamed"
+        assert (summary.succeeded, summary.failed) == (1, 1)
+        results = JobJournal(self.path).results("properties")
+        assert results[ids[0]].record_id == ids[0]
+        assert not results["a00000000000000099"].success
+
+    def test_run_bulk_upsert_reattaches_to_submitted_jobs(self):
+        records = [{"Id": f"a0{i}", "Name": f"Property {i}"} for i in range(5)]
+
+        # the second job is created but interrupted during its upload
+        client = StubClient(fail_after=1)
+        with pytest.raises(KeyboardInterrupt):
+            self.runner(client).run_bulk_upsert("properties", "Property__c", records, batch_size=2)
+        journal = JobJournal(self.path)
+        assert journal.bulk_jobs("properties") == [("7500", "submitted"), ("7501", "open")]
+        journal.close()
+
+        client.fail_after = None
+        summary = self.runner(client).run_bulk_upsert("properties", "Property__c", records, batch_size=2)
+        assert client.aborted == ["7501"]
+        assert set(client.created) == {("Property__c", "upsert", "Id")}
+        assert [row["Id"] for row in client.jobs["7502"]] == ["a02", "a03"]
+        assert [row["Id"] for row in client.jobs["7503"]] == ["a04"]
+        assert (summary.succeeded, summary.failed, summary.skipped) == (5, 0, 2)
+
+        # a completed job is skipped entirely
+        summary = self.runner(client).run_bulk_upsert("properties", "Property__c", records, batch_size=2)
+        assert list(client.jobs) == ["7500", "7501", "7502", "7503"]
+        assert (summary.succeeded, summary.skipped) == (0, 5)
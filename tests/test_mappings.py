@@ -0,0 +1,146 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import datetime
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import pytest
+
+from seed_salesforce.exceptions import MappingError
+from seed_salesforce.mappings import MappingEngine, compile_mapping
+from tests.mock_salesforce import MockSalesforce
+
+BENCHMARK_MAPPING = {
+    "object": "Benchmark__c",
+    "external_id_field": "Salesforce_Benchmark_ID__c",
+    "skip_empty": True,
+    "fields": {
+        "Salesforce_Benchmark_ID__c": "{custom_id_1}",
+        "Name": "{property_name} ({year_ending})",
+        "Site_EUI__c": {"column": "site_eui", "type": "double"},
+        "ENERGY_STAR_Score__c": {"column": "extra_data.energy_star_score", "type": "int"},
+        "Year_Ending__c": {"column": "year_ending", "type": "date"},
+        "Benchmark_Source__c": {"value": "SEED"},
+    },
+}
+# the mock has no Benchmark_Source__c field
+BULK_MAPPING = {
+    **BENCHMARK_MAPPING,
+    "fields": {field: spec for field, spec in BENCHMARK_MAPPING["fields"].items() if field != "Benchmark_Source__c"},
+}
+ROWS = 1000
+
+
+class CompileMappingTest(unittest.TestCase):
+    def test_map_rows(self):
+        mapping = compile_mapping(BENCHMARK_MAPPING)
+        [first, second] = mapping.map_rows(
+            [
+                {
+                    "custom_id_1": "BM-1",
+                    "property_name": "City Hall",
+                    "year_ending": "2023-12-31",
+                    "site_eui": "1,080.5",
+                    "extra_data": {"energy_star_score": "75"},
+                },
+                {"custom_id_1": "BM-2", "site_eui": ""},
+            ],
+        )
+        assert first == {
+            "Salesforce_Benchmark_ID__c": "BM-1",
+            "Name": "City Hall (2023-12-31)",
+            "Site_EUI__c": pytest.approx(1080.5),
+            "ENERGY_STAR_Score__c": 75,
+            "Year_Ending__c": datetime.date(2023, 12, 31),
+            "Benchmark_Source__c": "SEED",
+        }
+        # the empty values are left out, so they don't clear the fields in Salesforce
+        assert second == {"Salesforce_Benchmark_ID__c": "BM-2", "Benchmark_Source__c": "SEED"}
+        assert (mapping.object_name, mapping.external_id_field) == ("Benchmark__c", "Salesforce_Benchmark_ID__c")
+
+    def test_flat_mapping_keeps_empty_fields(self):
+        mapping = compile_mapping({"Name": "{name}", "Floors__c": {"column": "floors", "default": 1}})
+        assert mapping({"name": "Depot"}) == {"Name": "Depot", "Floors__c": 1}
+        assert mapping({}) == {"Name": None, "Floors__c": 1}
+
+    def test_empty_cells(self):
+        mapping = compile_mapping({"Name": {"column": "name"}, "Floors__c": {"column": "floors", "default": 1}})
+        # empty CSV cells are empty values, with or without a default
+        assert mapping({"name": "", "floors": ""}) == {"Name": None, "Floors__c": 1}
+        assert mapping({"name": "Depot", "floors": "3"}) == {"Name": "Depot", "Floors__c": "3"}
+
+    def test_invalid_mappings_and_values(self):
+        with pytest.raises(MappingError, match="one of column, template or value"):
+            compile_mapping({"Name": {"column": "name", "value": "fixed"}})
+        with pytest.raises(MappingError, match="unknown type"):
+            compile_mapping({"Name": {"column": "name", "type": "blob"}})
+        with pytest.raises(MappingError, match="can't map field Site_EUI__c"):
+            compile_mapping(BENCHMARK_MAPPING).map_rows([{"site_eui": "n/a"}])
+
+
+class MappingEngineTest(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.template_dir = Path(self.tempdir.name)
+        (self.template_dir / "benchmark.json").write_text(json.dumps(BENCHMARK_MAPPING))
+        self.engine = MappingEngine(self.template_dir, cache_size=2)
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_templates_are_compiled_once(self):
+        mapping = self.engine.get_mapping("benchmark.json")
+        assert self.engine.get_mapping("benchmark.json") is mapping
+        assert self.engine.cache_info()["hits"] == 1
+
+        # a changed template is compiled again
+        path = self.template_dir / "benchmark.json"
+        path.write_text(json.dumps({"Name": "{property_name}"}))
+        os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 1))
+        assert self.engine.map_rows("benchmark.json", [{"property_name": "Depot"}]) == [{"Name": "Depot"}]
+
+        rendered = self.engine.render("benchmark.json")
+        rendered["Name"] = "changed"
+        assert self.engine.render("benchmark.json") == {"Name": "{property_name}"}
+
+    def test_missing_templates(self):
+        with pytest.raises(MappingError, match="not found"):
+            self.engine.get_mapping("../benchmark.json")
+        with pytest.raises(MappingError, match="no template directory"):
+            MappingEngine().get_mapping("benchmark.json")
+
+    def test_jinja_templates_are_rendered_with_the_context(self):
+        pytest.importorskip("jinja2")
+        (self.template_dir / "benchmark.json.j2").write_text(
+            '{"object": "Benchmark__c", "fields": {"Salesforce_Benchmark_ID__c": "{custom_id_1}-{{ year }}"}}',
+        )
+        mapping = self.engine.get_mapping("benchmark.json.j2", {"year": 2024})
+        assert mapping({"custom_id_1": "BM-1"}) == {"Salesforce_Benchmark_ID__c": "BM-1-2024"}
+        assert self.engine.get_mapping("benchmark.json.j2", {"year": 2025}) is not mapping
+
+
+class BulkUpsertMappedTest(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        template_dir = Path(self.tempdir.name)
+        (template_dir / "benchmark.json").write_text(json.dumps(BULK_MAPPING))
+        self.mock = MockSalesforce()
+        self.mock.start()
+        self.sf = self.mock.client(mappings=MappingEngine(template_dir))
+
+    def tearDown(self):
+        self.mock.stop()
+        self.tempdir.cleanup()
+
+    def test_bulk_upsert_mapped(self):
+        self.mock.seed("Benchmark__c", [{"Salesforce_Benchmark_ID__c": "BM-0", "Site_EUI__c": 70.0}])
+        rows = ({"custom_id_1": f"BM-{index}", "site_eui": str(80 + index)} for index in range(ROWS))
+        results = self.sf.bulk_upsert_mapped("benchmark.json", rows, mapping_batch_size=300)
+
+        assert len(results) == ROWS
+        assert sum(result.created for result in results) == ROWS - 1
+        assert self.sf.get_benchmark_by_custom_id("BM-0")["Site_EUI__c"] == pytest.approx(80)
+        assert self.sf.render_mappings("benchmark.json", {}) == BULK_MAPPING
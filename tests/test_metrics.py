@@ -0,0 +1,95 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import pytest
+
+from seed_salesforce.exceptions import RecordNotFoundError
+from seed_salesforce.metrics import UNATTRIBUTED, ClientMetrics, Histogram, MetricsSink, PrometheusTextSink
+from seed_salesforce.retry import RetryPolicy
+from tests.mock_salesforce import MockSalesforce
+
+PROPERTIES = 500
+PAGE_SIZE = 200
+
+
+class RecordingSink(MetricsSink):
+    def __init__(self):
+        self.calls = []
+
+    def record_call(self, call):
+        self.calls.append(call)
+
+
+class HistogramTest(unittest.TestCase):
+    def test_quantiles(self):
+        histogram = Histogram(buckets=(0.1, 1.0))
+        for value in (0.05, 0.05, 0.5, 5.0):
+            histogram.observe(value)
+        assert histogram.quantile(0.5) == pytest.approx(0.1)
+        assert histogram.quantile(0.75) == pytest.approx(1.0)
+        assert histogram.quantile(1) == float("inf")
+        assert list(histogram.to_dict()["buckets"].values()) == [2, 3, 4]
+
+
+class ClientMetricsTest(unittest.TestCase):
+    def setUp(self):
+        self.mock = MockSalesforce(page_size=PAGE_SIZE)
+        self.mock.start()
+        self.ids = self.mock.seed("Property__c", [{"Name": f"Property {i}"} for i in range(PROPERTIES)])
+        self.sink = RecordingSink()
+        self.metrics = ClientMetrics(sinks=[self.sink])
+        self.sf = self.mock.client(metrics=self.metrics, retry_policy=RetryPolicy(backoff_base=0.01))
+
+    def tearDown(self):
+        self.mock.stop()
+
+    def stats(self, method):
+        return next(entry for entry in self.metrics.stats() if entry["method"] == method)
+
+    def test_requests_are_attributed_to_the_outermost_call(self):
+        self.sf.find_property_by_name("Property 1")
+        self.sf.find_property_by_name("Property 2")
+
+        stats = self.stats("find_property_by_name")
+        assert stats["object_name"] == "Property__c"
+        # the lookup query and the fetch of the record, the nested get_property_by_id is part of the call
+        assert stats["requests_per_call"] == pytest.approx(2)
+        assert stats["api_requests"] == stats["requests"]
+        assert stats["bytes_received"] > 0
+        assert [call.method for call in self.sink.calls] == ["find_property_by_name", "find_property_by_name"]
+
+    def test_iterators_and_calls_between_items(self):
+        for index, record in enumerate(self.sf.iter_query("SELECT Id FROM Property__c")):
+            if index == PAGE_SIZE:
+                self.sf.get_property_by_id(record["Id"])
+
+        assert self.stats("iter_query")["requests"] == self.mock.stats()["by_endpoint"]["GET query"]
+        assert self.stats("get_property_by_id")["requests"] == 1
+
+    def test_errors_retries_and_unattributed_requests(self):
+        self.mock.inject_error(count=1, resource="composite/sobjects")
+        self.sf.update_records("Property__c", [{"Id": self.ids[0], "Name": "Renamed"}])
+        assert self.stats("update_records")["retries"] == 1
+
+        with pytest.raises(RecordNotFoundError):
+            self.sf.get_property_by_id("a00000000000000000")
+        stats = self.stats("get_property_by_id")
+        assert (stats["errors"], stats["http_errors"]) == (1, 1)
+
+        self.sf.connection.query("SELECT Id FROM Account")
+        assert self.stats(UNATTRIBUTED)["requests"] == 1
+
+    def test_prometheus_export(self):
+        self.sf.get_property_by_id(self.ids[0])
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = Path(tempdir) / "seed_salesforce.prom"
+            self.metrics.sinks.append(PrometheusTextSink(path))
+            self.metrics.export()
+            text = path.read_text()
+
+        labels = 'method="get_property_by_id",object="Property__c"'
+        assert f"seed_salesforce_requests_total{{{labels}}} 1" in text
+        assert f'seed_salesforce_call_duration_seconds_bucket{{{labels},le="+Inf"}} 1' in text
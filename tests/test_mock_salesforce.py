@@ -0,0 +1,139 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import pytest
+
+from benchmarks.run import compare
+from benchmarks.run import main as run_benchmarks
+from seed_salesforce.composite import reference
+from seed_salesforce.exceptions import DuplicateRecordError, SalesforceClientError
+from seed_salesforce.governor import ApiGovernor
+from seed_salesforce.retry import RetryPolicy
+from tests.mock_salesforce import MockSalesforce
+
+CONTACTS = 450
+PAGE_SIZE = 200
+INJECTED_ERRORS = 2
+BULK_BATCH_SIZE = 2
+
+
+class MockSalesforceTest(unittest.TestCase):
+    def setUp(self):
+        self.mock = MockSalesforce(page_size=PAGE_SIZE)
+        self.mock.start()
+        self.sf = self.mock.client(retry_policy=RetryPolicy(backoff_base=0.01))
+
+    def tearDown(self):
+        self.mock.stop()
+
+    def test_query_pages_and_lookups(self):
+        self.mock.seed("Contact", [{"LastName": f"C{i}", "Email": f"c{i}@example.com"} for i in range(CONTACTS)])
+        assert len(list(self.sf.iter_query("SELECT Id, Email FROM Contact"))) == CONTACTS
+        # the first page and two more
+        assert self.mock.stats()["by_endpoint"] == {"GET query": -(-CONTACTS // PAGE_SIZE)}
+
+        found = self.sf.find_contacts_by_emails(["C7@EXAMPLE.COM", "missing@example.com"], fields=["LastName"])
+        assert found["C7@EXAMPLE.COM"]["LastName"] == "C7"
+        assert found["missing@example.com"] == {}
+
+    def test_list_object_names(self):
+        assert self.sf.list_object_names() == ["Account", "Benchmark__c", "Contact", "Property__c"]
+        self.sf.list_object_names()
+        # the global describe is cached by the schema registry
+        assert self.mock.stats()["by_endpoint"] == {"GET sobjects": 1}
+
+    def test_duplicate_account_names(self):
+        self.mock.seed("Account", [{"Name": "Hooli"}, {"Name": "Hooli"}])
+        with pytest.raises(DuplicateRecordError):
+            self.sf.find_account_by_name("Hooli")
+        with pytest.raises(DuplicateRecordError):
+            self.sf.create_or_update_contact_on_account("belson@example.com", "Hooli", LastName="Belson")
+        assert self.mock.records["Contact"] == {}
+
+    def test_bulk_upsert(self):
+        self.mock.seed("Benchmark__c", [{"Salesforce_Benchmark_ID__c": "BM-1", "Site_EUI__c": 70.0}])
+        results = self.sf.bulk_upsert_benchmarks(
+            [{"Salesforce_Benchmark_ID__c": "BM-1", "Site_EUI__c": 80.5}, {"Salesforce_Benchmark_ID__c": "BM-2"}],
+        )
+        assert [(result.success, result.created) for result in results] == [(True, False), (True, True)]
+        assert self.sf.get_benchmark_by_custom_id("BM-1")["Site_EUI__c"] == pytest.approx(80.5)
+
+    def test_bulk_ingest_keeps_the_record_order(self):
+        ids = self.mock.seed("Account", [{"Name": "Hooli"}, {"Name": "Pied Piper"}])
+        records = [
+            {"Id": "001000000000000099", "Name": "Missing"},
+            {"Id": ids[0], "Name": "Hooli XYZ"},
+            {"Id": "001000000000000098", "Name": "Also Missing"},
+            {"Id": ids[1], "Name": "Pied Piper Inc"},
+        ]
+        results = self.sf.bulk_ingest("Account", records, "update", batch_size=BULK_BATCH_SIZE)
+
+        assert self.mock.stats()["by_endpoint"]["POST jobs/ingest"] == len(records) / BULK_BATCH_SIZE
+        assert [(result.success, result.record["Name"]) for result in results] == [
+            (False, "Missing"),
+            (True, "Hooli XYZ"),
+            (False, "Also Missing"),
+            (True, "Pied Piper Inc"),
+        ]
+
+    def test_bulk_writes_of_the_governor_keep_the_record_order(self):
+        # below the soft reserve from the first response, without ever refusing or slowing down the calls
+        governor = ApiGovernor(soft_reserve=1, hard_reserve=0, max_rate=1000, min_rate=1000, bulk_threshold=2)
+        sf = self.mock.client(governor=governor)
+        ids = self.mock.seed("Account", [{"Name": "Hooli"}, {"Name": "Pied Piper"}])
+        records = [
+            {"Id": ids[0], "Name": "Hooli XYZ"},
+            {"Id": "001000000000000099", "Name": "Missing"},
+            {"Id": ids[1], "Name": "Pied Piper Inc"},
+        ]
+        sf.get_api_limits()
+        results = sf.update_records("Account", records)
+
+        assert self.mock.stats()["by_endpoint"]["POST jobs/ingest"] == 1
+        assert [(result.success, result.record["Name"]) for result in results] == [
+            (True, "Hooli XYZ"),
+            (False, "Missing"),
+            (True, "Pied Piper Inc"),
+        ]
+
+    def test_composite_all_or_none_rolls_back(self):
+        request = self.sf.composite_request(all_or_none=True)
+        request.create("Account", {"Name": "Hooli"}, "newAccount")
+        request.create("Contact", {"LastName": "Belson", "AccountId": reference("newAccount")}, "newContact")
+        request.create("Contact", {"Unknown__c": "value"}, "invalidContact")
+        with pytest.raises(SalesforceClientError, match="PROCESSING_HALTED"):
+            self.sf.composite(request)
+        assert self.mock.records["Account"] == {}
+        assert self.mock.records["Contact"] == {}
+
+    def test_injected_errors_are_retried(self):
+        self.mock.inject_error(status=503, count=INJECTED_ERRORS, resource="composite/sobjects")
+        results = self.sf.create_accounts([{"Name": "Pied Piper"}])
+        assert results[0].success
+        assert self.mock.stats()["errors"] == INJECTED_ERRORS
+        assert self.mock.stats()["by_endpoint"]["POST composite/sobjects"] == INJECTED_ERRORS + 1
+
+
+class BenchmarksTest(unittest.TestCase):
+    def test_results_are_json(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            output = Path(tempdir) / "results.json"
+            assert run_benchmarks(["--scenario", "resolve_contacts", "--scale", "0.01", "--output", str(output)]) == 0
+            results = json.loads(output.read_text())
+
+        [result] = results["results"]
+        assert result["scenario"] == "resolve_contacts"
+        assert result["records"] == result["size"]
+        assert result["requests"] > 0
+        assert result["peak_memory_bytes"] > 0
+
+        slower = {"results": [{**result, "records_per_second": result["records_per_second"] / 2}]}
+        assert compare(slower, results) == [
+            f"resolve_contacts: {slower['results'][0]['records_per_second']} records/sec, "
+            f"was {result['records_per_second']}",
+        ]
+        assert compare(results, results) == []
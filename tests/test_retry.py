@@ -0,0 +1,70 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import json
+import unittest
+
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
+
+from seed_salesforce.retry import RetryPolicy
+
+
+def make_response(status_code: int, body=None, headers=None) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(body).encode() if body is not None else b""
+    response.headers.update(headers or {})
+    return response
+
+
+class RetryPolicyTest(unittest.TestCase):
+    def test_classify_response(self):
+        assert RetryPolicy.classify_response(make_response(200, {"Id": "001"})) is None
+        assert RetryPolicy.classify_response(make_response(503)) == "SERVICE_UNAVAILABLE"
+        assert RetryPolicy.classify_response(make_response(504)) == "GATEWAY_ERROR"
+        locked = make_response(
+            400,
+            [{"errorCode": "UNABLE_TO_LOCK_ROW", "message": "unable to obtain exclusive access"}],
+        )
+        assert RetryPolicy.classify_response(locked) == "UNABLE_TO_LOCK_ROW"
+        limited = make_response(403, [{"errorCode": "REQUEST_LIMIT_EXCEEDED", "message": "ConcurrentRequests"}])
+        assert RetryPolicy.classify_response(limited) == "REQUEST_LIMIT_EXCEEDED"
+        assert RetryPolicy.classify_response(make_response(400, [{"errorCode": "INVALID_FIELD"}])) is None
+
+    def test_classify_exception(self):
+        reset = requests.exceptions.ConnectionError(ProtocolError("Connection aborted.", ConnectionResetError()))
+        assert RetryPolicy.classify_exception(reset) == "CONNECTION_RESET"
+        refused = requests.exceptions.ConnectionError(
+            MaxRetryError(None, "/", NewConnectionError(None, "Connection refused")),
+        )
+        assert RetryPolicy.classify_exception(refused) == "CONNECTION_FAILED"
+        assert RetryPolicy.classify_exception(requests.exceptions.ReadTimeout()) == "READ_TIMEOUT"
+        assert RetryPolicy.classify_exception(requests.exceptions.SSLError()) is None
+
+    def test_should_retry_is_idempotency_aware(self):
+        policy = RetryPolicy()
+        # the request may have been processed, retrying a POST could create the record twice
+        assert not policy.should_retry("CONNECTION_RESET", "POST", 1)
+        assert policy.should_retry("CONNECTION_RESET", "PATCH", 1)
+        # the request was rejected or never sent, it is safe to retry any method
+        assert policy.should_retry("UNABLE_TO_LOCK_ROW", "POST", 1)
+        assert policy.should_retry("CONNECTION_FAILED", "POST", 1)
+        assert not policy.should_retry(None, "GET", 1)
+
+    def test_max_attempts_and_budget(self):
+        policy = RetryPolicy(max_attempts={"UNABLE_TO_LOCK_ROW": 2}, budget_ratio=0.5, budget_min=1)
+        assert policy.should_retry("UNABLE_TO_LOCK_ROW", "GET", 1)
+        assert not policy.should_retry("UNABLE_TO_LOCK_ROW", "GET", 2)
+
+        # one retry was consumed and the budget is 1 + 0.5 per request
+        assert not policy.should_retry("SERVICE_UNAVAILABLE", "GET", 1)
+        policy.record_request()
+        policy.record_request()
+        assert policy.should_retry("SERVICE_UNAVAILABLE", "GET", 1)
+        assert policy.stats() == {"requests": 2, "retries": 2}
+
+    def test_backoff(self):
+        policy = RetryPolicy(backoff_base=1, backoff_max=4)
+        assert all(0 <= policy.backoff(attempt) <= 4 for attempt in range(1, 10))  # noqa: PLR2004
+        assert policy.backoff(1, retry_after=10) == 10  # noqa: PLR2004
+        assert RetryPolicy.retry_after(make_response(503, headers={"Retry-After": "120"})) == 120  # noqa: PLR2004
@@ -1,10 +1,19 @@
 # Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
 
 import random
+import tempfile
 import unittest
 from pathlib import Path
 
+import pytest
+
+from seed_salesforce.cache import MemoryRecordCache
+from seed_salesforce.exceptions import RecordNotFoundError
+from seed_salesforce.governor import ApiGovernor
+from seed_salesforce.jobs import JobRunner
 from seed_salesforce.salesforce_client import SalesforceClient
+from seed_salesforce.session_cache import FileSessionCache
+from seed_salesforce.sync_state import JSONSyncState
 
 
 class SalesforceClientTest(unittest.TestCase):
@@ -111,8 +120,9 @@ class SalesforceIntegrationTest(unittest.TestCase):
             "AccountId": account_id,
             "LastName": "Russ Hanneman" + str(r),
         }
-        self.sf.create_or_update_contact_on_account("user" + str(r) + "@company.com", **details)
+        contact = self.sf.create_or_update_contact_on_account("user" + str(r) + "@company.com", **details)
         assert contact["AccountId"] == account_id
+        assert contact["LastName"] == "Russ Hanneman" + str(r)
 
         # now delete it to cleanup
         success = self.sf.delete_account_by_id(account_id)
@@ -190,3 +200,172 @@ class SalesforceIntegrationTest(unittest.TestCase):
         # restore value
         args["ENERGY_STAR_Score__c"] = energy_star_score
         self.sf.update_benchmark(salesforce_benchmark_id, **args)
+
+    def test_bulk_upsert_benchmarks(self):
+        benchmark = self.sf.get_first_benchmark()
+        salesforce_benchmark_id = benchmark["Salesforce_Benchmark_ID__c"]
+
+        # upsert the existing value so the record is left unchanged
+        records = [
+            {
+                "Salesforce_Benchmark_ID__c": salesforce_benchmark_id,
+                "ENERGY_STAR_Score__c": benchmark["ENERGY_STAR_Score__c"],
+            },
+        ]
+        results = self.sf.bulk_upsert_benchmarks(records)
+        assert len(results) == 1
+        assert results[0].success
+        assert results[0].record_id == benchmark["Id"]
+        assert not results[0].created
+
+    def test_account_collections(self):
+        r = random.randrange(1, 5000, 2)
+        names = [f"Collection Test Account {r}-{i}" for i in range(3)]
+        results = self.sf.create_accounts([{"Name": name, "Type": "Office"} for name in names])
+        assert all(result.success for result in results)
+        account_ids = [result.record_id for result in results]
+
+        update_results = self.sf.update_accounts(
+            [{"Id": account_id, "Phone": "444-444-4444"} for account_id in account_ids],
+        )
+        assert all(result.success for result in update_results)
+
+        accounts = self.sf.get_records_by_ids("Account", account_ids, fields=["Id", "Name", "Phone"])
+        assert [account["Name"] for account in accounts] == names
+        assert all(account["Phone"] == "444-444-4444" for account in accounts)
+
+        # now delete them to cleanup
+        delete_results = self.sf.delete_records_by_ids("Account", account_ids)
+        assert all(result.success for result in delete_results)
+
+    def test_find_accounts_by_names(self):
+        r = random.randrange(1, 5000, 2)
+        test_account_name = f"Bulk Lookup Account{r}"
+        account = self.sf.create_account(test_account_name, Type="Office")
+
+        accounts = self.sf.find_accounts_by_names([test_account_name, f"Missing Account{r}"])
+        assert accounts[test_account_name]["Id"] == account["Id"]
+        assert accounts[test_account_name]["Type"] == "Office"
+        assert accounts[f"Missing Account{r}"] == {}
+
+        # now delete it to cleanup
+        success = self.sf.delete_account_by_id(account["Id"])
+        assert success
+
+    def test_map_concurrent(self):
+        r = random.randrange(1, 5000, 2)
+        results = self.sf.create_accounts([{"Name": f"Concurrent Test Account {r}-{i}"} for i in range(4)])
+        account_ids = [result.record_id for result in results]
+
+        accounts = self.sf.map_concurrent("get_account_by_account_id", account_ids, max_workers=4)
+        assert [account["Id"] for account in accounts] == account_ids
+
+        statuses = self.sf.map_concurrent(self.sf.delete_account_by_id, account_ids, max_workers=4)
+        assert all(statuses)
+
+    def test_field_projection(self):
+        benchmark = self.sf.get_first_benchmark(fields=["Salesforce_Benchmark_ID__c", "ENERGY_STAR_Score__c"])
+        assert set(benchmark.keys()) == {"attributes", "Id", "Salesforce_Benchmark_ID__c", "ENERGY_STAR_Score__c"}
+
+        bench_by_custom_id = self.sf.get_benchmark_by_custom_id(
+            benchmark["Salesforce_Benchmark_ID__c"],
+            fields=["ENERGY_STAR_Score__c"],
+        )
+        assert bench_by_custom_id["Id"] == benchmark["Id"]
+        assert "Name" not in bench_by_custom_id
+
+        r = random.randrange(1, 5000, 2)
+        account = self.sf.create_account(f"Projection Test Account{r}", fetch=False, Type="Office")
+        assert account["success"]
+        account = self.sf.get_account_by_account_id(account["Id"], fields=["Name", "Type"])
+        assert account["Type"] == "Office"
+        assert "Phone" not in account
+
+        # now delete it to cleanup
+        success = self.sf.delete_account_by_id(account["Id"])
+        assert success
+
+    def test_iter_query(self):
+        records = self.sf.iter_query("SELECT Id, Account.Name FROM Contact LIMIT 450", batch_size=200)
+        count = 0
+        for record in records:
+            assert "attributes" not in record
+            assert "Id" in record
+            count += 1
+        assert count <= 450  # noqa: PLR2004
+
+    def test_export_object(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "accounts.csv"
+            stats = self.sf.export_object("Account", path, fields=["Id", "Name"], where="CreatedDate = LAST_N_DAYS:30")
+            assert path.exists()
+            with open(path) as f:
+                assert f.readline().strip() == '"Id","Name"'
+                assert sum(1 for _ in f) == stats["rows"]
+
+    def test_iter_changes(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            state = JSONSyncState(Path(tmpdir) / "sync-state.json")
+            list(self.sf.iter_changes(state, ["Account"], fields={"Account": ["Name"]}))
+            mark = state.get("Account")
+            assert mark is not None
+
+            r = random.randrange(1, 5000, 2)
+            account = self.sf.create_account(f"Sync Test Account{r}", fetch=False)
+            events = list(self.sf.iter_changes(state, ["Account"], fields={"Account": ["Name"]}))
+            assert account["Id"] in [event.record_id for event in events]
+            assert state.get("Account") > mark
+
+            self.sf.delete_account_by_id(account["Id"])
+            events = list(self.sf.iter_changes(state, ["Account"], fields={"Account": ["Name"]}))
+            assert [event.deleted for event in events if event.record_id == account["Id"]] == [True]
+
+    def test_skip_unchanged_writes(self):
+        sf = SalesforceClient(
+            connection_config_filepath=Path("salesforce-config-dev.json"),
+            record_cache=MemoryRecordCache(),
+            skip_unchanged_writes=True,
+        )
+        prop = sf.get_first_property(fields=["Name"])
+        assert sf.prefetch_records("Property__c", [prop["Id"]]) == 1
+
+        sf.update_property(prop["Id"], fetch=False, Name=prop["Name"])
+        assert sf.skipped_writes == 1
+
+    def test_governor(self):
+        governor = ApiGovernor()
+        sf = SalesforceClient(connection_config_filepath=Path("salesforce-config-dev.json"), governor=governor)
+        sf.get_first_property(fields=["Name"])
+        metrics = governor.metrics()
+        assert metrics["api_requests_limit"] > 0
+        assert metrics["requests"] >= 1
+
+    def test_record_not_found(self):
+        with pytest.raises(RecordNotFoundError):
+            self.sf.get_property_by_id("a0056000005SoEiXXX")
+
+    def test_job_runner(self):
+        prop = self.sf.get_first_property(fields=["Name"])
+        with tempfile.TemporaryDirectory() as tmpdir:
+            runner = JobRunner(self.sf, Path(tmpdir) / "journal.sqlite")
+            records = [{"Id": prop["Id"], "Name": prop["Name"]}]
+            summary = runner.run_bulk_upsert("properties", "Property__c", records)
+            assert summary.succeeded == 1
+
+            summary = runner.run_bulk_upsert("properties", "Property__c", records)
+            assert summary.skipped == 1
+            runner.journal.close()
+
+    def test_session_cache(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = FileSessionCache(Path(tmpdir) / "sessions.json")
+            sf = SalesforceClient(connection_config_filepath=Path("salesforce-config-dev.json"), session_cache=cache)
+            other = SalesforceClient(connection_config_filepath=Path("salesforce-config-dev.json"), session_cache=cache)
+            assert other.connection.session_id == sf.connection.session_id
+            assert other.get_first_property(fields=["Name"])["Id"]
+
+    def test_list_object_names(self):
+        objects = self.sf.list_object_names()
+        assert "Account" in objects
+        assert "Property__c" in objects
+        assert self.sf.schema_registry.stats()["requests"] >= 1
@@ -0,0 +1,87 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import datetime
+import json
+import tempfile
+import unittest
+from decimal import Decimal
+
+import pytest
+
+from seed_salesforce.exceptions import SalesforceClientError
+from seed_salesforce.schema import SchemaRegistry, serialize_record, serialize_value
+
+DESCRIBE = {
+    "fields": [
+        {"name": "Id", "type": "id"},
+        {"name": "Name", "type": "string"},
+        {"name": "ENERGY_STAR_Score__c", "type": "double"},
+    ],
+}
+
+
+class SerializeTest(unittest.TestCase):
+    def test_serialize_value(self):
+        eastern = datetime.timezone(datetime.timedelta(hours=-5))
+        moment = datetime.datetime(2024, 1, 2, 19, 4, 5, 678900, tzinfo=eastern)
+        assert serialize_value(moment, "datetime") == "2024-01-03T00:04:05.678Z"
+        assert serialize_value(datetime.date(2024, 1, 2), "datetime") == "2024-01-02T00:00:00.000Z"
+        assert serialize_value(moment, "date") == "2024-01-02"
+        assert serialize_value(datetime.time(8, 30), "time") == "08:30:00.000Z"
+        assert json.dumps(serialize_value(Decimal("80.50"), "double")) == "80.5"
+        assert json.dumps(serialize_value(Decimal("80"), "currency")) == "80"
+        assert json.dumps(serialize_value(12.0, "int")) == "12"
+        assert serialize_value("TRUE", "boolean") is True
+        assert serialize_value(["Office", "Retail"], "multipicklist") == "Office;Retail"
+        assert serialize_value(Decimal("1.10"), "string") == "1.10"
+        assert serialize_value(None, "double") is None
+
+    def test_serialize_record_is_json(self):
+        record = serialize_record(
+            {"name": Decimal("12"), "Year_Ending__c": datetime.date(2023, 12, 31), "Unknown__c": Decimal("0.5")},
+            {"Name": "string", "Year_Ending__c": "date"},
+        )
+        assert json.loads(json.dumps(record)) == {"name": "12", "Year_Ending__c": "2023-12-31", "Unknown__c": 0.5}
+
+
+class SchemaRegistryTest(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.fetches = []
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def fetcher(self, path, if_modified_since):
+        self.fetches.append((path, if_modified_since))
+        if if_modified_since:
+            return None, if_modified_since
+        return DESCRIBE, "Mon, 01 Jan 2024 00:00:00 GMT"
+
+    def registry(self, **kwargs):
+        registry = SchemaRegistry(cache_dir=self.tempdir.name, **kwargs)
+        registry.fetcher = self.fetcher
+        return registry
+
+    def test_descriptions_are_cached_and_revalidated(self):
+        registry = self.registry()
+        assert registry.field_types("Property__c")["ENERGY_STAR_Score__c"] == "double"
+        assert registry.field_types("Property__c") is registry.field_types("Property__c")
+        assert self.fetches == [("sobjects/Property__c/describe/", None)]
+
+        # another process reads the description from disk
+        assert self.registry().describe("Property__c") == DESCRIBE
+        assert len(self.fetches) == 1
+
+        expired = self.registry(max_age=0)
+        assert expired.describe("Property__c") == DESCRIBE
+        assert self.fetches[1] == ("sobjects/Property__c/describe/", "Mon, 01 Jan 2024 00:00:00 GMT")
+        assert expired.stats()["not_modified"] == 1
+
+        expired.invalidate("Property__c")
+        assert expired.describe("Property__c") == DESCRIBE
+        assert self.fetches[2] == ("sobjects/Property__c/describe/", None)
+
+    def test_detached_registry_fails(self):
+        with pytest.raises(SalesforceClientError, match="not attached"):
+            SchemaRegistry().describe("Account")
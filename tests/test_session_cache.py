@@ -0,0 +1,110 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import os
+import stat
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import pytest
+import requests
+
+from seed_salesforce.salesforce_client import (
+    _refresh_connection_session,
+    _reset_metadata_api,
+    _set_session_refresher,
+)
+from seed_salesforce.session_cache import FileSessionCache, SessionCache, session_cache_key
+
+
+class FileSessionCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tempdir.name) / "sessions.json"
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_sessions_are_shared_between_caches(self):
+        FileSessionCache(self.path).set("key", "00D!session", "https://example.my.salesforce.com")
+
+        session = FileSessionCache(self.path).get("key")
+        assert session["session_id"] == "00D!session"
+        assert session["instance_url"] == "https://example.my.salesforce.com"
+        # only readable by its owner
+        assert not os.stat(self.path).st_mode & (stat.S_IRWXG | stat.S_IRWXO)
+
+        FileSessionCache(self.path).delete("key")
+        assert FileSessionCache(self.path).get("key") is None
+
+    def test_old_sessions_are_not_reused(self):
+        cache = FileSessionCache(self.path, max_age=60)
+        cache.set("key", "00D!session", "https://example.my.salesforce.com")
+        assert cache.get("key") is not None
+
+        cache.max_age = 0
+        time.sleep(0.01)
+        assert cache.get("key") is None
+
+    def test_lock_is_reentrant_and_breaks_stale_locks(self):
+        cache = FileSessionCache(self.path, lock_timeout=0)
+        with cache.lock():
+            assert cache.lock_path.exists()
+            # saving takes the lock again
+            cache.set("key", "00D!session", "https://example.my.salesforce.com")
+        assert not cache.lock_path.exists()
+
+        # left behind by a process that crashed
+        cache.lock_path.touch()
+        time.sleep(0.01)
+        with cache.lock():
+            cache.delete("key")
+        assert cache.get("key") is None
+
+    def test_incomplete_backends_fail_on_construction(self):
+        class IncompleteCache(SessionCache):
+            def _load(self, key):
+                return self.cached.get(key)
+
+        with pytest.raises(TypeError):
+            IncompleteCache(Path(self.tempdir.name) / "sessions.lock")
+
+    def test_key_excludes_secrets(self):
+        params = {"username": "user@example.com", "password": "secret", "security_token": "token", "domain": "test"}
+        key = session_cache_key(params)
+        assert key == session_cache_key({**params, "password": "rotated"})
+        assert key != session_cache_key({**params, "domain": "login"})
+        assert "secret" not in key
+
+
+class SessionRefreshTest(unittest.TestCase):
+    """The private simple_salesforce attributes used to log in again, fails if a new release changes them"""
+
+    def test_refresh_session(self):
+        from simple_salesforce import Salesforce
+
+        connection = Salesforce(
+            session_id="expired",
+            instance_url="https://example.my.salesforce.com",
+            session=requests.Session(),
+        )
+        # a connection created from a session id can't log in again by itself
+        assert not _refresh_connection_session(connection)
+
+        _set_session_refresher(connection, lambda: ("renewed", "other.my.salesforce.com"))
+        assert _refresh_connection_session(connection)
+        assert (connection.session_id, connection.sf_instance) == ("renewed", "other.my.salesforce.com")
+        assert connection.headers["Authorization"] == "Bearer renewed"
+
+    def test_reset_metadata_api(self):
+        from simple_salesforce import Salesforce
+
+        connection = Salesforce(
+            session_id="expired",
+            instance_url="https://example.my.salesforce.com",
+            session=requests.Session(),
+        )
+        mdapi = connection.mdapi
+        _reset_metadata_api(connection)
+        assert connection.mdapi is not mdapi
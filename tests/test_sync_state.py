@@ -0,0 +1,91 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import datetime
+import tempfile
+import unittest
+from pathlib import Path
+
+import pytest
+
+from seed_salesforce.sync_state import JSONSyncState, SQLiteSyncState, SyncState, parse_datetime
+from tests.mock_salesforce import MockSalesforce
+
+
+class SyncStateTests:
+    """Tests shared by the sync state backends, mixed into a TestCase that defines make_state"""
+
+    def test_get_set_reset(self):
+        state = self.make_state()
+        assert state.get("Property__c") is None
+
+        mark = parse_datetime("2024-01-02T03:04:05.000+0000")
+        state.set("Property__c", mark)
+        assert state.get("Property__c") == mark
+        assert state.get("Benchmark__c") is None
+
+        state.reset("Property__c")
+        assert state.get("Property__c") is None
+
+    def test_marks_are_stored_in_utc(self):
+        state = self.make_state()
+        eastern = datetime.timezone(datetime.timedelta(hours=-5))
+        state.set("Account", datetime.datetime(2024, 1, 1, 19, 0, tzinfo=eastern))
+        assert state.get("Account") == datetime.datetime(2024, 1, 2, 0, 0, tzinfo=datetime.timezone.utc)
+        assert state.get("Account").tzinfo == datetime.timezone.utc
+
+    def test_persistence(self):
+        mark = parse_datetime("2024-01-02T03:04:05.000+0000")
+        self.make_state().set("Contact", mark)
+        assert self.make_state().get("Contact") == mark
+
+
+class JSONSyncStateTest(SyncStateTests, unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def make_state(self):
+        return JSONSyncState(Path(self.tempdir.name) / "sync-state.json")
+
+
+class SQLiteSyncStateTest(SyncStateTests, unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.states = []
+
+    def tearDown(self):
+        for state in self.states:
+            state.close()
+        self.tempdir.cleanup()
+
+    def make_state(self):
+        state = SQLiteSyncState(Path(self.tempdir.name) / "sync-state.sqlite")
+        self.states.append(state)
+        return state
+
+
+class SyncStateBaseTest(unittest.TestCase):
+    def test_incomplete_backends_fail_on_construction(self):
+        class IncompleteSyncState(SyncState):
+            def _delete(self, object_name):
+                self.deleted = object_name
+
+        with pytest.raises(TypeError):
+            IncompleteSyncState()
+
+
+class IterChangesTest(unittest.TestCase):
+    def test_selects_the_sync_fields_unless_given(self):
+        with MockSalesforce() as mock, tempfile.TemporaryDirectory() as tempdir:
+            mock.seed("Benchmark__c", [{"Salesforce_Benchmark_ID__c": "BM-1", "Site_EUI__c": 80.5}])
+            sf = mock.client()
+            state = JSONSyncState(Path(tempdir) / "sync-state.json")
+
+            [event] = sf.iter_changes(state, ["Benchmark__c"])
+            assert set(event.record) == {"Id", "SystemModstamp", "IsDeleted", "Salesforce_Benchmark_ID__c"}
+
+            state.reset("Benchmark__c")
+            [event] = sf.iter_changes(state, ["Benchmark__c"], fields={"Benchmark__c": ["Site_EUI__c"]})
+            assert event.record["Site_EUI__c"] == pytest.approx(80.5)
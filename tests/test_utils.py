@@ -0,0 +1,110 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import csv
+import datetime
+import importlib.util
+import io
+import tempfile
+import unittest
+from decimal import Decimal
+from pathlib import Path
+
+from seed_salesforce.results import RecordResult
+from seed_salesforce.utils import (
+    bulk_results_in_order,
+    chunked,
+    csv_to_parquet,
+    flatten_record,
+    records_to_csv_batches,
+    to_csv_value,
+)
+
+
+class UtilsTest(unittest.TestCase):
+    def test_chunked(self):
+        chunks = list(chunked(iter(range(7)), 3))
+        assert chunks == [[0, 1, 2], [3, 4, 5], [6]]
+        assert list(chunked([], 3)) == []
+
+    def test_flatten_record(self):
+        record = {
+            "attributes": {"type": "Contact", "url": "/services/data/v59.0/sobjects/Contact/0038a00000abcdeAAA"},
+            "Id": "0038a00000abcdeAAA",
+            "Account": {"attributes": {"type": "Account"}, "Name": "Scrumptious Ice Cream", "Owner": {"Alias": "nl"}},
+            "ReportsTo": None,
+            "Cases": {"totalSize": 1, "done": True, "records": [{"attributes": {"type": "Case"}, "Id": "500xx"}]},
+        }
+        assert flatten_record(record) == {
+            "Id": "0038a00000abcdeAAA",
+            "Account.Name": "Scrumptious Ice Cream",
+            "Account.Owner.Alias": "nl",
+            "ReportsTo": None,
+            "Cases": [{"Id": "500xx"}],
+        }
+
+    def test_to_csv_value(self):
+        assert to_csv_value(None) == ""
+        assert to_csv_value(True) == "true"
+        assert to_csv_value(datetime.date(2024, 1, 31)) == "2024-01-31"
+        assert to_csv_value(Decimal("1.50")) == "1.50"
+        assert to_csv_value(42) == "42"
+
+    def test_bulk_results_in_order(self):
+        records = [{"Name": "A", "Score__c": 1}, {"Name": "B", "Score__c": None}, {"Name": "C", "Score__c": 3}]
+        results = [
+            RecordResult(success=True, record={"Name": "C", "Score__c": "3"}),
+            RecordResult(success=True, record={"Name": "A", "Score__c": "1"}),
+            RecordResult(success=False, record={"Name": "B", "Score__c": ""}),
+        ]
+        assert bulk_results_in_order(records, results) == [results[1], results[2], results[0]]
+
+        reformatted = RecordResult(success=True, record={"Name": "C", "Score__c": "3.0"})
+        assert bulk_results_in_order(records, [reformatted, *results[1:]]) == [results[1], results[2], reformatted]
+
+    def test_records_to_csv_batches(self):
+        records = [{"Salesforce_Benchmark_ID__c": f"B{i}", "Score__c": i} for i in range(5)]
+        records[4]["Notes__c"] = "has, a comma"
+        batches = list(records_to_csv_batches(records, batch_size=2, max_bytes=1024))
+        assert len(batches) == len(records) // 2 + 1
+
+        rows = list(csv.DictReader(io.StringIO(batches[2])))
+        assert rows == [{"Salesforce_Benchmark_ID__c": "B4", "Score__c": "4", "Notes__c": "has, a comma"}]
+
+    def test_records_to_csv_batches_splits_on_size(self):
+        # each row is 101 bytes, so only 3 rows fit next to the header
+        records = [{"Name": "x" * 100} for _ in range(10)]
+        batches = list(records_to_csv_batches(records, batch_size=10, max_bytes=350))
+        assert [len(list(csv.DictReader(io.StringIO(batch)))) for batch in batches] == [3, 3, 3, 1]
+        assert all(batch.startswith("Name\n") for batch in batches)
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow is not installed")
+    def test_csv_to_parquet(self):
+        import pyarrow.parquet as pq
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            csv_path = Path(tmpdir) / "benchmarks.csv"
+            csv_path.write_text(
+                '"Id","Score__c","Active__c","Account.Name"\n"a0B1","75.5","true","Acme"\n"a0B2","","false",""\n',
+            )
+            parquet_path = Path(tmpdir) / "benchmarks.parquet"
+            csv_to_parquet(csv_path, parquet_path, {"Id": "id", "Score__c": "double", "Active__c": "boolean"})
+
+            table = pq.read_table(parquet_path)
+            assert str(table.schema.field("Score__c").type) == "double"
+            assert str(table.schema.field("Active__c").type) == "bool"
+            assert str(table.schema.field("Account.Name").type) == "string"
+            assert table.to_pylist()[1] == {"Id": "a0B2", "Score__c": None, "Active__c": False, "Account.Name": None}
+
+    def test_record_result_from_bulk_row(self):
+        row = {"sf__Id": "a0156000004bOpHAAU", "sf__Created": "true", "Salesforce_Benchmark_ID__c": "B1"}
+        result = RecordResult.from_bulk_row(row, True, job_id="750xx")
+        assert result.success
+        assert result.created
+        assert result.record_id == "a0156000004bOpHAAU"
+        assert result.record == {"Salesforce_Benchmark_ID__c": "B1"}
+
+        row = {"sf__Id": "", "sf__Error": "REQUIRED_FIELD_MISSING:Required fields are missing", "Name": ""}
+        result = RecordResult.from_bulk_row(row, False)
+        assert not result.success
+        assert result.record_id is None
+        assert result.errors == ["REQUIRED_FIELD_MISSING:Required fields are missing"]
@@ -0,0 +1,90 @@
+# Copyright (c) Alliance for Sustainable Energy, LLC. See also https://github.com/seed-platform/seed-salesforce/blob/develop/LICENSE.md
+
+import unittest
+
+import pytest
+from simple_salesforce.exceptions import SalesforceMalformedRequest
+
+from seed_salesforce.write_behind import WriteBehindQueue
+from tests.mock_salesforce import MockSalesforce
+
+PROPERTIES = 5
+TIMEOUT = 10
+
+
+class WriteBehindQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.mock = MockSalesforce()
+        self.mock.start()
+        self.ids = self.mock.seed(
+            "Property__c",
+            [{"Name": f"Property {i}", "Gross_Floor_Area__c": 1000.0} for i in range(PROPERTIES)],
+        )
+
+    def tearDown(self):
+        self.mock.stop()
+
+    def client(self, **kwargs):
+        self.queue = WriteBehindQueue(**kwargs)
+        self.addCleanup(self.queue.close)
+        return self.mock.client(write_behind=self.queue)
+
+    def test_updates_of_a_record_are_coalesced(self):
+        sf = self.client(max_delay=None)
+        results = []
+        first = sf.update_property(self.ids[0], Name="Renamed")
+        second = sf.update_property(self.ids[0], Gross_Floor_Area__c=2000.0)
+        third = sf.update_property(self.ids[0], Gross_Floor_Area__c=3000.0)
+        other = self.queue.submit("Property__c", self.ids[1], {"Name": "Other"}, callback=results.append)
+        assert not first.done()
+
+        assert [result.record_id for result in self.queue.flush()] == [self.ids[0], self.ids[1]]
+        assert first.result() is second.result() is third.result()
+        assert other.result().success
+        assert results == [other]
+        assert self.mock.records["Property__c"][self.ids[0]]["Gross_Floor_Area__c"] == pytest.approx(3000)
+        # one collection request for the four updates
+        assert self.mock.stats()["by_endpoint"] == {"PATCH composite/sobjects": 1}
+        assert self.queue.metrics() == {"submitted": 4, "written": 2, "coalesced": 2, "pending": 0, "flushes": 1}
+
+    def test_size_and_time_thresholds(self):
+        sf = self.client(max_records=2, max_delay=0.05)
+        first = sf.update_property(self.ids[0], Name="First")
+        # written by the background thread after max_delay
+        assert first.result(timeout=TIMEOUT).success
+
+        sf.update_property(self.ids[1], Name="Second")
+        third = sf.update_property(self.ids[2], Name="Third")
+        # written in the calling thread, once two records are pending
+        assert third.done()
+        assert self.mock.stats()["by_endpoint"] == {"PATCH composite/sobjects": 2}
+
+    def test_bulk_writes_and_unchanged_records(self):
+        self.queue = WriteBehindQueue(max_delay=None, bulk_threshold=2)
+        self.addCleanup(self.queue.close)
+        sf = self.mock.client(write_behind=self.queue, skip_unchanged_writes=True)
+        futures = [sf.update_property(record_id, Name=f"Property {i}") for i, record_id in enumerate(self.ids)]
+        futures.append(sf.update_property(self.ids[0], Name="Renamed"))
+        futures.append(sf.update_property(self.ids[1], Name="Renamed"))
+        self.queue.flush()
+
+        assert all(future.result().success for future in futures)
+        assert sf.skipped_writes == PROPERTIES - 2
+        assert self.mock.stats()["by_endpoint"]["POST jobs/ingest"] == 1
+        assert self.mock.records["Property__c"][self.ids[1]]["Name"] == "Renamed"
+
+    def test_failed_requests_fail_the_futures(self):
+        sf = self.client(max_delay=None)
+        self.mock.inject_error(status=400, error_code="MALFORMED_QUERY", resource="composite/sobjects")
+        future = sf.update_property(self.ids[0], Name="Renamed")
+        assert self.queue.flush() == []
+        with pytest.raises(SalesforceMalformedRequest):
+            future.result()
+
+    def test_read_arguments_are_rejected(self):
+        sf = self.client(max_delay=None)
+        with pytest.raises(ValueError, match="fields can't be passed"):
+            sf.update_property(self.ids[0], fields=["Name"], Name="Renamed")
+        with pytest.raises(ValueError, match="fetch can't be passed"):
+            sf.update_contact("003000000000000001", fetch=False, LastName="Bachman")
+        assert len(self.queue) == 0